@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from app.core.supabase_client import get_supabase
+from app.core.token_verifier import get_token_verifier
 from app.schemas.auth import AuthSchema
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -23,4 +24,7 @@ async def login(data: AuthSchema):
     return {
         "access_token": response.session.access_token,
         "token_type": "bearer"
-    }
\ No newline at end of file
+    }
+@router.get("/cache/stats")
+def get_token_cache_stats():
+    return get_token_verifier().stats()
@@ -10,8 +10,9 @@ def get_chunk(
     transcript: TranscriptResponse,
     max_chars: int = 2000,
     overlap_chars: int = 300,
+    max_tokens: int = None,
+    overlap_tokens: int = None,
     service: ChunkService = Depends(get_chunk_service)
 ):
-    return service.get_chunks(transcript=transcript, max_chars=max_chars, overlap_chars=overlap_chars)
-
-
+    segments = [{"text": s.text, "start": s.start, "duration": s.duration} for s in transcript.snippets]
+    return service.get_chunks(segments=segments, source_id=transcript.video_id, max_chars=max_chars, overlap_chars=overlap_chars, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
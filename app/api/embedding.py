@@ -2,6 +2,7 @@ from typing import List
 from fastapi import APIRouter, Depends
 
 from app.services.embedding_service import EmbeddingService, get_embedding_service
+from app.core.embedding import get_embedding_cache, get_micro_batcher
 
 router = APIRouter(prefix="/embedding", tags=["Embedding"])
 
@@ -10,4 +11,19 @@ def get_embedding(
     texts: List[str],
     service: EmbeddingService = Depends(get_embedding_service)
     ):
-    return service.embed_texts(texts=texts)
\ No newline at end of file
+    return service.embed_texts(texts=texts)
+
+@router.get("/cache/stats")
+def get_embedding_cache_stats():
+    cache = get_embedding_cache()
+    if not cache:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/batcher/stats")
+def get_embedding_batcher_stats():
+    batcher = get_micro_batcher()
+    if not batcher:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
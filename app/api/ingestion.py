@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, UploadFile
 from app.services.ingestion_service import IngestionService, get_ingestion_service
+from app.services.ingestion_job_service import IngestionJobService, get_ingestion_job_service
+from app.schemas.bulk_ingestion import BulkIngestionRequest
 from app.core.auth import get_current_user
 
 router = APIRouter(prefix="/ingestion", tags=["Ingestion"])
@@ -16,31 +18,66 @@ def get_user_sources(
 
     return response
 
-@router.post("/video")
+def _job_status(job):
+    return {
+        "job_id": str(job.id),
+        "source_id": job.source_id,
+        "source_type": job.source_type,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": {"current": job.progress_current, "total": job.progress_total},
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+@router.post("/video", status_code=202)
 def process_video_pipeline(
     video_id:str, 
     max_chars: int = 2000, 
     overlap_chars: int = 300, 
+    update: bool = False,
     user_id = Depends(get_current_user),
-    ingestion_service: IngestionService = Depends(get_ingestion_service)):
+    job_service: IngestionJobService = Depends(get_ingestion_job_service)):
 
-    response = ingestion_service.process_video(video_id=video_id, user_id=user_id, max_chars=max_chars, overlap_chars=overlap_chars)
+    # update=true re-ingests an existing source, re-embedding only the chunks that changed
+    job = job_service.submit_video(video_id=video_id, user_id=user_id, max_chars=max_chars, overlap_chars=overlap_chars, update=update)
 
-    return response
+    return _job_status(job)
+
+@router.post("/videos/bulk", status_code=202)
+def process_bulk_video_pipeline(
+    request: BulkIngestionRequest,
+    user_id = Depends(get_current_user),
+    job_service: IngestionJobService = Depends(get_ingestion_job_service)):
+
+    job = job_service.submit_bulk(request=request, user_id=user_id)
 
-@router.post("/pdf")
+    return _job_status(job)
+
+@router.post("/pdf", status_code=202)
 async def ingest_pdf_pipeline(
     file: UploadFile,
+    max_chars: int = 2000, 
+    overlap_chars: int = 300, 
+    update: bool = False,
     user_id = Depends(get_current_user),
-    ingestion_service = Depends(get_ingestion_service)
+    job_service: IngestionJobService = Depends(get_ingestion_job_service)
 ):
-    # Pass current_user.id so the service knows which namespace to use
-    response = await ingestion_service.process_pdf(
-        file=file, 
-        user_id=user_id
-    )
+    job = await job_service.submit_pdf(file=file, user_id=user_id, max_chars=max_chars, overlap_chars=overlap_chars, update=update)
 
-    return response
+    return _job_status(job)
+
+@router.get("/jobs/{job_id}")
+def get_ingestion_job(
+    job_id: str,
+    user_id = Depends(get_current_user),
+    job_service: IngestionJobService = Depends(get_ingestion_job_service)
+):
+    job = job_service.get_job(job_id=job_id, user_id=user_id)
+
+    return _job_status(job)
 
 @router.delete("/user")
 def clear_by_user(
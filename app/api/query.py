@@ -1,11 +1,28 @@
+import json
 from fastapi import APIRouter, Depends
-from app.services.query_service import QueryService, get_query_service
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.services.query_service import QueryService, get_query_service, get_async_query_service
 from app.core.auth import get_current_user
+from app.core.answer_cache import get_answer_cache
 
 router = APIRouter(prefix="/query", tags=["query"])
 
 @router.post("/")
-def query_response(
+async def query_response(
+    question: str,
+    session_id: str,
+    top_k: int=5,
+    source_id: str=None,
+    user_id = Depends(get_current_user),
+    query_service: QueryService = Depends(get_async_query_service)
+):
+    response = await query_service.aquery(user_id=user_id, question=question, session_id=session_id, top_k= top_k, source_id=source_id)
+
+    return response
+
+@router.post("/stream")
+def query_stream(
     question: str,
     session_id: str,
     top_k: int=5,
@@ -13,6 +30,27 @@ def query_response(
     user_id = Depends(get_current_user),
     query_service: QueryService = Depends(get_query_service)
 ):
-    response = query_service.query(user_id=user_id, question=question, session_id=session_id, top_k= top_k, source_id=source_id)
+    """Same as POST /query, but answers as Server-Sent Events: sources, token..., done."""
+    events = query_service.stream_query(user_id=user_id, question=question, session_id=session_id, top_k=top_k, source_id=source_id)
+
+    async def event_stream():
+        try:
+            async for event, data in iterate_in_threadpool(events):
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            # On client disconnect this lands in stream_query's finally, which saves the partial answer
+            # and closes the Gemini stream; both block, so keep them off the event loop
+            await run_in_threadpool(events.close)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    return response
\ No newline at end of file
+@router.get("/cache/stats")
+def get_answer_cache_stats():
+    cache = get_answer_cache()
+    if not cache:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
@@ -6,6 +6,7 @@ from app.services.session_service import SessionService, get_session_service
 from app.schemas.session import ChatMessage
 from app.schemas.chat_request import ChatRequest
 from app.core.auth import get_current_user
+from app.core.history_cache import get_history_cache
 
 router = APIRouter(
     prefix="/sessions",
@@ -18,23 +19,15 @@ async def chat_with_video(
     service: SessionService = Depends(get_session_service),
     user_id = Depends(get_current_user)
 ):
-    # 1. Save the User's message to Supabase immediately
-    service.add_message(
-        user_id=user_id,
-        session_id=request.session_id, 
-        role="user", 
-        content=request.message
-    )
-    
-    # 2. (Placeholder)
+    # 1. (Placeholder)
     ai_response = f"I'm processing your question about the video: {request.message}"
     
-    # 3. Save the AI's response to the same session
-    service.add_message(
+    # 2. Save the user's message and the AI's response together
+    service.add_exchange(
         user_id=user_id,
         session_id=request.session_id, 
-        role="assistant", 
-        content=ai_response
+        question=request.message,
+        answer=ai_response
     )
     
     return {"response": ai_response}
@@ -56,6 +49,13 @@ def get_chat_history(session_id:str, user_id = Depends(get_current_user), servic
         } for msg in history], 
         "message": "No history found."}
 
+@router.get("/cache/stats")
+def get_history_cache_stats():
+    cache = get_history_cache()
+    if not cache:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
 @router.delete("/{session_id}")
 def clear_session(session_id: str, service: SessionService = Depends(get_session_service)):
     """Wipe the history for a session."""
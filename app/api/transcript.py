@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 
-from app.services.transcript_service import TranscriptService, get_transcript_service
+from app.services.transcript_service import TranscriptService, get_transcript_service, get_transcript_cache
 
 from app.schemas.transcript import TranscriptResponse
 
@@ -9,6 +9,14 @@ router = APIRouter(prefix="/transcript", tags=["Transcript"])
 @router.get("/", response_model=TranscriptResponse)
 def get_transcript(
     video_id: str,
+    language: str = "en",
     service: TranscriptService = Depends(get_transcript_service)
     ):
-    return service.get_transcript(video_id=video_id)
\ No newline at end of file
+    return service.get_transcript(video_id=video_id, language=language)
+
+@router.get("/cache/stats")
+def get_transcript_cache_stats():
+    cache = get_transcript_cache()
+    if not cache:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
\ No newline at end of file
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Minimum cosine similarity between two questions for the cached answer to be reused
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE", "256"))
+
+_answer_cache_instance = None
+
+
+def history_fingerprint(history: list) -> str:
+    """Stable digest of a conversation history; empty history maps to ""."""
+    if not history:
+        return ""
+    digest = hashlib.sha256()
+    for msg in history:
+        digest.update(f"{msg.role}\0{' '.join(msg.content.split())}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _Scope:
+    """Cached answers for one (namespace, source filter) pair."""
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.entries: List[Dict[str, Any]] = []
+
+
+class AnswerCache:
+    """
+    Semantic cache of generated answers. Entries are scoped by user namespace
+    and source filter; a lookup hits when a cached question's embedding has
+    cosine similarity >= `threshold` with the new one and both were asked with
+    the same conversation history (typically none).
+    """
+    def __init__(self, threshold: float, ttl_seconds: float, max_entries_per_scope: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_scope = max_entries_per_scope
+
+        self._scopes: Dict[Tuple[str, Optional[str]], _Scope] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "latency_saved_seconds": 0.0}
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, namespace: str, source_id: Optional[str], question_vector, history: list) -> Optional[Dict[str, Any]]:
+        fingerprint = history_fingerprint(history)
+        query = self._normalize(question_vector)
+
+        with self._lock:
+            scope = self._scopes.get((namespace, source_id))
+            if scope is None or not scope.entries:
+                self._stats["misses"] += 1
+                return None
+
+            scores = scope.vectors @ query
+            now = time.time()
+            for row in np.argsort(-scores):
+                if scores[row] < self.threshold:
+                    break
+                entry = scope.entries[row]
+                if entry["history"] != fingerprint or now - entry["created_at"] > self.ttl_seconds:
+                    continue
+
+                self._stats["hits"] += 1
+                self._stats["latency_saved_seconds"] += entry["latency_seconds"]
+                return {"answer": entry["answer"], "sources": entry["sources"], "similarity": float(scores[row])}
+
+            self._stats["misses"] += 1
+            return None
+
+    def store(self, namespace: str, source_id: Optional[str], question_vector, history: list, answer: str, sources: list, latency_seconds: float):
+        vector = self._normalize(question_vector)
+        entry = {
+            "answer": answer,
+            "sources": sources,
+            "history": history_fingerprint(history),
+            "source_ids": {s.get("metadata", {}).get("source") for s in sources},
+            "created_at": time.time(),
+            "latency_seconds": latency_seconds,
+        }
+
+        with self._lock:
+            scope = self._scopes.get((namespace, source_id))
+            if scope is None:
+                scope = self._scopes[(namespace, source_id)] = _Scope(dim=len(vector))
+
+            scope.vectors = np.vstack([scope.vectors, vector[None, :]])
+            scope.entries.append(entry)
+            if len(scope.entries) > self.max_entries_per_scope:
+                scope.vectors = scope.vectors[1:]
+                scope.entries = scope.entries[1:]
+            self._stats["stores"] += 1
+
+    def invalidate_source(self, namespace: str, source_id: str):
+        """
+        Drops answers that could depend on `source_id`: everything filtered to
+        that source, and unfiltered answers of the namespace (any source may
+        have contributed, or would now contribute, to them).
+        """
+        with self._lock:
+            for key in list(self._scopes):
+                scope_namespace, scope_source = key
+                if scope_namespace != namespace:
+                    continue
+                if scope_source is None or scope_source == source_id:
+                    self._stats["invalidations"] += len(self._scopes[key].entries)
+                    del self._scopes[key]
+
+    def invalidate_namespace(self, namespace: str):
+        with self._lock:
+            for key in [k for k in self._scopes if k[0] == namespace]:
+                self._stats["invalidations"] += len(self._scopes[key].entries)
+                del self._scopes[key]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = sum(len(scope.entries) for scope in self._scopes.values())
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def get_answer_cache():
+    global _answer_cache_instance
+    if _answer_cache_instance is None and ANSWER_CACHE_ENABLED:
+        _answer_cache_instance = AnswerCache(
+            threshold=ANSWER_CACHE_THRESHOLD,
+            ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+            max_entries_per_scope=ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE
+        )
+
+    return _answer_cache_instance
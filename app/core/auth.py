@@ -1,19 +1,33 @@
-from fastapi import Header, HTTPException, Depends
-from app.core.supabase_client import get_supabase
-from fastapi.security import HTTPBearer
+import time
+from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from app.core.token_verifier import get_token_verifier, InvalidTokenError
+from app.core.metrics import AUTH_SECONDS
 
 security = HTTPBearer()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    print(f"DEBUG: Received credentials: {credentials}")
     token = credentials.credentials
-    supabase = get_supabase()
+    verifier = get_token_verifier()
+    started = time.perf_counter()
+
+    # Tokens verified earlier are answered from memory without leaving the event loop
+    user_id = verifier.cached(token)
+    if user_id is not None:
+        AUTH_SECONDS.observe(time.perf_counter() - started, result="cached")
+        return user_id
 
     try:
-        user_response = supabase.auth.get_user(token)
-        if not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid user")
-        return user_response.user.id
+        # A miss may fetch the JWKS or call Supabase; keep that off the event loop
+        user_id = await run_in_threadpool(verifier.verify, token)
+    except InvalidTokenError as e:
+        AUTH_SECONDS.observe(time.perf_counter() - started, result="rejected")
+        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
\ No newline at end of file
+        AUTH_SECONDS.observe(time.perf_counter() - started, result="rejected")
+        print(f"Token verification error: {e}")
+        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+
+    AUTH_SECONDS.observe(time.perf_counter() - started, result="verified")
+    return user_id
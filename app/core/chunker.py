@@ -1,4 +1,6 @@
-from typing import List, Dict, Optional
+import re
+from bisect import bisect_right
+from typing import List, Dict, Optional, Iterable, Iterator, Callable, Tuple
 
 def chunk_transcript(
         segments: List[Dict],
@@ -56,4 +58,170 @@ def chunk_transcript(
             "end": current_end
         })
     
-    return chunks
\ No newline at end of file
+    return chunks
+
+# --- Token-aware streaming chunker ---
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_word(word: str, count_tokens: Callable[[str], int], max_tokens: int, token_offsets: Optional[Callable] = None) -> Iterator[Tuple[int, int, int]]:
+    """
+    (start, end, tokens) pieces of a single word longer than `max_tokens`
+    (a URL, or a run-on without spaces). Pieces end on word-piece boundaries
+    when `token_offsets` can map them, otherwise on characters, and each is
+    the longest that still fits.
+    """
+    offsets = token_offsets(word) if token_offsets else None
+    boundaries = sorted({end for _, end in offsets if end} | {len(word)}) if offsets else list(range(1, len(word) + 1))
+
+    start = 0
+    while start < len(word):
+        first = bisect_right(boundaries, start)
+        # At least one boundary per piece, so a lone oversized piece still moves forward
+        end, tokens = boundaries[first], count_tokens(word[start:boundaries[first]])
+        lo, hi = first + 1, len(boundaries) - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            mid_tokens = count_tokens(word[start:boundaries[mid]])
+            if mid_tokens <= max_tokens:
+                end, tokens = boundaries[mid], mid_tokens
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        yield start, end, tokens
+        start = end
+
+
+def _split_segment(seg: Dict, count_tokens: Callable[[str], int], max_tokens: int, token_offsets: Optional[Callable] = None) -> Iterator[Dict]:
+    """
+    Splits one segment into sentence units, sentences longer than
+    `max_tokens` into word runs, and single words longer than that into
+    pieces (see _split_word). Each unit gets a timestamp interpolated from
+    its character offset inside the segment.
+    """
+    text = seg.get("text", "").strip()
+    if not text:
+        return
+
+    seg_start = seg.get("start", 0.0)
+    seg_dur = seg.get("duration", 0.0)
+    total_chars = len(text)
+
+    def unit(piece_start: int, piece_end: int, tokens: int) -> Dict:
+        return {
+            "text": text[piece_start:piece_end].strip(),
+            "start": seg_start + seg_dur * piece_start / total_chars,
+            "end": seg_start + seg_dur * piece_end / total_chars,
+            "tokens": tokens,
+            "page": seg.get("page"),
+        }
+
+    offset = 0
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence_start = text.index(sentence, offset)
+        offset = sentence_start + len(sentence)
+
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            yield unit(sentence_start, offset, tokens)
+            continue
+
+        # No usable sentence boundary (e.g. unpunctuated PDF text): fall back to words
+        piece_start = sentence_start
+        piece_tokens = 0
+        for match in re.finditer(r"\S+", sentence):
+            word_tokens = count_tokens(match.group())
+            if word_tokens > max_tokens:
+                word_start = sentence_start + match.start()
+                if piece_tokens:
+                    yield unit(piece_start, word_start, piece_tokens)
+                for start, end, tokens in _split_word(match.group(), count_tokens, max_tokens, token_offsets):
+                    yield unit(word_start + start, word_start + end, tokens)
+                piece_start = sentence_start + match.end()
+                piece_tokens = 0
+                continue
+            if piece_tokens and piece_tokens + word_tokens > max_tokens:
+                yield unit(piece_start, sentence_start + match.start(), piece_tokens)
+                piece_start = sentence_start + match.start()
+                piece_tokens = 0
+            piece_tokens += word_tokens
+        if piece_tokens:
+            yield unit(piece_start, offset, piece_tokens)
+
+
+def _make_chunk(units: List[Dict]) -> Dict:
+    chunk = {
+        "text": " ".join(u["text"] for u in units),
+        "start": units[0]["start"],
+        "end": units[-1]["end"],
+        "tokens": sum(u["tokens"] for u in units),
+    }
+    # Segments from paged documents carry a page number; keep the range a chunk spans
+    pages = [u["page"] for u in units if u["page"] is not None]
+    if pages:
+        chunk["page"] = pages[0]
+        chunk["page_end"] = pages[-1]
+    return chunk
+
+
+def iter_chunks(
+        segments: Iterable[Dict],
+        count_tokens: Callable[[str], int],
+        max_tokens: int,
+        overlap_tokens: int = 32,
+        max_chars: Optional[int] = None,
+        overlap_chars: Optional[int] = None,
+        token_offsets: Optional[Callable] = None,
+) -> Iterator[Dict]:
+    """
+    Streaming counterpart of chunk_transcript. Consumes segments lazily and
+    yields chunks as soon as they are full, measuring size in model tokens
+    (and optionally characters). Chunks break on sentence boundaries, and the
+    overlap carried into the next chunk is made of whole trailing sentences.
+    `token_offsets(text)` maps word pieces back to characters, so words
+    longer than `max_tokens` are cut between pieces rather than characters.
+    """
+    units: List[Dict] = []
+    tokens = 0
+    chars = 0
+
+    def fits(extra_tokens: int, extra_chars: int) -> bool:
+        if tokens + extra_tokens > max_tokens:
+            return False
+        return max_chars is None or chars + extra_chars + 1 <= max_chars
+
+    for seg in segments:
+        for unit in _split_segment(seg, count_tokens, max_tokens, token_offsets):
+            if units and not fits(unit["tokens"], len(unit["text"])):
+                yield _make_chunk(units)
+
+                # Carry whole trailing units as overlap
+                tail: List[Dict] = []
+                tail_tokens = 0
+                tail_chars = 0
+                for previous in reversed(units[1:]):
+                    if tail_tokens + previous["tokens"] > overlap_tokens:
+                        break
+                    if overlap_chars is not None and tail_chars + len(previous["text"]) + 1 > overlap_chars:
+                        break
+                    tail.insert(0, previous)
+                    tail_tokens += previous["tokens"]
+                    tail_chars += len(previous["text"]) + 1
+
+                units = tail
+                tokens = tail_tokens
+                chars = tail_chars
+
+                # The overlap must never push the next chunk over the limit
+                while units and not fits(unit["tokens"], len(unit["text"])):
+                    dropped = units.pop(0)
+                    tokens -= dropped["tokens"]
+                    chars -= len(dropped["text"]) + 1
+
+            units.append(unit)
+            tokens += unit["tokens"]
+            chars += len(unit["text"]) + 1
+
+    if units:
+        yield _make_chunk(units)
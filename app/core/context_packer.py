@@ -0,0 +1,126 @@
+import math
+from typing import List, Dict, Any, Tuple
+
+# Characters per token for the rough estimate used when sizing prompts
+CHARS_PER_TOKEN = 4
+# Length of the probe used to locate where one chunk's text resumes inside the previous one
+OVERLAP_PROBE_CHARS = 40
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def strip_overlap(previous: str, following: str) -> str:
+    """
+    Returns `following` without the prefix it shares with the end of `previous`
+    (the chunker repeats the tail of each chunk at the start of the next one).
+    """
+    probe = following[:OVERLAP_PROBE_CHARS]
+    if not probe:
+        return following
+
+    pos = previous.rfind(probe)
+    while pos != -1:
+        tail = previous[pos:]
+        if following.startswith(tail):
+            return following[len(tail):].lstrip()
+        pos = previous.rfind(probe, 0, pos)
+
+    return following
+
+
+def _span(chunk: Dict[str, Any]) -> Tuple[float, float]:
+    """Position of a chunk inside its source: pages for PDFs, seconds for videos."""
+    metadata = chunk.get("metadata", {})
+    if metadata.get("page") is not None:
+        return metadata["page"], metadata.get("page_end", metadata["page"])
+    start, end = metadata.get("start"), metadata.get("end")
+    if start is None or end is None or end <= start:
+        return None, None
+    return start, end
+
+
+def merge_chunks(chunks: List[Dict[str, Any]], max_gap: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Merges retrieved chunks of the same source whose [start, end] ranges
+    overlap or touch (within `max_gap` seconds), removing the repeated text.
+    Chunks without timestamps are kept as they are.
+    """
+    merged: List[Dict[str, Any]] = []
+    positioned = []
+    for chunk in chunks:
+        start, end = _span(chunk)
+        if start is None:
+            merged.append(chunk)
+        else:
+            positioned.append((start, end, chunk))
+
+    positioned.sort(key=lambda item: (item[2]["metadata"].get("source", ""), item[0]))
+
+    current = None
+    current_end = None
+    for start, end, chunk in positioned:
+        metadata = chunk["metadata"]
+        if (
+            current is not None
+            and current["metadata"].get("source") == metadata.get("source")
+            and start <= current_end + max_gap
+        ):
+            if chunk["text"] not in current["text"]:
+                current["text"] = f"{current['text']} {strip_overlap(current['text'], chunk['text'])}".strip()
+            current_end = max(current_end, end)
+            for key in ("end", "page_end"):
+                if key in metadata:
+                    current["metadata"][key] = max(current["metadata"].get(key, metadata[key]), metadata[key])
+            current["score"] = max(current["score"], chunk.get("score", 0.0))
+            current["merged_count"] += 1
+            continue
+
+        current = {
+            "text": chunk["text"],
+            "metadata": dict(metadata),
+            "score": chunk.get("score", 0.0),
+            "merged_count": 1,
+        }
+        current_end = end
+        merged.append(current)
+
+    return merged
+
+
+def pack_context(chunks: List[Dict[str, Any]], token_budget: int, max_gap: float = 0.0) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Builds the LLM context from retrieved chunks: merges overlapping neighbours,
+    keeps the best-scoring groups that fit in `token_budget`, and returns them
+    ordered by source and time together with token accounting.
+    """
+    input_tokens = sum(estimate_tokens(c["text"]) for c in chunks)
+    groups = merge_chunks(chunks, max_gap=max_gap)
+
+    packed = []
+    used = 0
+    for group in sorted(groups, key=lambda g: g.get("score", 0.0), reverse=True):
+        tokens = estimate_tokens(group["text"])
+        if used + tokens > token_budget:
+            continue
+        packed.append(group)
+        used += tokens
+
+    if not packed and groups:
+        # Even the best group is over budget; send a truncated copy rather than nothing
+        best = dict(max(groups, key=lambda g: g.get("score", 0.0)))
+        best["text"] = best["text"][:token_budget * CHARS_PER_TOKEN]
+        packed.append(best)
+        used = estimate_tokens(best["text"])
+
+    packed.sort(key=lambda g: (g["metadata"].get("source", ""), g["metadata"].get("page") or 0, g["metadata"].get("start") or 0.0))
+
+    return packed, {
+        "input_chunks": len(chunks),
+        "packed_chunks": len(packed),
+        "dropped_chunks": len(groups) - len(packed),
+        "input_tokens": input_tokens,
+        "packed_tokens": used,
+        "tokens_saved": input_tokens - used,
+    }
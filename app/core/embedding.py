@@ -1,14 +1,137 @@
-from sentence_transformers import SentenceTransformer
+import os
+import threading
 from typing import List
+import numpy as np
 
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+from app.core.embedding_cache import EmbeddingCache, normalize_text
+from app.core.micro_batcher import MicroBatcher
+from app.core.embedding_engines import load_embedding_model
+from app.core.embedding_client import EMBEDDING_SERVER_ADDRESS, get_embedding_client
+from app.core import readiness
+from app.core.metrics import EMBEDDING_BATCH_SIZE
+
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+# "torch", "onnx" or "onnx-int8"; see app/core/embedding_engines.py
+EMBEDDING_ENGINE = os.environ.get("EMBEDDING_ENGINE", "torch").lower()
+# Engines produce slightly different vectors, so cached entries are kept apart per engine
+EMBEDDING_CACHE_NAMESPACE = f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_ENGINE}"
+EMBEDDING_CACHE_ENABLED = os.environ.get("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite3"))
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+# Small requests (e.g. one query) are coalesced with concurrent ones into a single encode call
+EMBEDDING_MICRO_BATCHING = os.environ.get("EMBEDDING_MICRO_BATCHING", "true").lower() == "true"
+EMBEDDING_BATCH_MAX_SIZE = int(os.environ.get("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.environ.get("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+# Model input limit in word pieces, including [CLS]/[SEP]; text beyond it is silently truncated
+EMBEDDING_MAX_SEQ_LENGTH = int(os.environ.get("EMBEDDING_MAX_SEQ_LENGTH", "256"))
+
+embedding_model = None
+_embedding_model_lock = threading.Lock()
+_embedding_cache_instance = None
+_micro_batcher_instance = None
+_tokenizer_instance = None
+
+def get_embedding_model():
+    """Loads the model on first use (or during lifespan warm-up) instead of at import."""
+    global embedding_model
+    if embedding_model is None:
+        with _embedding_model_lock:
+            if embedding_model is None:
+                embedding_model = load_embedding_model(EMBEDDING_MODEL_NAME, EMBEDDING_ENGINE)
+                readiness.mark_ready("embedding_model")
 
-def get_embedding_model() -> SentenceTransformer:
     return embedding_model
 
+def warm_up_embeddings():
+    """Connects to the embedding server when one is configured, otherwise loads the model in-process."""
+    if EMBEDDING_SERVER_ADDRESS:
+        get_embedding_client().ping()
+        readiness.mark_ready("embedding_model")
+    else:
+        get_embedding_model()
+
+def encode(texts: List[str]):
+    """Raw model vectors for `texts`, from the shared embedding server if configured."""
+    # Measured here, after micro-batching and cache lookups, so it reflects what the model actually encodes
+    EMBEDDING_BATCH_SIZE.observe(len(texts))
+    if EMBEDDING_SERVER_ADDRESS:
+        return get_embedding_client().encode(texts)
+
+    return get_embedding_model().encode(texts, convert_to_tensor=False)
+
+def get_tokenizer():
+    """
+    The embedding model's tokenizer. Reuses the loaded model's when available,
+    otherwise loads only the tokenizer so chunking doesn't pull in the model.
+    """
+    global _tokenizer_instance
+    if _tokenizer_instance is None:
+        if embedding_model is not None:
+            _tokenizer_instance = embedding_model.tokenizer
+        else:
+            from transformers import AutoTokenizer
+
+            repo_id = EMBEDDING_MODEL_NAME if "/" in EMBEDDING_MODEL_NAME else f"sentence-transformers/{EMBEDDING_MODEL_NAME}"
+            _tokenizer_instance = AutoTokenizer.from_pretrained(repo_id)
+
+    return _tokenizer_instance
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer().encode(text, add_special_tokens=False))
+
+def token_offsets(text: str):
+    """Character (start, end) of each word piece in `text`, or None if the tokenizer can't map them back."""
+    tokenizer = get_tokenizer()
+    if not tokenizer.is_fast:
+        return None
+    return tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+
+def get_max_tokens() -> int:
+    """Largest chunk, in word pieces, that the model embeds without truncation."""
+    max_seq_length = embedding_model.max_seq_length if embedding_model is not None else EMBEDDING_MAX_SEQ_LENGTH
+    return max_seq_length - 2
+
+def get_embedding_cache():
+    global _embedding_cache_instance
+    if _embedding_cache_instance is None and EMBEDDING_CACHE_ENABLED:
+        _embedding_cache_instance = EmbeddingCache(path=EMBEDDING_CACHE_PATH, memory_entries=EMBEDDING_CACHE_MEMORY_ENTRIES)
+
+    return _embedding_cache_instance
+
+def get_micro_batcher():
+    global _micro_batcher_instance
+    # The embedding server batches across all web workers itself
+    if _micro_batcher_instance is None and EMBEDDING_MICRO_BATCHING and not EMBEDDING_SERVER_ADDRESS:
+        _micro_batcher_instance = MicroBatcher(fn=_embed_texts, max_batch_size=EMBEDDING_BATCH_MAX_SIZE, max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS)
+
+    return _micro_batcher_instance
+
 def embed_texts(texts: List[str]) -> List[List[float]]:
-    model = get_embedding_model()
+    batcher = get_micro_batcher()
+    # Large ingestion batches are already efficient; only small requests wait for company
+    if batcher and 0 < len(texts) < EMBEDDING_BATCH_MAX_SIZE:
+        return batcher.submit(texts)
+
+    return _embed_texts(texts)
+
+def _embed_texts(texts: List[str]) -> List[List[float]]:
+    cache = get_embedding_cache()
+
+    # Collapse duplicates so each distinct text is looked up and encoded once
+    normalized = [normalize_text(text) for text in texts]
+    unique = list(dict.fromkeys(normalized))
+
+    vectors = cache.get_many(EMBEDDING_CACHE_NAMESPACE, unique) if cache else {}
+    missing = [text for text in unique if text not in vectors]
+
+    if missing:
+        encoded = encode(missing)
+        new_vectors = dict(zip(missing, encoded))
+        if cache:
+            cache.put_many(EMBEDDING_CACHE_NAMESPACE, new_vectors)
+        vectors.update(new_vectors)
 
-    embeddings = model.encode(texts, convert_to_tensor=False)
+    if not normalized:
+        return []
 
-    return embeddings.tolist()
\ No newline at end of file
+    return np.stack([vectors[text] for text in normalized]).astype(np.float32).tolist()
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Dict
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so trivially different copies of a chunk share one entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by sha256(model name, normalized text).
+
+    A bounded in-memory LRU sits in front of a SQLite table of float32 blobs,
+    so vectors survive restarts and are shared by every worker on the host.
+    """
+    def __init__(self, path: str, memory_entries: int):
+        self.path = path
+        self.memory_entries = memory_entries
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_name: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached vectors for the given (already normalized) texts, keyed by text."""
+        found = {}
+        pending = {}
+
+        with self._lock:
+            for text in texts:
+                key = self.make_key(model_name, text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    found[text] = vector
+                else:
+                    pending[key] = text
+
+            if pending:
+                disk_hits = 0
+                keys = list(pending)
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, vector)
+                        found[pending[key]] = vector
+                        disk_hits += 1
+
+                self._stats["disk_hits"] += disk_hits
+                self._stats["misses"] += len(pending) - disk_hits
+
+        return found
+
+    def put_many(self, model_name: str, vectors: Dict[str, np.ndarray]):
+        rows = []
+        with self._lock:
+            for text, vector in vectors.items():
+                key = self.make_key(model_name, text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+            self._stats["writes"] += len(rows)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,147 @@
+import itertools
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Client
+from typing import Dict, List, Union, Tuple
+
+import numpy as np
+
+# Address of the shared embedding server (app/core/embedding_server.py): a Unix
+# socket path, or a loopback host:port. When set, web workers send texts there
+# instead of loading the model themselves.
+EMBEDDING_SERVER_ADDRESS = os.environ.get("EMBEDDING_SERVER_ADDRESS")
+# Shared secret of the server's listener; required, since messages are pickled
+# and anyone holding it can run code in the server and in the web workers
+EMBEDDING_SERVER_AUTHKEY = os.environ.get("EMBEDDING_SERVER_AUTHKEY")
+EMBEDDING_SERVER_TIMEOUT_SECONDS = float(os.environ.get("EMBEDDING_SERVER_TIMEOUT_SECONDS", "60"))
+
+_embedding_client_instance = None
+_embedding_client_lock = threading.Lock()
+
+
+class EmbeddingServerError(RuntimeError):
+    pass
+
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """'host:port' becomes a TCP address (loopback only); anything else is a Unix socket path."""
+    if not address.startswith("/") and ":" in address:
+        host, port = address.rsplit(":", 1)
+        host = host.strip("[]")
+        if host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Embedding server TCP address must be on loopback ({', '.join(LOOPBACK_HOSTS)}), got {host}")
+        return host, int(port)
+    return address
+
+
+class EmbeddingClient:
+    """
+    Connection from one web worker process to the embedding server. Thread
+    safe: concurrent calls share the connection, each request tagged with an
+    id, and a reader thread hands every reply to the caller waiting for it.
+    Reconnects on the next call if the server restarts.
+    """
+    def __init__(self, address: str, authkey: str, timeout: float):
+        if not authkey:
+            raise RuntimeError("EMBEDDING_SERVER_AUTHKEY must be set to use the embedding server")
+        self.address = parse_address(address)
+        self.authkey = authkey.encode("utf-8")
+        self.timeout = timeout
+
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+
+    def _connection(self):
+        with self._lock:
+            # A forked worker must not share its parent's socket (or its missing reader thread)
+            if self._conn is None or self._pid != os.getpid():
+                conn = Client(self.address, authkey=self.authkey)
+                threading.Thread(target=self._read, args=(conn,), name="embedding-client", daemon=True).start()
+                self._conn = conn
+                self._pid = os.getpid()
+                self._pending = {}
+            return self._conn
+
+    def _read(self, conn):
+        try:
+            while True:
+                status, request_id, payload = conn.recv()
+                future = self._pending.pop(request_id, None)
+                if future is None:
+                    continue
+                if status == "ok":
+                    future.set_result(payload)
+                else:
+                    future.set_exception(EmbeddingServerError(payload))
+        except (EOFError, OSError) as e:
+            self._disconnect(conn, e)
+
+    def _disconnect(self, conn, error: Exception):
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {}
+        try:
+            conn.close()
+        except OSError:
+            pass
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Embedding server connection lost: {error}"))
+
+    def _call(self, kind: str, payload=None):
+        conn = self._connection()
+        request_id = next(self._ids)
+        future = Future()
+        self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                conn.send((kind, request_id, payload))
+        except (EOFError, OSError) as e:
+            self._pending.pop(request_id, None)
+            self._disconnect(conn, e)
+            raise ConnectionError(f"Embedding server unavailable: {e}")
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._pending.pop(request_id, None)
+            raise EmbeddingServerError(f"No reply from the embedding server within {self.timeout}s")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """float32 vectors for `texts`, one row each."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        try:
+            return self._call("embed", list(texts))
+        except ConnectionError:
+            # One retry covers a server restart between two calls
+            return self._call("embed", list(texts))
+
+    def ping(self) -> dict:
+        """The server's stats; fails if it can't be reached."""
+        return self._call("stats")
+
+
+def get_embedding_client() -> EmbeddingClient:
+    global _embedding_client_instance
+    if _embedding_client_instance is None:
+        with _embedding_client_lock:
+            if _embedding_client_instance is None:
+                _embedding_client_instance = EmbeddingClient(
+                    address=EMBEDDING_SERVER_ADDRESS,
+                    authkey=EMBEDDING_SERVER_AUTHKEY,
+                    timeout=EMBEDDING_SERVER_TIMEOUT_SECONDS
+                )
+
+    return _embedding_client_instance
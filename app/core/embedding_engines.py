@@ -0,0 +1,50 @@
+import os
+
+# Engines selectable through EMBEDDING_ENGINE. All of them load the same model
+# and return vectors of the same dimension, so they are interchangeable behind
+# embed_texts; only speed, memory and (slightly, for int8) the values differ.
+ENGINES = ("torch", "onnx", "onnx-int8")
+
+# Pre-quantized weights shipped in the model's Hugging Face repo
+EMBEDDING_ONNX_INT8_FILE = os.environ.get("EMBEDDING_ONNX_INT8_FILE", "onnx/model_qint8_avx2.onnx")
+# Where a locally quantized copy is written when the repo has no int8 weights
+EMBEDDING_ONNX_EXPORT_DIR = os.environ.get("EMBEDDING_ONNX_EXPORT_DIR", os.path.join(".cache", "onnx"))
+EMBEDDING_ONNX_QUANTIZATION_CONFIG = os.environ.get("EMBEDDING_ONNX_QUANTIZATION_CONFIG", "avx2")
+
+
+def _load_quantized(model_name: str):
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": EMBEDDING_ONNX_INT8_FILE})
+    except Exception as e:
+        print(f"Pre-quantized ONNX weights unavailable for {model_name} ({e}); quantizing locally")
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dir = os.path.join(EMBEDDING_ONNX_EXPORT_DIR, model_name.replace("/", "__"))
+    file_name = f"model_qint8_{EMBEDDING_ONNX_QUANTIZATION_CONFIG}.onnx"
+    if not os.path.exists(os.path.join(export_dir, "onnx", file_name)):
+        fp32_model = SentenceTransformer(model_name, backend="onnx")
+        fp32_model.save_pretrained(export_dir)
+        export_dynamic_quantized_onnx_model(fp32_model, EMBEDDING_ONNX_QUANTIZATION_CONFIG, export_dir)
+
+    return SentenceTransformer(export_dir, backend="onnx", model_kwargs={"file_name": f"onnx/{file_name}"})
+
+
+def load_embedding_model(model_name: str, engine: str):
+    """
+    Loads `model_name` on the requested engine:
+    "torch" (PyTorch fp32), "onnx" (ONNX Runtime fp32) or "onnx-int8"
+    (ONNX Runtime with dynamically int8-quantized weights).
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if engine == "torch":
+        return SentenceTransformer(model_name)
+    if engine == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if engine == "onnx-int8":
+        return _load_quantized(model_name)
+
+    raise ValueError(f"Unknown embedding engine '{engine}'. Expected one of: {', '.join(ENGINES)}")
@@ -0,0 +1,256 @@
+"""
+Shared embedding server for multi-process deployments.
+
+    EMBEDDING_SERVER_ADDRESS=/run/ask-my-youtube/embedding.sock EMBEDDING_SERVER_AUTHKEY=... python -m app.core.embedding_server
+
+Loads the model once, then forks EMBEDDING_SERVER_PROCESSES encoder
+processes that share its weights copy-on-write. Web workers started with the
+same EMBEDDING_SERVER_ADDRESS connect through app/core/embedding_client.py
+instead of loading their own model. Requests from all connections are
+coalesced into batches of up to EMBEDDING_SERVER_MAX_BATCH_SIZE texts and
+handed to the encoders over a multiprocessing queue; while every encoder is
+busy, new requests keep accumulating into the next batch.
+
+Messages are pickled, so the listener only accepts clients holding
+EMBEDDING_SERVER_AUTHKEY, a Unix socket is created readable by its owner
+only, and TCP addresses are limited to loopback.
+
+Encoders are not restarted individually: if one dies, the server exits so its
+supervisor (systemd, docker, supervisord) restarts it, and clients reconnect.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from multiprocessing.connection import Listener
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.core import embedding
+from app.core.embedding_client import EMBEDDING_SERVER_ADDRESS, EMBEDDING_SERVER_AUTHKEY, parse_address
+from app.core.metrics import EMBEDDING_QUEUE_DELAY_SECONDS, EMBEDDING_MICRO_BATCH_SIZE
+
+# --- Configuration ---
+EMBEDDING_SERVER_PROCESSES = int(os.environ.get("EMBEDDING_SERVER_PROCESSES", "2"))
+# Torch threads per encoder; 0 keeps torch's default (all cores), which oversubscribes with several encoders
+EMBEDDING_SERVER_THREADS_PER_PROCESS = int(os.environ.get("EMBEDDING_SERVER_THREADS_PER_PROCESS", "0"))
+EMBEDDING_SERVER_MAX_BATCH_SIZE = int(os.environ.get("EMBEDDING_SERVER_MAX_BATCH_SIZE", "64"))
+EMBEDDING_SERVER_MAX_WAIT_MS = float(os.environ.get("EMBEDDING_SERVER_MAX_WAIT_MS", "5"))
+
+
+def _encoder(tasks, results, threads: int):
+    """Encoder process loop; `embedding.embedding_model` was loaded by the parent before the fork."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    model = embedding.embedding_model
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        batch_id, texts = task
+        try:
+            vectors = np.asarray(model.encode(texts, convert_to_tensor=False), dtype=np.float32)
+            results.put((batch_id, vectors, None))
+        except Exception as e:
+            results.put((batch_id, None, f"{type(e).__name__}: {e}"))
+
+
+class _Request:
+    __slots__ = ("conn", "send_lock", "request_id", "texts", "enqueued")
+
+    def __init__(self, conn, send_lock, request_id: int, texts: List[str]):
+        self.conn = conn
+        self.send_lock = send_lock
+        self.request_id = request_id
+        self.texts = texts
+        self.enqueued = time.perf_counter()
+
+
+class EmbeddingServer:
+    def __init__(self, address: str, authkey: str, processes: int, max_batch_size: int, max_wait_ms: float, threads_per_process: int):
+        if not authkey:
+            raise RuntimeError("EMBEDDING_SERVER_AUTHKEY must be set")
+        self.address = parse_address(address)
+        self.authkey = authkey.encode("utf-8")
+        self.processes = max(1, processes)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.threads_per_process = threads_per_process
+
+        self._pending: "queue.Queue[_Request]" = queue.Queue()
+        # At most one batch per encoder in flight; the rest wait here and grow
+        self._slots = threading.Semaphore(self.processes)
+        self._in_flight: Dict[int, List[_Request]] = {}
+        self._in_flight_lock = threading.Lock()
+        self._batch_ids = itertools.count()
+        self._workers = []
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"connections": 0, "requests": 0, "texts": 0, "batches": 0, "errors": 0}
+
+    def start_encoders(self):
+        # Load before forking so every encoder maps the same weight pages
+        embedding.get_embedding_model()
+        context = multiprocessing.get_context("fork")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        for i in range(self.processes):
+            worker = context.Process(target=_encoder, args=(self._tasks, self._results, self.threads_per_process), name=f"embedding-encoder-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        for target, name in ((self._batch_loop, "embedding-batcher"), (self._result_loop, "embedding-results"), (self._watch_encoders, "embedding-watchdog")):
+            threading.Thread(target=target, name=name, daemon=True).start()
+
+    def _collect(self) -> List[_Request]:
+        first = self._pending.get()
+        batch = [first]
+        size = len(first.texts)
+        deadline = first.enqueued + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._pending.get(timeout=timeout) if timeout > 0 else self._pending.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            self._slots.acquire()
+            batch = self._collect()
+            batch_id = next(self._batch_ids)
+            texts = [text for request in batch for text in request.texts]
+
+            started = time.perf_counter()
+            for request in batch:
+                EMBEDDING_QUEUE_DELAY_SECONDS.observe(started - request.enqueued, batcher="server")
+            EMBEDDING_MICRO_BATCH_SIZE.observe(len(texts), batcher="server")
+            with self._stats_lock:
+                self._stats["batches"] += 1
+
+            with self._in_flight_lock:
+                self._in_flight[batch_id] = batch
+            self._tasks.put((batch_id, texts))
+
+    def _result_loop(self):
+        while True:
+            batch_id, vectors, error = self._results.get()
+            self._slots.release()
+            with self._in_flight_lock:
+                batch = self._in_flight.pop(batch_id, [])
+            if error:
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+
+            offset = 0
+            for request in batch:
+                count = len(request.texts)
+                reply = ("error", request.request_id, error) if error else ("ok", request.request_id, vectors[offset:offset + count])
+                offset += count
+                self._reply(request.conn, request.send_lock, reply)
+
+    def _watch_encoders(self):
+        while True:
+            time.sleep(1)
+            dead = [worker.name for worker in self._workers if not worker.is_alive()]
+            if dead:
+                print(f"Embedding encoder(s) {', '.join(dead)} exited; stopping the server")
+                os._exit(1)
+
+    def _reply(self, conn, send_lock, reply):
+        try:
+            with send_lock:
+                conn.send(reply)
+        except (EOFError, OSError):
+            # The client went away; its connection thread cleans up
+            pass
+
+    def _serve(self, conn):
+        send_lock = threading.Lock()
+        with self._stats_lock:
+            self._stats["connections"] += 1
+        try:
+            while True:
+                kind, request_id, payload = conn.recv()
+                if kind == "embed":
+                    with self._stats_lock:
+                        self._stats["requests"] += 1
+                        self._stats["texts"] += len(payload)
+                    self._pending.put(_Request(conn, send_lock, request_id, payload))
+                elif kind == "stats":
+                    self._reply(conn, send_lock, ("ok", request_id, self.stats()))
+                else:
+                    self._reply(conn, send_lock, ("error", request_id, f"Unknown request {kind!r}"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._stats_lock:
+                self._stats["connections"] -= 1
+            conn.close()
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+        self.start_encoders()
+
+        # The socket file is created by bind(); the umask makes it 0600 from the start
+        previous_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            os.umask(previous_umask)
+
+        with listener:
+            print(f"Embedding server listening on {self.address} with {self.processes} encoder processes")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError) as e:
+                    # Includes clients failing the authkey handshake
+                    print(f"Rejected embedding client: {e}")
+                    continue
+                threading.Thread(target=self._serve, args=(conn,), name="embedding-connection", daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "pid": os.getpid(),
+                "encoder_pids": [worker.pid for worker in self._workers],
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                **self._stats,
+                "queue_delay_seconds": EMBEDDING_QUEUE_DELAY_SECONDS.snapshot(batcher="server"),
+                "batch_size": EMBEDDING_MICRO_BATCH_SIZE.snapshot(batcher="server"),
+            }
+
+
+def main():
+    if not EMBEDDING_SERVER_ADDRESS:
+        raise SystemExit("Set EMBEDDING_SERVER_ADDRESS to the socket path (or loopback host:port) to listen on")
+    if not EMBEDDING_SERVER_AUTHKEY:
+        raise SystemExit("Set EMBEDDING_SERVER_AUTHKEY to a random secret shared with the web workers")
+
+    EmbeddingServer(
+        address=EMBEDDING_SERVER_ADDRESS,
+        authkey=EMBEDDING_SERVER_AUTHKEY,
+        processes=EMBEDDING_SERVER_PROCESSES,
+        max_batch_size=EMBEDDING_SERVER_MAX_BATCH_SIZE,
+        max_wait_ms=EMBEDDING_SERVER_MAX_WAIT_MS,
+        threads_per_process=EMBEDDING_SERVER_THREADS_PER_PROCESS
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
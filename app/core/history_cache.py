@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+HISTORY_CACHE_ENABLED = os.environ.get("HISTORY_CACHE_ENABLED", "true").lower() == "true"
+# Most recent messages kept per session; history reads asking for more go to the database
+HISTORY_CACHE_MESSAGES = int(os.environ.get("HISTORY_CACHE_MESSAGES", "20"))
+HISTORY_CACHE_MAX_SESSIONS = int(os.environ.get("HISTORY_CACHE_MAX_SESSIONS", "10000"))
+# Reads check entries against the session's newest message id, so this only bounds memory held by idle sessions
+HISTORY_CACHE_TTL_SECONDS = float(os.environ.get("HISTORY_CACHE_TTL_SECONDS", "300"))
+
+_history_cache_instance = None
+
+
+class HistoryMessage:
+    """Detached copy of a ChatMessage row, safe to share across requests and threads."""
+    __slots__ = ("id", "role", "content", "timestamp", "is_partial")
+
+    def __init__(self, id: int, role: str, content: str, timestamp: Optional[datetime], is_partial: bool = False):
+        self.id = id
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+        self.is_partial = is_partial
+
+    @classmethod
+    def from_row(cls, row) -> "HistoryMessage":
+        return cls(id=row.id, role=row.role, content=row.content, timestamp=row.timestamp, is_partial=bool(row.is_partial))
+
+
+def _newest_id(messages) -> int:
+    return messages[-1].id if messages else 0
+
+
+class _Entry:
+    def __init__(self, user_id: str, messages: List[HistoryMessage], capacity: int, summary: Optional[str], summary_through: int):
+        self.user_id = user_id
+        self.messages = deque(messages, maxlen=capacity)
+        self.summary = summary
+        self.summary_through = summary_through
+        self.loaded_at = time.time()
+
+
+class HistoryCache:
+    """
+    Ring buffer of the last `messages_per_session` messages of each session,
+    LRU-bounded to `max_sessions`. An entry exists only once it mirrors the
+    session's latest messages (loaded from the database or known to be new),
+    so later writes can simply be appended to it. Entries also carry the
+    session's rolling summary and the last message id it covers. Other worker
+    processes keep their own caches, so callers compare an entry's newest
+    message id with the database before trusting it.
+    """
+    def __init__(self, messages_per_session: int, max_sessions: int, ttl_seconds: float):
+        self.messages_per_session = messages_per_session
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "appends": 0, "invalidations": 0}
+
+    def get_memory(self, session_id: str, user_id: str, limit: int = 0) -> Optional[Tuple[List[HistoryMessage], Optional[str], int]]:
+        """
+        (recent messages oldest first, summary, last message id the summary
+        covers), or None when the database must be asked. `limit` > 0 asks
+        for at least that many recent messages.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if (
+                entry is None
+                or entry.user_id != user_id
+                or limit > self.messages_per_session
+                or (self.ttl_seconds > 0 and time.time() - entry.loaded_at > self.ttl_seconds)
+            ):
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(session_id)
+            self._stats["hits"] += 1
+            return list(entry.messages), entry.summary, entry.summary_through
+
+    def get(self, session_id: str, user_id: str, limit: int) -> Optional[List[HistoryMessage]]:
+        """The last `limit` messages, oldest first, or None when the database must be asked."""
+        memory = self.get_memory(session_id, user_id, limit)
+        if memory is None:
+            return None
+        messages = memory[0]
+        return messages[-limit:] if limit else []
+
+    def load(self, session_id: str, user_id: str, messages: List[HistoryMessage], summary: Optional[str] = None, summary_through: int = 0):
+        """Stores the session's most recent messages (oldest first) and summary, as read from the database."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.user_id == user_id and _newest_id(entry.messages) > _newest_id(messages):
+                # A write appended after this read started; the read is the stale one
+                if summary_through > entry.summary_through:
+                    entry.summary = summary
+                    entry.summary_through = summary_through
+            else:
+                self._entries[session_id] = _Entry(user_id, messages[-self.messages_per_session:], self.messages_per_session, summary, summary_through)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def append(self, session_id: str, user_id: str, messages: List[HistoryMessage]):
+        """Adds committed messages to a cached session; uncached sessions are loaded on their next read."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            if entry.user_id != user_id:
+                del self._entries[session_id]
+                return
+            # A load that read after the commit may already hold them
+            newest = _newest_id(entry.messages)
+            messages = [message for message in messages if message.id > newest]
+            entry.messages.extend(messages)
+            self._stats["appends"] += len(messages)
+
+    def set_summary(self, session_id: str, user_id: str, summary: str, summary_through: int):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.user_id == user_id and summary_through >= entry.summary_through:
+                entry.summary = summary
+                entry.summary_through = summary_through
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            if self._entries.pop(session_id, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["sessions"] = len(self._entries)
+
+        reads = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / reads if reads else 0.0
+        return stats
+
+
+def get_history_cache():
+    global _history_cache_instance
+    if _history_cache_instance is None and HISTORY_CACHE_ENABLED:
+        _history_cache_instance = HistoryCache(
+            messages_per_session=HISTORY_CACHE_MESSAGES,
+            max_sessions=HISTORY_CACHE_MAX_SESSIONS,
+            ttl_seconds=HISTORY_CACHE_TTL_SECONDS
+        )
+
+    return _history_cache_instance
@@ -0,0 +1,33 @@
+import os
+import threading
+
+# Keep-alive connections held per host by the shared HTTP session
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "32"))
+
+_http_session_instance = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """One requests.Session for outbound calls, so connections are pooled and reused."""
+    global _http_session_instance
+    if _http_session_instance is None:
+        with _http_session_lock:
+            if _http_session_instance is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session_instance = session
+
+    return _http_session_instance
+
+def close_http_session():
+    global _http_session_instance
+    with _http_session_lock:
+        if _http_session_instance is not None:
+            _http_session_instance.close()
+            _http_session_instance = None
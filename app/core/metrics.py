@@ -0,0 +1,189 @@
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+# Fraction of requests whose debug payloads (retrieved chunks, LLM responses) are printed
+DEBUG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("DEBUG_PAYLOAD_SAMPLE_RATE", "0"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+QUEUE_DELAY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def sample_debug() -> bool:
+    """True for the sampled share of requests that may print debug payloads."""
+    return DEBUG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < DEBUG_PAYLOAD_SAMPLE_RATE
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; each series keeps one count per bucket plus a sum."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (the last slot is +Inf), then the sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the block in seconds, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[:-1]) if series else 0
+
+    def snapshot(self, **labels) -> Dict[str, object]:
+        """Per-bucket (non-cumulative) counts, count and mean of one series, for JSON stats endpoints."""
+        with self._lock:
+            series = list(self._series.get(self._key(labels)) or [0] * (len(self.buckets) + 1) + [0.0])
+        names = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        count = sum(series[:-1])
+        return {
+            "buckets": dict(zip(names, series[:-1])),
+            "count": count,
+            "mean": series[-1] / count if count else 0.0,
+        }
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+
+        lines = self.header()
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {values[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# --- Query path ---
+AUTH_SECONDS = registry.histogram("auth_seconds", "Access token verification time.", ("result",))
+HISTORY_LOAD_SECONDS = registry.histogram("history_load_seconds", "Conversation history load time.", ("source",))
+EMBEDDING_SECONDS = registry.histogram("embedding_seconds", "Time to embed one embed_texts call.")
+EMBEDDING_BATCH_SIZE = registry.histogram("embedding_batch_size", "Texts per model encode call, after micro-batching and cache hits.", buckets=SIZE_BUCKETS)
+EMBEDDING_QUEUE_DELAY_SECONDS = registry.histogram("embedding_queue_delay_seconds", "Time an embed request waits for its micro-batch to start.", ("batcher",), buckets=QUEUE_DELAY_BUCKETS)
+EMBEDDING_MICRO_BATCH_SIZE = registry.histogram("embedding_micro_batch_size", "Texts per micro-batch, before embedding cache lookups.", ("batcher",), buckets=SIZE_BUCKETS)
+VECTOR_QUERY_SECONDS = registry.histogram("vector_query_seconds", "Vector index query time.", ("backend",))
+LLM_SECONDS = registry.histogram("llm_seconds", "Gemini call time; streamed calls are timed to the last chunk.", ("operation",))
+LLM_PROMPT_TOKENS = registry.histogram("llm_prompt_tokens", "Prompt tokens per Gemini call, as reported by the API.", ("operation",), buckets=TOKEN_BUCKETS)
+LLM_RESPONSE_TOKENS = registry.histogram("llm_response_tokens", "Response tokens per Gemini call, as reported by the API.", ("operation",), buckets=TOKEN_BUCKETS)
+DB_COMMIT_SECONDS = registry.histogram("db_commit_seconds", "ORM session commit time, including the final flush.")
+
+# --- Conversation summaries ---
+SUMMARY_REFRESHES = registry.counter("summary_refreshes_total", "Rolling summary refreshes saved.")
+SUMMARY_FOLDED_MESSAGES = registry.counter("summary_folded_messages_total", "Messages folded into rolling summaries.")
+
+# --- Ingestion ---
+INGESTION_CHUNKS = registry.counter("ingestion_chunks_total", "Chunks embedded for ingestion.", ("source_type",))
+INGESTION_EMBEDDING_SECONDS = registry.counter("ingestion_embedding_seconds_total", "Time spent embedding ingestion chunks; chunks / seconds is the embedding rate.", ("source_type",))
+UPSERT_BATCHES = registry.counter("vector_upsert_batches_total", "Vector upsert requests that succeeded.")
+UPSERT_VECTORS = registry.counter("vector_upsert_vectors_total", "Vectors upserted.")
+UPSERT_BYTES = registry.counter("vector_upsert_bytes_total", "Estimated upsert payload bytes sent.")
+UPSERT_RETRIES = registry.counter("vector_upsert_retries_total", "Upsert requests retried after a transient error.")
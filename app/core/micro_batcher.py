@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Any, Dict
+
+from app.core.metrics import EMBEDDING_QUEUE_DELAY_SECONDS, EMBEDDING_MICRO_BATCH_SIZE
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls to a batch function. Callers block in submit()
+    while a single worker thread gathers requests for up to `max_wait_ms` after
+    the first one arrives, or until `max_batch_size` items are queued, then
+    runs `fn` once on the concatenated items and hands each caller its slice.
+    Queue delay and batch size go to /metrics under the `batcher` label `name`.
+    """
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch_size: int, max_wait_ms: float, name: str = "embedding"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[tuple[List[Any], Future, float]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, items: List[Any]) -> List[Any]:
+        if not items:
+            return []
+
+        self._ensure_started()
+        future = Future()
+        self._queue.put((items, future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self) -> List[tuple]:
+        first = self._queue.get()
+        batch = [first]
+        size = len(first[0])
+        deadline = first[2] + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                # Past the deadline (e.g. the worker was busy encoding), still take what is already queued
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            started = time.perf_counter()
+            items = [item for request_items, _, _ in batch for item in request_items]
+            for _, _, enqueued in batch:
+                EMBEDDING_QUEUE_DELAY_SECONDS.observe(started - enqueued, batcher=self.name)
+            EMBEDDING_MICRO_BATCH_SIZE.observe(len(items), batcher=self.name)
+
+            try:
+                results = self.fn(items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_items, future, _ in batch:
+                future.set_result(results[offset:offset + len(request_items)])
+                offset += len(request_items)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_delay_seconds": EMBEDDING_QUEUE_DELAY_SECONDS.snapshot(batcher=self.name),
+            "batch_size": EMBEDDING_MICRO_BATCH_SIZE.snapshot(batcher=self.name),
+        }
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages handed to a worker per task
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "8"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Never fork: the pool is created from an ingestion thread of a process already
+                # running model, batcher and DB threads, whose held locks a forked child would inherit.
+                # The forkserver (or spawn) workers only import this module.
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                _executor = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _executor
+
+
+def count_pages(path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Runs in a worker process; returns (1-based page number, text) pairs."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [(number + 1, reader.pages[number].extract_text() or "") for number in range(start, stop)]
+
+
+def iter_pages(path: str, page_count: int) -> Iterator[Tuple[int, str]]:
+    """
+    Extracts pages in the process pool and yields them in page order as they
+    complete. Only a small window of tasks is in flight at once, so memory
+    stays bounded no matter how long the document is.
+    """
+    executor = get_pdf_executor()
+    ranges = iter(range(0, page_count, PDF_PAGES_PER_TASK))
+    in_flight = deque()
+
+    def submit_next() -> bool:
+        start = next(ranges, None)
+        if start is None:
+            return False
+        in_flight.append(executor.submit(_extract_page_range, path, start, min(start + PDF_PAGES_PER_TASK, page_count)))
+        return True
+
+    for _ in range(PDF_EXTRACT_WORKERS * 2):
+        if not submit_next():
+            break
+
+    try:
+        while in_flight:
+            pages = in_flight.popleft().result()
+            submit_next()
+            yield from pages
+    finally:
+        for future in in_flight:
+            future.cancel()
@@ -0,0 +1,45 @@
+import threading
+import time
+from typing import Callable, Dict, Any
+
+# Resources reported by /readyz. Each starts "cold" and becomes "ready" the
+# first time it is created, either by background warm-up or by a request.
+RESOURCES = ("database", "embedding_model", "vector_db", "llm")
+
+_lock = threading.Lock()
+_states: Dict[str, Dict[str, Any]] = {name: {"state": "cold"} for name in RESOURCES}
+
+
+def mark(name: str, state: str, detail: str = None):
+    with _lock:
+        entry = {"state": state, "since": time.time()}
+        if detail:
+            entry["detail"] = detail
+        _states[name] = entry
+
+
+def mark_ready(name: str):
+    with _lock:
+        if _states.get(name, {}).get("state") == "ready":
+            return
+    mark(name, "ready")
+
+
+def warm(name: str, fn: Callable[[], Any]):
+    """Runs a resource's initializer, recording warming/ready/failed around it."""
+    mark(name, "warming")
+    try:
+        fn()
+        mark(name, "ready")
+    except Exception as e:
+        print(f"Warm-up of {name} failed: {e}")
+        mark(name, "failed", str(e))
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        return {name: dict(entry) for name, entry in _states.items()}
+
+
+def is_ready() -> bool:
+    return all(entry["state"] == "ready" for entry in snapshot().values())
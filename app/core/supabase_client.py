@@ -1,14 +1,32 @@
 import os
-from supabase import create_client, Client
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_supabase() -> Client:
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def get_supabase():
+    from supabase import create_client
+
     url: str = os.environ.get("SUPABASE_URL")
     key: str = os.environ.get("SUPABASE_ANON_KEY")
 
     if not url or not key:
         raise ValueError("SUPABASE_URL or SUPABASE_ANON_KEY not found in environment.")
     
-    return create_client(url, key)
\ No newline at end of file
+    return create_client(url, key)
+
+def get_shared_supabase():
+    """
+    One client reused across requests, for stateless calls such as
+    auth.get_user(token). Sign-up/sign-in keep using get_supabase(), since
+    they store a session on the client.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = get_supabase()
+    return _shared_client
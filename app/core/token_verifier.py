@@ -0,0 +1,188 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+# HS256 projects sign access tokens with this secret (Project Settings > API > JWT Secret)
+SUPABASE_JWT_SECRET = os.environ.get("SUPABASE_JWT_SECRET")
+# Asymmetric (RS256/ES256) projects publish their signing keys here
+SUPABASE_JWKS_URL = os.environ.get("SUPABASE_JWKS_URL") or (f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None)
+SUPABASE_JWT_AUDIENCE = os.environ.get("SUPABASE_JWT_AUDIENCE", "authenticated")
+AUTH_JWKS_TTL_SECONDS = int(os.environ.get("AUTH_JWKS_TTL_SECONDS", "600"))
+# Verified tokens are remembered for at most this long, and never past their exp
+AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_TOKEN_CACHE_TTL_SECONDS", "300"))
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+_token_verifier_instance = None
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of sha256(token) -> (user_id, expires_at)."""
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user_id
+
+    def put(self, token: str, user_id: str, exp: Optional[float]):
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+
+        with self._lock:
+            self._entries[self.key(token)] = (user_id, expires_at)
+            self._entries.move_to_end(self.key(token))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenVerifier:
+    """
+    Resolves a Supabase access token to its user id. Tokens are checked
+    locally, against the project's JWT secret (HS256) or its cached JWKS
+    (RS256/ES256), and successful results are cached until the token's exp.
+    When no key material is available the token is handed to Supabase's
+    auth.get_user on a reused client.
+    """
+    def __init__(self, secret: Optional[str], jwks_url: Optional[str], audience: str, cache: VerifiedTokenCache, client_factory: Callable[[], object] = None, jwks_ttl_seconds: int = AUTH_JWKS_TTL_SECONDS):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.cache = cache
+        self.client_factory = client_factory
+        self.jwks_ttl_seconds = jwks_ttl_seconds
+
+        self._jwks_client = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"cache_hits": 0, "local": 0, "remote": 0, "rejected": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def cached(self, token: str) -> Optional[str]:
+        user_id = self.cache.get(token)
+        if user_id is not None:
+            self._count("cache_hits")
+        return user_id
+
+    def _signing_key(self, token: str, algorithm: str):
+        """The key to check `token` with, or None when it can't be obtained locally."""
+        if algorithm == "HS256":
+            return self.secret
+        if algorithm in ASYMMETRIC_ALGORITHMS and self.jwks_url:
+            import jwt
+
+            if self._jwks_client is None:
+                self._jwks_client = jwt.PyJWKClient(self.jwks_url, cache_keys=True, lifespan=self.jwks_ttl_seconds)
+            try:
+                return self._jwks_client.get_signing_key_from_jwt(token).key
+            except jwt.PyJWKClientError as e:
+                print(f"JWKS lookup failed, falling back to Supabase: {e}")
+        return None
+
+    def _verify_locally(self, token: str) -> Optional[Dict]:
+        import jwt
+
+        try:
+            algorithm = jwt.get_unverified_header(token).get("alg")
+        except jwt.InvalidTokenError as e:
+            raise InvalidTokenError(str(e))
+
+        key = self._signing_key(token, algorithm)
+        if key is None:
+            return None
+
+        try:
+            return jwt.decode(token, key, algorithms=[algorithm], audience=self.audience, options={"require": ["exp", "sub"]})
+        except jwt.InvalidTokenError as e:
+            raise InvalidTokenError(str(e))
+
+    def _verify_remotely(self, token: str) -> Tuple[str, Optional[float]]:
+        import jwt
+
+        if self.client_factory is None:
+            raise InvalidTokenError("No key available to verify the token")
+
+        user_response = self.client_factory().auth.get_user(token)
+        if not user_response or not user_response.user:
+            raise InvalidTokenError("Invalid user")
+
+        # Supabase vouched for the signature; exp only bounds how long we trust that
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        return user_response.user.id, exp
+
+    def verify(self, token: str) -> str:
+        """Returns the token's user id or raises InvalidTokenError. May block on JWKS or Supabase."""
+        user_id = self.cached(token)
+        if user_id is not None:
+            return user_id
+
+        try:
+            claims = self._verify_locally(token)
+            if claims is not None:
+                user_id, exp = claims["sub"], claims["exp"]
+                self._count("local")
+            else:
+                user_id, exp = self._verify_remotely(token)
+                self._count("remote")
+        except InvalidTokenError:
+            self._count("rejected")
+            raise
+
+        self.cache.put(token, user_id, exp)
+        return user_id
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {**self._stats, "cached_tokens": len(self.cache)}
+
+
+def get_token_verifier() -> TokenVerifier:
+    global _token_verifier_instance
+    if _token_verifier_instance is None:
+        from app.core.supabase_client import get_shared_supabase
+
+        _token_verifier_instance = TokenVerifier(
+            secret=SUPABASE_JWT_SECRET,
+            jwks_url=SUPABASE_JWKS_URL,
+            audience=SUPABASE_JWT_AUDIENCE,
+            cache=VerifiedTokenCache(max_entries=AUTH_TOKEN_CACHE_SIZE, ttl_seconds=AUTH_TOKEN_CACHE_TTL_SECONDS),
+            client_factory=get_shared_supabase
+        )
+
+    return _token_verifier_instance
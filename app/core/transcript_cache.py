@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict
+
+from app.schemas.transcript import TranscriptResponse
+
+CACHE_FILE_SUFFIX = ".json.gz"
+
+
+class TranscriptCache:
+    """
+    Two-tier cache for TranscriptResponse objects.
+
+    Entries are content-addressed by sha256(video_id, language) and stored as
+    gzip-compressed JSON under `directory`. Reads touch the file mtime, which
+    doubles as the LRU clock when the directory grows past `max_bytes`. The
+    most recently used entries are also kept decoded in memory.
+    """
+    def __init__(self, directory: str, ttl_seconds: float, max_bytes: int, memory_entries: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+
+        self._memory: "OrderedDict[str, tuple[float, TranscriptResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(path) for path in self._iter_files())
+
+    @staticmethod
+    def make_key(video_id: str, language: str) -> str:
+        return hashlib.sha256(f"{video_id}\0{language}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + CACHE_FILE_SUFFIX)
+
+    def _iter_files(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(CACHE_FILE_SUFFIX):
+                    yield os.path.join(root, name)
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, value: TranscriptResponse):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _remove_file(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._total_bytes -= size
+        except OSError:
+            pass
+
+    def get(self, video_id: str, language: str) -> Optional[TranscriptResponse]:
+        key = self.make_key(video_id, language)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._is_expired(stored_at):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            if self._is_expired(payload["stored_at"]):
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                self._remove_file(path)
+                return None
+
+            value = TranscriptResponse.model_validate(payload["transcript"])
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self._remember(key, payload["stored_at"], value)
+            self._stats["disk_hits"] += 1
+            return value
+
+    def put(self, video_id: str, language: str, value: TranscriptResponse):
+        key = self.make_key(video_id, language)
+        path = self._path(key)
+        stored_at = time.time()
+
+        data = gzip.compress(json.dumps({
+            "stored_at": stored_at,
+            "video_id": video_id,
+            "language": language,
+            "transcript": value.model_dump(mode="json"),
+        }).encode("utf-8"))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            if os.path.exists(path):
+                self._total_bytes -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data)
+            self._stats["writes"] += 1
+            self._remember(key, stored_at, value)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drops least recently used files until the cache fits in max_bytes."""
+        files = sorted(self._iter_files(), key=lambda p: os.path.getmtime(p))
+        for path in files:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove_file(path)
+            self._memory.pop(os.path.basename(path)[:-len(CACHE_FILE_SUFFIX)], None)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for path in list(self._iter_files()):
+                self._remove_file(path)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_bytes"] = self._total_bytes
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
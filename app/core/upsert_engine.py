@@ -0,0 +1,151 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Iterable, Iterator, List, Dict, Any
+
+from app.core.metrics import UPSERT_BATCHES, UPSERT_VECTORS, UPSERT_BYTES, UPSERT_RETRIES
+
+# Upper bound on the serialized size of one float in a JSON upsert body ("-0.0123456789012345,")
+VALUE_BYTES = 20
+# HTTP statuses worth retrying: rate limiting and server-side failures
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = ("Timeout", "Connection", "ProtocolError", "ServiceUnavailable")
+
+
+class UpsertError(Exception):
+    """A batch could not be upserted, either permanently or after exhausting its retries."""
+
+
+def payload_size(vector: Dict[str, Any]) -> int:
+    """Estimated bytes of one vector in an upsert request body."""
+    return len(json.dumps({"id": vector["id"], "metadata": vector.get("metadata", {})})) + len(vector["values"]) * VALUE_BYTES
+
+
+def is_transient(error: Exception) -> bool:
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUSES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(name in type(error).__name__ for name in TRANSIENT_ERROR_NAMES)
+
+
+def iter_payload_batches(vectors: Iterable[Dict[str, Any]], max_bytes: int, max_vectors: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Groups a stream of vectors into batches that stay under `max_bytes` of
+    estimated payload and `max_vectors` items. A single vector larger than
+    `max_bytes` is sent on its own and left for the server to judge.
+    """
+    batch = []
+    size = 0
+    for vector in vectors:
+        vector_size = payload_size(vector)
+        if batch and (size + vector_size > max_bytes or len(batch) >= max_vectors):
+            yield batch
+            batch = []
+            size = 0
+        batch.append(vector)
+        size += vector_size
+
+    if batch:
+        yield batch
+
+
+class UpsertEngine:
+    """
+    Sends a stream of vectors to an index as size-bounded batches over a
+    shared pool of at most `concurrency` requests in flight per run. The
+    stream is consumed on the caller's thread, so producing the next
+    vectors (embedding) overlaps with uploading the previous ones. Transient
+    failures are retried with exponential backoff and jitter.
+    """
+    def __init__(self, max_batch_bytes: int, max_batch_vectors: int, concurrency: int, max_retries: int, backoff_seconds: float, max_backoff_seconds: float):
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_vectors = max_batch_vectors
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="vector-upsert")
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "vectors": 0, "bytes": 0, "retries": 0, "failures": 0}
+
+    def _send(self, upsert: Callable[[List[Dict[str, Any]]], Any], batch: List[Dict[str, Any]]) -> int:
+        for attempt in range(self.max_retries + 1):
+            try:
+                upsert(batch)
+                break
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient(e):
+                    with self._stats_lock:
+                        self._stats["failures"] += 1
+                    raise UpsertError(f"Upsert of {len(batch)} vectors failed after {attempt + 1} attempts: {e}") from e
+
+                with self._stats_lock:
+                    self._stats["retries"] += 1
+                UPSERT_RETRIES.inc()
+                delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+        size = sum(payload_size(v) for v in batch)
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["vectors"] += len(batch)
+            self._stats["bytes"] += size
+        UPSERT_BATCHES.inc()
+        UPSERT_VECTORS.inc(len(batch))
+        UPSERT_BYTES.inc(size)
+        return len(batch)
+
+    def run(self, vectors: Iterable[Dict[str, Any]], upsert: Callable[[List[Dict[str, Any]]], Any]) -> int:
+        """
+        Upserts every vector of the stream through `upsert(batch)` and returns
+        how many were sent. Raises UpsertError once in-flight requests have
+        settled if any batch failed; errors raised by the stream itself
+        propagate unchanged.
+        """
+        slots = threading.BoundedSemaphore(self.concurrency)
+        lock = threading.Lock()
+        state = {"sent": 0, "error": None}
+
+        def settle(future: Future):
+            with lock:
+                error = future.exception()
+                if error is None:
+                    state["sent"] += future.result()
+                elif state["error"] is None:
+                    state["error"] = error
+            slots.release()
+
+        try:
+            for batch in iter_payload_batches(vectors, self.max_batch_bytes, self.max_batch_vectors):
+                slots.acquire()
+                if state["error"] is not None:
+                    slots.release()
+                    break
+                try:
+                    future = self._executor.submit(self._send, upsert, batch)
+                except BaseException:
+                    slots.release()
+                    raise
+                future.add_done_callback(settle)
+        finally:
+            # Every slot is back once all in-flight batches have settled
+            for _ in range(self.concurrency):
+                slots.acquire()
+
+        if state["error"] is not None:
+            raise state["error"]
+        return state["sent"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_batch_bytes": self.max_batch_bytes,
+                "max_batch_vectors": self.max_batch_vectors,
+                "concurrency": self.concurrency,
+                **self._stats,
+            }
@@ -0,0 +1,111 @@
+import os
+import threading
+from typing import List
+
+import numpy as np
+
+# "none", "pca" or "random": projects embeddings to VECTOR_REDUCED_DIM before
+# they are stored or searched. Changing it changes the stored dimension, so
+# existing namespaces must be re-ingested (and a Pinecone index recreated with
+# the new dimension).
+VECTOR_REDUCTION = os.environ.get("VECTOR_REDUCTION", "none").lower()
+VECTOR_REDUCED_DIM = int(os.environ.get("VECTOR_REDUCED_DIM", "128"))
+# Fitted PCA, written by `python -m benchmarks.vector_compression --save-pca`
+VECTOR_PCA_PATH = os.environ.get("VECTOR_PCA_PATH", os.path.join(".cache", "vector_pca.npz"))
+VECTOR_PROJECTION_SEED = int(os.environ.get("VECTOR_PROJECTION_SEED", "0"))
+# Rows used to fit the PCA; more only slows fitting down
+PCA_FIT_SAMPLE_SIZE = 20000
+
+_vector_transform_instance = None
+_vector_transform_lock = threading.Lock()
+
+
+class PCATransform:
+    """Projection onto the top principal components of a sample of stored embeddings."""
+    def __init__(self, mean: np.ndarray, components: np.ndarray):
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, dim: int, seed: int = 0) -> "PCATransform":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if dim > min(vectors.shape):
+            raise ValueError(f"Cannot fit {dim} components on {vectors.shape[0]} vectors of dimension {vectors.shape[1]}")
+
+        rng = np.random.default_rng(seed)
+        if len(vectors) > PCA_FIT_SAMPLE_SIZE:
+            vectors = vectors[rng.choice(len(vectors), size=PCA_FIT_SAMPLE_SIZE, replace=False)]
+
+        mean = vectors.mean(axis=0)
+        _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        return cls(mean=mean, components=vt[:dim])
+
+    @classmethod
+    def load(cls, path: str) -> "PCATransform":
+        with np.load(path) as data:
+            return cls(mean=data["mean"], components=data["components"])
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, mean=self.mean, components=self.components)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        return (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
+
+
+class RandomProjection:
+    """
+    Gaussian random projection. Needs no fitting, but keeps less of the
+    similarity structure than PCA at the same dimension.
+    """
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.seed = seed
+        self._matrices = {}
+
+    def _matrix(self, input_dim: int) -> np.ndarray:
+        matrix = self._matrices.get(input_dim)
+        if matrix is None:
+            rng = np.random.default_rng(self.seed)
+            matrix = (rng.standard_normal((input_dim, self.dim)) / np.sqrt(self.dim)).astype(np.float32)
+            self._matrices[input_dim] = matrix
+        return matrix
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors @ self._matrix(vectors.shape[1])
+
+
+def get_vector_transform():
+    """The configured reduction, or None when vectors are stored as embedded."""
+    global _vector_transform_instance
+    if _vector_transform_instance is None and VECTOR_REDUCTION != "none":
+        with _vector_transform_lock:
+            if _vector_transform_instance is None:
+                if VECTOR_REDUCTION == "pca":
+                    if not os.path.exists(VECTOR_PCA_PATH):
+                        raise RuntimeError(f"VECTOR_REDUCTION=pca but no fitted PCA at {VECTOR_PCA_PATH}; create one with python -m benchmarks.vector_compression --save-pca")
+                    _vector_transform_instance = PCATransform.load(VECTOR_PCA_PATH)
+                elif VECTOR_REDUCTION == "random":
+                    _vector_transform_instance = RandomProjection(dim=VECTOR_REDUCED_DIM, seed=VECTOR_PROJECTION_SEED)
+                else:
+                    raise ValueError(f"Unknown VECTOR_REDUCTION: {VECTOR_REDUCTION}")
+
+    return _vector_transform_instance
+
+
+def reduce_vectors(vectors: List[List[float]]) -> List[List[float]]:
+    """
+    Applies the configured reduction to embeddings on their way to the vector
+    store; queries go through it too, so both sides live in the same space.
+    """
+    transform = get_vector_transform()
+    if transform is None or not len(vectors):
+        return vectors
+
+    return transform.apply(np.asarray(vectors, dtype=np.float32)).tolist()
@@ -0,0 +1,496 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, so only one process may write a namespace
+    fcntl = None
+
+# Snapshot of ids and metadata; writes since the snapshot are appended to the
+# log of its generation and folded into a new snapshot once the log outgrows it
+META_FILE = "meta.json"
+META_LOG_FILE = "meta.{generation}.log"
+LOCK_FILE = "lock"
+# Logs shorter than this are never compacted, so small namespaces don't rewrite their snapshot on every write
+MIN_COMPACT_BYTES = 1 << 20
+# Stored element type -> vectors file; a namespace keeps the type it was created with
+VECTORS_FILES = {"float32": "vectors.f32", "float16": "vectors.f16", "int8": "vectors.i8"}
+INITIAL_CAPACITY = 1024
+# Rows decoded and scored at a time, so float16/int8 queries never hold a float32 copy of the whole namespace
+SCORE_BLOCK_ROWS = 16384
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate index: rows are bucketed under their nearest k-means
+    centroid and a query only scans the `nprobe` closest buckets.
+    """
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, trained_on: int):
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_on = trained_on
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, iterations: int = 10, sample_size: int = 50000, seed: int = 0) -> "IVFIndex":
+        n = len(vectors)
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+
+        sample = vectors[rng.choice(n, size=min(n, sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        index = cls(centroids=centroids, assignments=np.empty(0, dtype=np.int32), trained_on=n)
+        index.assignments = index.assign(vectors)
+        return index
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        if not len(vectors):
+            return np.empty(0, dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        probes = _top_k(self.centroids @ query, min(nprobe, len(self.centroids)))
+        return np.flatnonzero(np.isin(self.assignments, probes))
+
+
+class NamespaceIndex:
+    """
+    A single namespace of the local vector store: a matrix of unit vectors kept
+    in a memory-mapped file plus a JSON sidecar with ids and metadata.
+
+    Rows are stored as float32, float16 (half the size, scores change in the
+    fourth decimal) or int8 (a quarter; each row is scaled so its largest
+    component is 127, and re-normalized when scored).
+
+    Upserts and metadata updates append only their own rows to a log, so
+    writing a batch costs the same however large the namespace is; deletes
+    compact the rows and write a new snapshot. Several processes can share a
+    namespace: writes hold an exclusive lock on the directory, reads a shared
+    one, and each first replays what other processes appended.
+    """
+    def __init__(self, path: str, ann_threshold: int, nprobe: int, dtype: str = "float32"):
+        if dtype not in VECTORS_FILES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.path = path
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        self.dtype = dtype
+        self.lock = threading.RLock()
+
+        self.dim: Optional[int] = None
+        self.count = 0
+        self.capacity = 0
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.vectors: Optional[np.memmap] = None
+
+        self._columns: Dict[str, np.ndarray] = {}
+        self._ivf: Optional[IVFIndex] = None
+
+        self._generation = 0
+        self._log_offset = 0
+        self._snapshot_bytes = 0
+        self._snapshot_version = None
+
+        os.makedirs(path, exist_ok=True)
+        self._lock_file = open(os.path.join(path, LOCK_FILE), "a+b")
+        with self._file_lock(exclusive=False):
+            self._load()
+
+    # --- Persistence ---
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, VECTORS_FILES[self.dtype])
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, META_FILE)
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, META_LOG_FILE.format(generation=self._generation))
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _stat_snapshot(self):
+        try:
+            stat = os.stat(self._meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """Reads the snapshot, then replays its log."""
+        self.dim = None
+        self.count = 0
+        self.capacity = 0
+        self.ids = []
+        self.metadata = []
+        self.vectors = None
+        self._generation = 0
+        self._log_offset = 0
+        self._snapshot_bytes = 0
+        self._snapshot_version = self._stat_snapshot()
+
+        if self._snapshot_version is not None:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            self.dim = meta["dim"]
+            # Namespaces written before dtypes were configurable are float32
+            self.dtype = meta.get("dtype", "float32")
+            self.count = meta["count"]
+            self.capacity = meta["capacity"]
+            self.ids = meta["ids"]
+            self.metadata = meta["metadata"]
+            self._generation = meta.get("generation", 0)
+            self._snapshot_bytes = self._snapshot_version[2]
+
+        self.id_to_row = {vid: row for row, vid in enumerate(self.ids)}
+        if not self._replay() and self.dim:
+            self.vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(self.capacity, self.dim))
+        self._invalidate()
+        self._ivf = None
+
+    def _replay(self) -> bool:
+        """Applies log records written since the last read; returns whether there were any."""
+        try:
+            with open(self._log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return False
+
+        # A record without its newline is still being written, or was torn by a crash
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return False
+
+        capacity = self.capacity
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            if record["op"] == "upsert":
+                self.dim = record["dim"]
+                self.dtype = record["dtype"]
+                self.capacity = record["capacity"]
+                for row, vid, meta in record["rows"]:
+                    if row == len(self.ids):
+                        self.ids.append(vid)
+                        self.metadata.append(meta)
+                        self.id_to_row[vid] = row
+                    else:
+                        self.metadata[row] = meta
+                self.count = record["count"]
+            elif record["op"] == "update":
+                self.metadata[record["row"]] = record["metadata"]
+        self._log_offset += end
+
+        if self.dim and (self.vectors is None or self.capacity != capacity):
+            # Another process created or grew the vectors file
+            self.vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(self.capacity, self.dim))
+        return True
+
+    def _refresh(self):
+        """Catches up with writes made by other processes; call with the file lock held."""
+        if self._stat_snapshot() != self._snapshot_version:
+            # Another process deleted rows or compacted the log
+            self._load()
+        elif self._replay():
+            self._invalidate()
+            self._ivf = None
+
+    def _append_log(self, record: Dict[str, Any]):
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with open(self._log_path, "ab") as f:
+            f.write(line)
+        self._log_offset += len(line)
+        if self._log_offset > max(self._snapshot_bytes, MIN_COMPACT_BYTES):
+            self._save_meta()
+
+    def _save_meta(self):
+        """Writes a snapshot of the next generation and drops the previous log."""
+        previous_log = self._log_path
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "dtype": self.dtype,
+                "count": self.count,
+                "capacity": self.capacity,
+                "generation": self._generation + 1,
+                "ids": self.ids,
+                "metadata": self.metadata,
+            }, f)
+        os.replace(tmp_path, self._meta_path)
+
+        self._generation += 1
+        self._log_offset = 0
+        self._snapshot_version = self._stat_snapshot()
+        self._snapshot_bytes = self._snapshot_version[2]
+        try:
+            os.remove(previous_log)
+        except FileNotFoundError:
+            pass
+
+    def _resize(self, capacity: int):
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * np.dtype(self.dtype).itemsize)
+
+        self.capacity = capacity
+        self.vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+
+    def _invalidate(self):
+        self._columns = {}
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Unit float32 rows -> the stored representation."""
+        if self.dtype == "int8":
+            scale = np.abs(vectors).max(axis=1, keepdims=True)
+            scale[scale == 0] = 1.0
+            return np.rint(vectors * (127 / scale)).astype(np.int8)
+        return vectors.astype(self.dtype)
+
+    def _decode(self, stored: np.ndarray) -> np.ndarray:
+        """Stored rows -> unit float32 rows for scoring."""
+        stored = np.asarray(stored)
+        if self.dtype == "int8":
+            return _normalize(stored.astype(np.float32))
+        return stored.astype(np.float32, copy=False)
+
+    # --- Writes ---
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, metadata: List[Dict[str, Any]]) -> int:
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+
+        with self.lock, self._file_lock(exclusive=True):
+            self._refresh()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._resize(INITIAL_CAPACITY)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            stored = self._encode(vectors)
+            new_rows = []
+            written = []
+            for vid, vector, meta in zip(ids, stored, metadata):
+                row = self.id_to_row.get(vid)
+                if row is None:
+                    if self.count >= self.capacity:
+                        self._resize(self.capacity * 2)
+                    row = self.count
+                    self.count += 1
+                    self.ids.append(vid)
+                    self.metadata.append(meta)
+                    self.id_to_row[vid] = row
+                    new_rows.append(row)
+                else:
+                    self.metadata[row] = meta
+                self.vectors[row] = vector
+                written.append([row, vid, meta])
+
+            # Vectors first: a record in the log always refers to rows already on disk
+            self.vectors.flush()
+            self._append_log({"op": "upsert", "dim": self.dim, "dtype": self.dtype, "capacity": self.capacity, "count": self.count, "rows": written})
+            self._invalidate()
+
+            if self._ivf is not None:
+                if self.count >= 2 * self._ivf.trained_on:
+                    # The centroids no longer describe the data well; retrain lazily.
+                    self._ivf = None
+                else:
+                    self._ivf.assignments = np.concatenate([
+                        self._ivf.assignments[:self.count - len(new_rows)],
+                        self._ivf.assign(self._decode(self.vectors[new_rows]))
+                    ])
+                    # Rows overwritten in place keep stale buckets until the next retrain,
+                    # which only costs recall, not correctness of the returned scores.
+
+            return len(ids)
+
+    def update_metadata(self, vid: str, metadata: Dict[str, Any]) -> bool:
+        """Merges `metadata` into the stored metadata of one row, leaving its vector alone."""
+        with self.lock, self._file_lock(exclusive=True):
+            self._refresh()
+            row = self.id_to_row.get(vid)
+            if row is None:
+                return False
+
+            self.metadata[row] = {**self.metadata[row], **metadata}
+            self._append_log({"op": "update", "row": row, "metadata": self.metadata[row]})
+            self._invalidate()
+            return True
+
+    def delete(self, filter: Optional[dict] = None, ids: Optional[List[str]] = None, delete_all: bool = False) -> int:
+        with self.lock, self._file_lock(exclusive=True):
+            self._refresh()
+            if self.count == 0:
+                return 0
+
+            if delete_all:
+                keep = np.zeros(self.count, dtype=bool)
+            elif ids is not None:
+                keep = np.ones(self.count, dtype=bool)
+                keep[[self.id_to_row[vid] for vid in ids if vid in self.id_to_row]] = False
+            else:
+                keep = ~self._filter_mask(filter)
+
+            removed = int(self.count - keep.sum())
+            if removed == 0:
+                return 0
+
+            rows = np.flatnonzero(keep)
+            kept_vectors = np.asarray(self.vectors[rows])
+            self.ids = [self.ids[r] for r in rows]
+            self.metadata = [self.metadata[r] for r in rows]
+            self.id_to_row = {vid: row for row, vid in enumerate(self.ids)}
+            self.count = len(rows)
+            self.vectors[:self.count] = kept_vectors
+            self.vectors.flush()
+            self._save_meta()
+
+            self._invalidate()
+            self._ivf = None
+            return removed
+
+    # --- Reads ---
+
+    def _column(self, key: str) -> np.ndarray:
+        column = self._columns.get(key)
+        if column is None:
+            column = np.empty(self.count, dtype=object)
+            column[:] = [m.get(key) for m in self.metadata]
+            self._columns[key] = column
+        return column
+
+    def _filter_mask(self, filter: Optional[dict], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluates a Pinecone-style metadata filter ({"key": value} or
+        {"key": {"$eq" | "$ne" | "$in" | "$nin": ...}}) against the given rows.
+        """
+        size = self.count if rows is None else len(rows)
+        mask = np.ones(size, dtype=bool)
+
+        for key, condition in (filter or {}).items():
+            column = self._column(key)
+            if rows is not None:
+                column = column[rows]
+
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+
+            for op, value in condition.items():
+                if op == "$eq":
+                    mask &= column == value
+                elif op == "$ne":
+                    mask &= column != value
+                elif op == "$in":
+                    mask &= np.isin(column, list(value))
+                elif op == "$nin":
+                    mask &= ~np.isin(column, list(value))
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+
+        return mask
+
+    def _score(self, query: np.ndarray, mask: np.ndarray, k: int, rows: Optional[np.ndarray] = None):
+        """
+        Positions (into `rows`, or into the stored rows when None) and scores
+        of the k best rows allowed by `mask`, best first. Scores one block of
+        SCORE_BLOCK_ROWS at a time and keeps a running top-k.
+        """
+        best = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(mask), SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, len(mask))
+            allowed = np.flatnonzero(mask[start:stop])
+            if not len(allowed):
+                continue
+            block = self.vectors[start:stop] if rows is None else self.vectors[rows[start:stop]]
+            scores = (self._decode(block) @ query)[allowed]
+
+            candidates = np.concatenate([best, allowed + start])
+            candidate_scores = np.concatenate([best_scores, scores])
+            top = _top_k(candidate_scores, min(k, len(candidate_scores)))
+            best, best_scores = candidates[top], candidate_scores[top]
+
+        return best, best_scores
+
+    def query(self, vector: List[float], top_k: int, filter: Optional[dict] = None) -> List[Dict[str, Any]]:
+        with self.lock, self._file_lock(exclusive=False):
+            self._refresh()
+            if self.count == 0 or top_k <= 0:
+                return []
+
+            query = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+
+            rows = None
+            if self.count >= self.ann_threshold:
+                if self._ivf is None:
+                    self._ivf = IVFIndex.train(self._decode(self.vectors[:self.count]))
+                rows = self._ivf.candidates(query, self.nprobe)
+                mask = self._filter_mask(filter, rows)
+                if mask.sum() < top_k:
+                    # Selective filters (e.g. one small source) can leave the probed
+                    # buckets nearly empty; fall back to an exact scan.
+                    rows = None
+
+            if rows is None:
+                mask = self._filter_mask(filter)
+
+            if not mask.any():
+                return []
+
+            best, scores = self._score(query, mask, min(top_k, int(mask.sum())), rows)
+            if rows is not None:
+                best_rows = rows[best]
+            else:
+                best_rows = best
+
+            return [{
+                "id": self.ids[row],
+                "score": float(score),
+                "metadata": dict(self.metadata[row]),
+            } for score, row in zip(scores, best_rows)]
@@ -1,17 +1,56 @@
+import os
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from app.api import transcript, chunk, ingestion, embedding, query, session, auth
-from app.core.database import engine, Base
+from app.core.database import engine, Base, dispose_async_engine
 from app.core.auth import security
+from app.core import readiness, metrics
+from app.core.embedding import warm_up_embeddings
+from app.services.ingestion_job_service import get_ingestion_job_service
+from app.services.vector_db import warm_up_vector_db
+from app.services.container import init_container
+from app.services.llm_service import get_llm_service
+from app.services.summary_service import get_summary_service
 
 load_dotenv()
 
+# Load the embedding model and open external clients in the background at startup,
+# so the first requests don't pay for it. Disable for tests and one-off scripts.
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "true").lower() == "true"
 
+def warm_up():
+     readiness.warm("embedding_model", warm_up_embeddings)
+     readiness.warm("vector_db", warm_up_vector_db)
+     readiness.warm("llm", get_llm_service)
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+     readiness.warm("database", lambda: Base.metadata.create_all(bind=engine))
+     # Shared, thread-safe services; request dependencies read them from app.state
+     app.state.container = init_container()
+
+     if WARMUP_ON_STARTUP:
+          threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+     job_service = get_ingestion_job_service()
+     resumed = job_service.resume_pending()
+     if resumed:
+          print(f"Resumed {resumed} unfinished ingestion jobs")
+     yield
+     job_service.shutdown()
+     summary_service = get_summary_service()
+     if summary_service:
+          summary_service.shutdown()
+     await app.state.container.aclose()
+     await dispose_async_engine()
+     engine.dispose()
 
 app = FastAPI(
      title="Ask My Youtuber Backend",
+     lifespan=lifespan,
      swagger_ui_parameters={"persistAuthorization": True})
 
 app.include_router(transcript.router, prefix="/api", tags=["Transcript"])
@@ -24,4 +63,16 @@ app.include_router(auth.router, prefix="/api", tags=["auth"])
 
 @app.get("/")
 def root():
-     return {"Message": "Backend is running"}  
\ No newline at end of file
+     return {"Message": "Backend is running"}  
+
+@app.get("/readyz")
+def readyz():
+     ready = readiness.is_ready()
+     return JSONResponse(
+          status_code=200 if ready else 503,
+          content={"ready": ready, "resources": readiness.snapshot()}
+     )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+     return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
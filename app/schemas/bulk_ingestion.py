@@ -0,0 +1,10 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class BulkIngestionRequest(BaseModel):
+    video_ids: List[str] = [] # video ids or URLs
+    playlist_id: Optional[str] = None
+    channel_url: Optional[str] = None
+    max_chars: int = 2000
+    overlap_chars: int = 300
+    concurrency: Optional[int] = None # defaults to BULK_FETCH_CONCURRENCY
@@ -6,6 +6,8 @@ class Chunk(BaseModel):
     text: str
     start: float
     end: float
+    page: Optional[int] = None # first page, for PDF chunks
+    page_end: Optional[int] = None
     vector: Optional[List[float]] = None
 
 class ChunkResponse(BaseModel):
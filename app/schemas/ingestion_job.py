@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+import uuid
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(String, nullable=False, index=True)
+    source_id = Column(String, nullable=False) # video_id or filename
+    source_type = Column(String, nullable=False) # 'video', 'pdf' or 'bulk'
+    params = Column(JSON, nullable=False, default=dict) # pipeline arguments, enough to re-run the job
+    status = Column(String, nullable=False, default="queued", index=True) # queued | running | completed | failed
+    stage = Column(String, nullable=True) # fetched | chunked | embedding | upserted
+    progress_current = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    owner = Column(String, nullable=True) # worker process that claimed the job
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True) # refreshed by the owner while running
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
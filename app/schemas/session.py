@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -11,6 +11,7 @@ class ChatSession(Base):
     created_at = Column(DateTime, default=datetime.now)
 
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan")
+    summary = relationship("ChatSessionSummary", uselist=False, cascade="all, delete-orphan")
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -21,5 +22,22 @@ class ChatMessage(Base):
     role = Column(String)  # 'user' or 'assistant'
     content = Column(Text)
     timestamp = Column(DateTime, default=datetime.now)
+    is_partial = Column(Boolean, nullable=False, default=False, server_default="false") # streamed answer cut short by a client disconnect
 
-    session = relationship("ChatSession", back_populates="messages")
\ No newline at end of file
+    session = relationship("ChatSession", back_populates="messages")
+
+    # Serves "latest N messages of a session" without sorting the whole session
+    __table_args__ = (
+        Index("ix_chat_messages_session_timestamp", "session_id", "timestamp"),
+    )
+
+class ChatSessionSummary(Base):
+    """Rolling summary of a session's older messages, used in place of them in prompts."""
+    __tablename__ = "chat_session_summaries"
+
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(String, index=True, nullable=False)
+    summary = Column(Text, nullable=False)
+    through_message_id = Column(Integer, nullable=False) # last chat_messages.id folded into the summary
+    message_count = Column(Integer, nullable=False, default=0) # messages folded in so far
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
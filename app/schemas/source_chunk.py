@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Integer, JSON, UniqueConstraint, Index, UUID
+from app.core.database import Base
+import uuid
+
+class SourceChunk(Base):
+    """Manifest of the chunks stored in the vector index for one ingested source."""
+    __tablename__ = "source_chunks"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(String, nullable=False)
+    source_id = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=False) # sha256 of the chunk's normalized text
+    occurrence = Column(Integer, nullable=False, default=0) # repeats of the same text within the source, counted in order
+    vector_id = Column(String, nullable=False)
+    position = Column(JSON, nullable=False, default=dict) # start/end (and page/page_end for PDFs) as upserted
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'source_id', 'content_hash', 'occurrence', name='_user_source_hash_uc'),
+        Index('ix_source_chunks_user_source', 'user_id', 'source_id'),
+    )
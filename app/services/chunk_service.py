@@ -1,30 +1,66 @@
+import os
 from fastapi import APIRouter, HTTPException
 from app.schemas.transcript import TranscriptResponse
 from app.schemas.chunk import ChunkResponse, Chunk
-from app.core.chunker import chunk_transcript
+from app.core.chunker import iter_chunks
+from app.core.embedding import count_tokens, token_offsets, get_max_tokens
+
+# Word pieces repeated at the start of the next chunk, made of whole sentences
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "32"))
+
+_chunk_service_instance = None
 
 class ChunkService:
+
+    def iter_chunks(
+        self,
+        segments,
+        max_chars: int = 2000,
+        overlap_chars: int = 300,
+        max_tokens: int = None,
+        overlap_tokens: int = None
+    ):
+        """
+        Yields chunk dicts lazily. Chunks never exceed the embedding model's
+        token limit (or `max_tokens`, if smaller) nor `max_chars` characters.
+        """
+        limit = get_max_tokens()
+        return iter_chunks(
+            segments=segments,
+            count_tokens=count_tokens,
+            max_tokens=min(max_tokens, limit) if max_tokens else limit,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens,
+            max_chars=max_chars,
+            overlap_chars=overlap_chars,
+            token_offsets=token_offsets
+        )
     
     def get_chunks(
         self,
         segments: list[dict],
         source_id: str,
         max_chars: int = 2000,
-        overlap_chars: int = 300
+        overlap_chars: int = 300,
+        max_tokens: int = None,
+        overlap_tokens: int = None
     ):
         try:
 
-            chunks = chunk_transcript(
+            chunks = self.iter_chunks(
                 segments=segments,
                 max_chars=max_chars,
-                overlap_chars=overlap_chars
+                overlap_chars=overlap_chars,
+                max_tokens=max_tokens,
+                overlap_tokens=overlap_tokens
             )
 
             chunk_model = [
                 Chunk( video_id = source_id,
                 text = chunk["text"],
                 start = chunk["start"],
-                end = chunk["end"]
+                end = chunk["end"],
+                page = chunk.get("page"),
+                page_end = chunk.get("page_end")
                 ) for chunk in chunks
             ]
 
@@ -39,4 +75,8 @@ class ChunkService:
             )
 
 def get_chunk_service():
-    return ChunkService()
+    global _chunk_service_instance
+    if not _chunk_service_instance:
+        _chunk_service_instance = ChunkService()
+
+    return _chunk_service_instance
@@ -0,0 +1,44 @@
+from fastapi import Request
+from app.services import chunk_service, transcript_service, embedding_service, vector_db, llm_service
+from app.core.http_session import get_http_session, close_http_session
+
+_container_instance = None
+
+class ServiceContainer:
+    """
+    Process-wide resources shared by every request: the HTTP session,
+    transcript fetcher, chunker, embedding model, vector index client and
+    LLM client, all safe for concurrent use. Created in the app lifespan.
+    Per-request units of work (DB sessions) are never held here; request
+    dependencies combine them with these shared services.
+    """
+    def __init__(self):
+        self.http_session = get_http_session()
+        self.chunk_service = chunk_service.get_chunk_service()
+        self.transcript_service = transcript_service.get_transcript_service()
+        self.embedding_service = embedding_service.get_embedding_service()
+
+    # Created on first use: they need credentials and network, and warm-up builds them in the background
+    @property
+    def vector_db_service(self) -> vector_db.VectorDBService:
+        return vector_db.get_vector_db_service()
+
+    @property
+    def llm_service(self) -> llm_service.LLMService:
+        return llm_service.get_llm_service()
+
+    async def aclose(self):
+        await vector_db.close_vector_db_service()
+        close_http_session()
+
+def init_container() -> ServiceContainer:
+    global _container_instance
+    if _container_instance is None:
+        _container_instance = ServiceContainer()
+
+    return _container_instance
+
+def get_container(request: Request) -> ServiceContainer:
+    container = getattr(request.app.state, "container", None)
+    # Apps started without the lifespan (scripts, TestClient without `with`) get the same shared container
+    return container if container is not None else init_container()
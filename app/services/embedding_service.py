@@ -1,16 +1,37 @@
 
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from app.core.embedding import embed_texts
+from app.core.metrics import EMBEDDING_SECONDS
+
+# Dedicated threads for CPU-bound encoding, so async requests never wait on the shared default pool
+EMBEDDING_EXECUTOR_WORKERS = int(os.environ.get("EMBEDDING_EXECUTOR_WORKERS", "4"))
 
 _embedding_service_instance = None
+_embedding_executor = None
+
+def get_embedding_executor() -> ThreadPoolExecutor:
+    global _embedding_executor
+    if _embedding_executor is None:
+        _embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_EXECUTOR_WORKERS, thread_name_prefix="embedding")
+
+    return _embedding_executor
+
 class EmbeddingService:
 
     def embed_texts(self, texts:List[str]) -> List[List[float]]:
         try:
-            return embed_texts(texts=texts)
+            with EMBEDDING_SECONDS.time():
+                return embed_texts(texts=texts)
         except Exception as e:
             raise RuntimeError(f"Failed to embed texts due to {e}")
 
+    async def aembed_texts(self, texts:List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_embedding_executor(), self.embed_texts, texts)
+
 
 def get_embedding_service():
     global _embedding_service_instance
@@ -0,0 +1,278 @@
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.database import SessionLocal
+from app.schemas.ingestion_job import IngestionJob
+from app.services.container import init_container
+from app.services.ingestion_service import IngestionService, BULK_FETCH_CONCURRENCY, spool_upload
+from app.services.playlist_resolver import get_playlist_resolver
+from app.schemas.bulk_ingestion import BulkIngestionRequest
+
+# --- Configuration ---
+INGESTION_WORKERS = int(os.environ.get("INGESTION_WORKERS", "2"))
+# Owners refresh the heartbeat of their running jobs this often
+INGESTION_JOB_HEARTBEAT_SECONDS = float(os.environ.get("INGESTION_JOB_HEARTBEAT_SECONDS", "30"))
+# A running job whose heartbeat is older than this is assumed orphaned and may be reclaimed
+INGESTION_JOB_STALE_SECONDS = float(os.environ.get("INGESTION_JOB_STALE_SECONDS", "300"))
+
+_ingestion_job_service_instance = None
+
+class IngestionJobService:
+    """
+    Runs ingestion pipelines on a bounded worker pool. Job state lives in the
+    ingestion_jobs table, so status survives restarts and unfinished jobs are
+    picked up again by resume_pending().
+
+    Every web worker has its own instance. A job only runs in the worker that
+    claims it (an UPDATE conditioned on its status), and running jobs carry
+    the owner's heartbeat, so another worker reclaims them only once that
+    heartbeat has gone stale.
+    """
+    def __init__(self, max_workers: int = INGESTION_WORKERS, session_factory=SessionLocal, heartbeat_seconds: float = INGESTION_JOB_HEARTBEAT_SECONDS, stale_seconds: float = INGESTION_JOB_STALE_SECONDS):
+        self.session_factory = session_factory
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self._submitted = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat_thread = None
+
+    def _build_ingestion_service(self, db) -> IngestionService:
+        # Shared services from the container, with the job's own Session
+        container = init_container()
+        return IngestionService(
+            transcript_service=container.transcript_service,
+            chunk_service=container.chunk_service,
+            embedding_service=container.embedding_service,
+            vector_db_service=container.vector_db_service,
+            db=db
+        )
+
+    def _create_job(self, user_id: str, source_id: str, source_type: str, params: dict) -> IngestionJob:
+        db = self.session_factory()
+        try:
+            job = IngestionJob(user_id=user_id, source_id=source_id, source_type=source_type, params=params, status="queued")
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Error creating ingestion job for {source_id}: {e}")
+            raise HTTPException(status_code=500, detail="Failed to queue ingestion job.")
+        finally:
+            db.close()
+
+    def _enqueue(self, job_id: uuid.UUID):
+        with self._lock:
+            if job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="ingestion-heartbeat", daemon=True)
+                self._heartbeat_thread.start()
+        self.executor.submit(self._run_job, job_id)
+
+    def _claimable(self):
+        """Queued jobs, and running jobs whose owner stopped sending heartbeats."""
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=self.stale_seconds)
+        return or_(
+            IngestionJob.status == "queued",
+            and_(IngestionJob.status == "running", or_(IngestionJob.heartbeat_at.is_(None), IngestionJob.heartbeat_at < stale_before))
+        )
+
+    def _claim(self, db, job_id: uuid.UUID) -> bool:
+        """Atomically takes the job for this worker; False if another worker has it or it is finished."""
+        claimed = db.query(IngestionJob).filter(IngestionJob.id == job_id, self._claimable()).update({
+            IngestionJob.status: "running",
+            IngestionJob.owner: self.worker_id,
+            IngestionJob.heartbeat_at: datetime.now(timezone.utc),
+            IngestionJob.stage: None,
+            IngestionJob.progress_current: 0,
+            IngestionJob.progress_total: 0,
+            IngestionJob.error: None,
+        }, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.heartbeat_seconds):
+            db = self.session_factory()
+            try:
+                db.query(IngestionJob).filter(IngestionJob.owner == self.worker_id, IngestionJob.status == "running").update(
+                    {IngestionJob.heartbeat_at: datetime.now(timezone.utc)}, synchronize_session=False
+                )
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                print(f"Error refreshing ingestion job heartbeats: {e}")
+            finally:
+                db.close()
+
+    def submit_video(self, video_id: str, user_id: str, max_chars: int = 2000, overlap_chars: int = 300, update: bool = False) -> IngestionJob:
+        job = self._create_job(
+            user_id=user_id,
+            source_id=video_id,
+            source_type="video",
+            params={"max_chars": max_chars, "overlap_chars": overlap_chars, "update": update}
+        )
+        self._enqueue(job.id)
+        return job
+
+    async def submit_pdf(self, file: UploadFile, user_id: str, max_chars: int = 2000, overlap_chars: int = 300, update: bool = False) -> IngestionJob:
+        # Spooled uploads wait on disk until their job runs, so queued jobs survive a restart
+        spool_path = await spool_upload(file, suffix=".pdf")
+
+        job = self._create_job(
+            user_id=user_id,
+            source_id=file.filename,
+            source_type="pdf",
+            params={"max_chars": max_chars, "overlap_chars": overlap_chars, "update": update, "file_path": spool_path}
+        )
+        self._enqueue(job.id)
+        return job
+
+    def submit_bulk(self, request: BulkIngestionRequest, user_id: str) -> IngestionJob:
+        if not (request.video_ids or request.playlist_id or request.channel_url):
+            raise HTTPException(status_code=400, detail="Provide video_ids, playlist_id or channel_url.")
+
+        job = self._create_job(
+            user_id=user_id,
+            source_id=request.playlist_id or request.channel_url or "bulk",
+            source_type="bulk",
+            params=request.model_dump()
+        )
+        self._enqueue(job.id)
+        return job
+
+    def get_job(self, job_id: str, user_id: str) -> IngestionJob:
+        try:
+            job_uuid = uuid.UUID(job_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Job not found.")
+
+        db = self.session_factory()
+        try:
+            job = db.query(IngestionJob).filter(IngestionJob.id == job_uuid, IngestionJob.user_id == user_id).first()
+            if not job:
+                raise HTTPException(status_code=404, detail="Job not found.")
+            return job
+        finally:
+            db.close()
+
+    def resume_pending(self) -> int:
+        """
+        Re-queues queued jobs and running jobs with a stale heartbeat. Other
+        workers may pick up the same ids; the claim in _run_job runs each once.
+        """
+        db = self.session_factory()
+        try:
+            pending = db.query(IngestionJob.id).filter(self._claimable()).all()
+        finally:
+            db.close()
+
+        for (job_id,) in pending:
+            self._enqueue(job_id)
+        return len(pending)
+
+    def shutdown(self):
+        self._stopped.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_job(self, job_id: uuid.UUID):
+        db = self.session_factory()
+        try:
+            if not self._claim(db, job_id):
+                return
+            job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+
+            def progress(stage: str, current: int = 0, total: int = 0):
+                job.stage = stage
+                job.progress_current = current
+                job.progress_total = total
+                db.commit()
+
+            params = dict(job.params or {})
+            service = self._build_ingestion_service(db)
+
+            try:
+                if job.source_type == "video":
+                    result = service.process_video(
+                        video_id=job.source_id,
+                        user_id=job.user_id,
+                        max_chars=params.get("max_chars", 2000),
+                        overlap_chars=params.get("overlap_chars", 300),
+                        update=params.get("update", False),
+                        progress=progress
+                    )
+                elif job.source_type == "bulk":
+                    video_ids = list(params.get("video_ids") or [])
+                    resolver = get_playlist_resolver()
+                    if params.get("playlist_id"):
+                        video_ids.extend(resolver.resolve_playlist(params["playlist_id"]))
+                    if params.get("channel_url"):
+                        video_ids.extend(resolver.resolve_channel(params["channel_url"]))
+
+                    result = service.process_videos(
+                        video_ids=video_ids,
+                        user_id=job.user_id,
+                        max_chars=params.get("max_chars", 2000),
+                        overlap_chars=params.get("overlap_chars", 300),
+                        concurrency=params.get("concurrency") or BULK_FETCH_CONCURRENCY,
+                        progress=progress
+                    )
+                else:
+                    result = service.process_pdf_file(
+                        file_path=params["file_path"],
+                        filename=job.source_id,
+                        user_id=job.user_id,
+                        max_chars=params.get("max_chars", 2000),
+                        overlap_chars=params.get("overlap_chars", 300),
+                        update=params.get("update", False),
+                        progress=progress
+                    )
+            except HTTPException as e:
+                db.rollback()
+                job.status = "failed"
+                job.error = str(e.detail)
+            except Exception as e:
+                db.rollback()
+                print(f"Ingestion job {job_id} failed: {e}")
+                job.status = "failed"
+                job.error = str(e)
+            else:
+                job.result = result
+                if isinstance(result, dict) and result.get("status") == "Failed":
+                    job.status = "failed"
+                    job.error = result.get("message")
+                else:
+                    job.status = "completed"
+
+            db.commit()
+
+            if job.source_type == "pdf" and params.get("file_path") and os.path.exists(params["file_path"]):
+                os.remove(params["file_path"])
+
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Error updating ingestion job {job_id}: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._submitted.discard(job_id)
+
+def get_ingestion_job_service() -> IngestionJobService:
+    global _ingestion_job_service_instance
+    if not _ingestion_job_service_instance:
+        _ingestion_job_service_instance = IngestionJobService()
+
+    return _ingestion_job_service_instance
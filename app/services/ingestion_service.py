@@ -1,13 +1,72 @@
 from fastapi import Depends, HTTPException, UploadFile
 import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 # from app.services.chunk import ChunkService
 from app.schemas.ingestion_source import IngestionSource
+from app.schemas.source_chunk import SourceChunk
 from app.services import chunk_service, transcript_service, vector_db, embedding_service
-from langchain_community.document_loaders import PyPDFLoader
+from app.schemas.chunk import Chunk
+from app.core import pdf_extractor
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.services.container import ServiceContainer, get_container
+from app.core.answer_cache import get_answer_cache
+from app.core.embedding_cache import normalize_text
+from app.core.vector_compression import reduce_vectors
+from app.core.metrics import INGESTION_CHUNKS, INGESTION_EMBEDDING_SECONDS
+import hashlib
 
-_ingestion_service_instance = None
+# Chunks are embedded in batches of this size so progress can be reported as "N of M"
+EMBEDDING_BATCH_SIZE = int(os.environ.get("INGESTION_EMBEDDING_BATCH_SIZE", "64"))
+# Maximum number of transcripts fetched in parallel during bulk ingestion
+BULK_FETCH_CONCURRENCY = int(os.environ.get("BULK_FETCH_CONCURRENCY", "8"))
+# Uploads are written here in blocks instead of being read into memory
+INGESTION_SPOOL_DIR = os.environ.get("INGESTION_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "ask_my_youtube_uploads"))
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+def _no_progress(stage: str, current: int = 0, total: int = 0):
+    pass
+
+def chunk_content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+def chunk_vector_id(source_id: str, content_hash: str, occurrence: int) -> str:
+    # The first occurrence keeps the plain hash id, so sources ingested before repeats were counted still match
+    vector_id = f"{source_id}_{content_hash[:16]}"
+    return vector_id if occurrence == 0 else f"{vector_id}_{occurrence}"
+
+def _number_occurrences(hashes: list[str], counts: Counter) -> list[int]:
+    """Numbers repeated hashes 0, 1, 2... continuing from `counts`, which is updated."""
+    occurrences = []
+    for content_hash in hashes:
+        occurrences.append(counts[content_hash])
+        counts[content_hash] += 1
+    return occurrences
+
+def _position(metadata: dict) -> dict:
+    return {key: metadata[key] for key in ("start", "end", "page", "page_end") if key in metadata}
+
+def _chunk_position(chunk: Chunk) -> dict:
+    position = {"start": chunk.start, "end": chunk.end}
+    if chunk.page is not None:
+        position.update(page=chunk.page, page_end=chunk.page_end)
+    return position
+
+async def spool_upload(file: UploadFile, suffix: str = "") -> str:
+    """Copies an upload to a private temp file block by block and returns its path."""
+    os.makedirs(INGESTION_SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=INGESTION_SPOOL_DIR, suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        while True:
+            block = await file.read(SPOOL_CHUNK_SIZE)
+            if not block:
+                break
+            f.write(block)
+    return path
 
 class IngestionService:
     def __init__(self, transcript_service: transcript_service.TranscriptService, chunk_service: chunk_service.ChunkService, embedding_service: embedding_service.EmbeddingService,vector_db_service:vector_db.VectorDBService, db: Session):
@@ -30,27 +89,56 @@ class IngestionService:
         self.db.merge(new_source)
         self.db.commit()
 
+    def _manifest_entries(self, documents: list[dict]) -> dict:
+        """(content_hash, occurrence) -> (vector_id, position) for upserted documents."""
+        return {(doc["content_hash"], doc["occurrence"]): (doc["id"], _position(doc["metadata"])) for doc in documents}
+
+    def _add_manifest(self, user_id: str, source_id: str, entries: dict):
+        # Staged only; committed together with the source registration
+        self.db.add_all([
+            SourceChunk(user_id=user_id, source_id=source_id, content_hash=content_hash, occurrence=occurrence, vector_id=vector_id, position=position)
+            for (content_hash, occurrence), (vector_id, position) in entries.items()
+        ])
+
+    def invalidate_answers(self, user_id: str, source_id: str = None):
+        """Cached answers may quote a source that just changed; drop them."""
+        cache = get_answer_cache()
+        if not cache:
+            return
+        if source_id:
+            cache.invalidate_source(namespace=f"user_{user_id}", source_id=source_id)
+        else:
+            cache.invalidate_namespace(namespace=f"user_{user_id}")
+
     def get_user_sources(self, user_id: str):
         return self.db.query(IngestionSource).filter(IngestionSource.user_id == user_id).all()
 
     def delete_by_source_id(self, user_id: str, source_id: str):
-        # 1. Pinecone Clean-up
-        vector_success = self.vector_db_service.delete_by_source(user_id, source_id)
-        
-        # 2. SQL Clean-up
+        # Unknown ids, and sources whose ingestion job hasn't registered them yet, are left untouched
         source_record = self.db.query(IngestionSource).filter(
             IngestionSource.user_id == user_id,
             IngestionSource.source_id == source_id
         ).first()
-        
-        if source_record:
-            try:
-                self.db.delete(source_record)
-                self.db.commit()
-                sql_sucess = True
-            except Exception:
-                self.db.rollback()
-                sql_sucess = False
+
+        if not source_record:
+            raise HTTPException(status_code=404, detail="Source not found.")
+
+        # 1. Pinecone Clean-up
+        vector_success = self.vector_db_service.delete_by_source(user_id, source_id)
+        self.invalidate_answers(user_id=user_id, source_id=source_id)
+
+        # 2. SQL Clean-up
+        try:
+            self.db.query(SourceChunk).filter(
+                SourceChunk.user_id == user_id,
+                SourceChunk.source_id == source_id
+            ).delete(synchronize_session=False)
+            self.db.delete(source_record)
+            self.db.commit()
+            sql_sucess = True
+        except Exception:
+            self.db.rollback()
+            sql_sucess = False
 
         if vector_success and sql_sucess:
             return {
@@ -70,12 +158,16 @@ class IngestionService:
         """
         # 1. Clear Pinecone
         vector_success = self.vector_db_service.delete_by_user(user_id)
+        self.invalidate_answers(user_id=user_id)
         
         # 2. Clear SQL
         try:
             num_deleted = self.db.query(IngestionSource).filter(
                 IngestionSource.user_id == user_id
             ).delete(synchronize_session=False) 
+            self.db.query(SourceChunk).filter(
+                SourceChunk.user_id == user_id
+            ).delete(synchronize_session=False)
             
             self.db.commit()
             sql_success = True
@@ -95,79 +187,126 @@ class IngestionService:
             "message": "Wipe incomplete. Check logs for database or vector sync issues."
         }
 
-    def process_video(self, video_id: str, user_id: str, max_chars: int = 2000, overlap_chars: int = 300):
-        transcript = self.transcript_service.get_transcript(video_id=video_id)
+    def process_video(self, video_id: str, user_id: str, max_chars: int = 2000, overlap_chars: int = 300, update: bool = False, progress=_no_progress):
+        # An update is meant to pick up corrected captions, so it can't be served from the cache
+        transcript = self.transcript_service.get_transcript(video_id=video_id, refresh=update)
         segments = [{"text": s.text, "start": s.start, "duration": s.duration} for s in transcript.snippets]
-        return self._run_ingestion_pipeline(segments=segments, user_id=user_id, source_id=video_id, display_name=transcript.title,source_type="video", max_chars=max_chars, overlap_chars=overlap_chars)
+        progress("fetched", len(segments), len(segments))
+        return self._run_ingestion_pipeline(segments=segments, user_id=user_id, source_id=video_id, display_name=transcript.title,source_type="video", max_chars=max_chars, overlap_chars=overlap_chars, update=update, progress=progress)
     
-    async def process_pdf(self, file: UploadFile, user_id: str, max_chars: int = 2000, overlap_chars: int = 300):
-        # 1. Temporarily save the file because PyPDFLoader needs a path
-        temp_file_path = f"temp_{user_id}_{file.filename}"
-        with open(temp_file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+    async def process_pdf(self, file: UploadFile, user_id: str, max_chars: int = 2000, overlap_chars: int = 300, update: bool = False):
+        # 1. Temporarily save the file because the PDF reader needs a path
+        temp_file_path = await spool_upload(file, suffix=".pdf")
 
         try:
-            # 2. Extract text using LangChain
-            loader = PyPDFLoader(temp_file_path)
-            pages = loader.load()
-            full_text = "\n".join([p.page_content for p in pages])
-            
-            segments = [{"text": full_text, "start": 0.0, "duration": 0.0}]
-            
-            # 3. Run the shared pipeline
-            return self._run_ingestion_pipeline(segments=segments, user_id=user_id, source_id=file.filename, display_name=file.filename, source_type="pdf", max_chars=max_chars, overlap_chars=overlap_chars)
-        
-        except Exception as e:
-            print (f"Error when processing pdf: {e}")
-            
+            return self.process_pdf_file(file_path=temp_file_path, filename=file.filename, user_id=user_id, max_chars=max_chars, overlap_chars=overlap_chars, update=update)
+
         finally:
             # 4. Clean up
             if os.path.exists(temp_file_path):
                 os.remove(temp_file_path)
 
+    def process_pdf_file(self, file_path: str, filename: str, user_id: str, max_chars: int = 2000, overlap_chars: int = 300, update: bool = False, progress=_no_progress):
+        try:
+            page_count = pdf_extractor.count_pages(file_path)
+
+            # 2. Extract pages in the process pool, streaming them into the pipeline in page order
+            def segments():
+                for page_number, text in pdf_extractor.iter_pages(file_path, page_count):
+                    progress("fetched", page_number, page_count)
+                    yield {"text": text, "start": 0.0, "duration": 0.0, "page": page_number}
+
+            # 3. Run the streaming pipeline
+            return self._run_streaming_pipeline(segments=segments(), user_id=user_id, source_id=filename, display_name=filename, source_type="pdf", max_chars=max_chars, overlap_chars=overlap_chars, update=update, progress=progress)
+        
+        except Exception as e:
+            print (f"Error when processing pdf: {e}")
+            raise
+
+    def _run_streaming_pipeline(self, segments, user_id: str, source_id: str, source_type: str, display_name: str, max_chars: int, overlap_chars: int, update: bool = False, progress=_no_progress):
+        """
+        Like _run_ingestion_pipeline, but chunks, embeds and upserts one batch
+        at a time as segments arrive, so memory stays bounded for long documents.
+        """
+        existing = self.db.query(IngestionSource).filter_by(
+            user_id=user_id, 
+            source_id=source_id
+        ).first()
+
+        if existing:
+            if update:
+                return self._update_source(segments=segments, user_id=user_id, source_id=source_id, source_type=source_type, max_chars=max_chars, overlap_chars=overlap_chars, progress=progress)
+            return {"status": "Failed", "message": "Source already exist."}
+
+        chunks = self.chunk_service.iter_chunks(segments=segments, max_chars=max_chars, overlap_chars=overlap_chars)
+        manifest = {}
+
+        try:
+            response = self.vector_db_service.ingest_stream(
+                document_batches=self._embed_documents(self._chunk_batches(chunks, source_id), user_id=user_id, source_id=source_id, source_type=source_type, manifest=manifest, progress=progress),
+                namespace=f"user_{user_id}"
+            )
+            total_count = response.get("total_count", 0)
+
+        except Exception:
+            # Don't leave a half-ingested, unregistered source behind
+            self.vector_db_service.delete_by_source(user_id, source_id)
+            raise
+
+        if not total_count:
+            return {"status": "success", "total_count": 0, "message": "No chunks generated."}
+
+        progress("upserted", total_count, total_count)
+        self.invalidate_answers(user_id=user_id, source_id=source_id)
+
+        self._add_manifest(user_id=user_id, source_id=source_id, entries=manifest)
+        self.register_source(
+            user_id=user_id,
+            source_id=source_id,
+            source_type=source_type,
+            display_name=display_name
+        )
+
+        return {"status": "success", "total_count": total_count}
+
     # In your _run_ingestion_pipeline
-    def _run_ingestion_pipeline(self, segments, user_id: str, source_id: str, source_type: str, display_name: str, max_chars: int, overlap_chars: int):
+    def _run_ingestion_pipeline(self, segments, user_id: str, source_id: str, source_type: str, display_name: str, max_chars: int, overlap_chars: int, update: bool = False, progress=_no_progress):
             existing = self.db.query(IngestionSource).filter_by(
                 user_id=user_id, 
                 source_id=source_id
             ).first()
 
             if existing:
+                if update:
+                    return self._update_source(segments=segments, user_id=user_id, source_id=source_id, source_type=source_type, max_chars=max_chars, overlap_chars=overlap_chars, progress=progress)
                 return {"status": "Failed", "message": "Source already exist."}
             
             # 1. Chunking
 
             chunk_response = self.chunk_service.get_chunks(segments=segments, source_id=source_id, max_chars=max_chars, overlap_chars=overlap_chars)
             chunks = chunk_response.chunk
+            progress("chunked", len(chunks), len(chunks))
             
             if not chunks:
                 return {"status": "success", "total_count": 0, "message": "No chunks generated."}
 
-            # 2. Embedding
-            texts_to_embed = [c.text for c in chunks]
-            vectors = self.embedding_service.embed_texts(texts_to_embed)
-
-            # 3. Metadata & Namespace Preparation
-            documents_to_ingest = []
-            for i, (chunk_model, vector_data) in enumerate(zip(chunks, vectors)):
-                chunk_dict = chunk_model.model_dump(exclude_none=True)
-                chunk_id = f"{source_id}_chunk_{i}"
-                chunk_dict["id"] = chunk_id
-                chunk_dict["vector"] = vector_data
-                chunk_dict["metadata"] = {
-                    "user_id": user_id,
-                    "source": source_id,
-                    "source_type": source_type
-                }
-                documents_to_ingest.append(chunk_dict)
+            # 2. Embedding, streamed into 3. the upsert (Pass the user_id as namespace)
+            batches = (chunks[start:start + EMBEDDING_BATCH_SIZE] for start in range(0, len(chunks), EMBEDDING_BATCH_SIZE))
+            manifest = {}
+            try:
+                pinecone_response = self.vector_db_service.ingest_stream(
+                    document_batches=self._embed_documents(batches, user_id=user_id, source_id=source_id, source_type=source_type, manifest=manifest, progress=progress, total=len(chunks)),
+                    namespace=f"user_{user_id}"
+                )
+            except Exception:
+                # Don't leave a half-ingested, unregistered source behind
+                self.vector_db_service.delete_by_source(user_id, source_id)
+                raise
 
-            # 4. Ingest into Pinecone (Pass the user_id as namespace)
-            pinecone_response = self.vector_db_service.ingest_documents(
-                documents=documents_to_ingest, 
-                namespace=f"user_{user_id}"
-            )
+            progress("upserted", pinecone_response.get("total_count", 0), len(chunks))
+            self.invalidate_answers(user_id=user_id, source_id=source_id)
 
+            self._add_manifest(user_id=user_id, source_id=source_id, entries=manifest)
             self.register_source(
                 user_id=user_id,
                 source_id=source_id,
@@ -177,15 +316,271 @@ class IngestionService:
 
             return pinecone_response
 
+    def _update_source(self, segments, user_id: str, source_id: str, source_type: str, max_chars: int, overlap_chars: int, progress=_no_progress):
+        """
+        Re-ingests an already registered source against its chunk manifest:
+        chunks whose normalized text hash is already stored are reused (only
+        their position metadata is refreshed when it moved), new ones are
+        embedded and upserted, and chunks that vanished are deleted.
+        """
+        namespace = f"user_{user_id}"
+        manifest = {
+            (row.content_hash, row.occurrence): row for row in self.db.query(SourceChunk).filter(
+                SourceChunk.user_id == user_id,
+                SourceChunk.source_id == source_id
+            ).all()
+        }
+
+        if not manifest:
+            # Ingested before manifests existed; its positional ids can't be matched, so start over
+            if not self.vector_db_service.delete_by_source(user_id, source_id):
+                raise HTTPException(status_code=500, detail="Failed to clear the previous version of the source.")
+
+        chunks = self.chunk_service.iter_chunks(segments=segments, max_chars=max_chars, overlap_chars=overlap_chars)
+        seen = set()
+        counts = Counter()
+        added = {}
+        moved = 0
+
+        try:
+            for batch in self._chunk_batches(chunks, source_id):
+                fresh = []
+                fresh_occurrences = []
+                hashes = [chunk_content_hash(chunk.text) for chunk in batch]
+                for chunk, content_hash, occurrence in zip(batch, hashes, _number_occurrences(hashes, counts)):
+                    key = (content_hash, occurrence)
+                    seen.add(key)
+
+                    row = manifest.get(key)
+                    if row is None:
+                        fresh.append(chunk)
+                        fresh_occurrences.append(occurrence)
+                        continue
+
+                    position = _chunk_position(chunk)
+                    if position != row.position and self.vector_db_service.update_metadata(row.vector_id, position, namespace=namespace):
+                        row.position = position
+                        moved += 1
+
+                if fresh:
+                    vectors = self._embed_batch([c.text for c in fresh], source_type=source_type)
+                    documents = self._build_documents(chunks=fresh, vectors=vectors, user_id=user_id, source_id=source_id, source_type=source_type, occurrences=fresh_occurrences)
+                    self.vector_db_service.ingest_documents(documents=documents, namespace=namespace)
+                    added.update(self._manifest_entries(documents))
+
+                progress("embedding", len(seen), 0)
+
+        except Exception:
+            # Drop what this run upserted; the manifest still describes the previous version
+            self.db.rollback()
+            if added:
+                self.vector_db_service.delete_ids([vector_id for vector_id, _ in added.values()], namespace=namespace)
+            raise
+
+        vanished = [row for key, row in manifest.items() if key not in seen]
+        removed = 0
+        if vanished and self.vector_db_service.delete_ids([row.vector_id for row in vanished], namespace=namespace):
+            # Rows are only dropped once their vectors are gone, so a failed delete is retried next update
+            for row in vanished:
+                self.db.delete(row)
+            removed = len(vanished)
+
+        self._add_manifest(user_id=user_id, source_id=source_id, entries=added)
+        self.db.commit()
+
+        if added or removed or moved:
+            self.invalidate_answers(user_id=user_id, source_id=source_id)
+        progress("upserted", len(seen), len(seen))
+
+        return {
+            "status": "success",
+            "mode": "update",
+            "total_count": len(seen),
+            "reused": len(seen) - len(added),
+            "added": len(added),
+            "removed": removed,
+        }
+
+    def _chunk_batches(self, chunks, source_id: str):
+        """Groups chunker output into Chunk lists of EMBEDDING_BATCH_SIZE."""
+        while True:
+            batch = [
+                Chunk(video_id=source_id, text=c["text"], start=c["start"], end=c["end"], page=c.get("page"), page_end=c.get("page_end"))
+                for c in islice(chunks, EMBEDDING_BATCH_SIZE)
+            ]
+            if not batch:
+                return
+            yield batch
+
+    def _embed_documents(self, chunk_batches, user_id: str, source_id: str, source_type: str, manifest: dict, progress=_no_progress, total: int = 0):
+        """
+        Embeds chunk batches one at a time and yields their documents, recording
+        each in `manifest`. Fed to ingest_stream, so uploading one batch
+        overlaps with embedding the next.
+        """
+        embedded = 0
+        counts = Counter()
+        for batch in chunk_batches:
+            vectors = self._embed_batch([c.text for c in batch], source_type=source_type)
+            occurrences = _number_occurrences([chunk_content_hash(c.text) for c in batch], counts)
+            documents = self._build_documents(chunks=batch, vectors=vectors, user_id=user_id, source_id=source_id, source_type=source_type, occurrences=occurrences)
+            manifest.update(self._manifest_entries(documents))
+            embedded += len(batch)
+            progress("embedding", embedded, total)
+            yield documents
+
+    def _embed_batch(self, texts: list[str], source_type: str) -> list[list[float]]:
+        started = time.perf_counter()
+        vectors = reduce_vectors(self.embedding_service.embed_texts(texts))
+        INGESTION_EMBEDDING_SECONDS.inc(time.perf_counter() - started, source_type=source_type)
+        INGESTION_CHUNKS.inc(len(texts), source_type=source_type)
+        return vectors
+
+    def _embed_texts(self, texts: list[str], source_type: str, progress=_no_progress) -> list[list[float]]:
+        vectors = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            vectors.extend(self._embed_batch(texts[start:start + EMBEDDING_BATCH_SIZE], source_type=source_type))
+            progress("embedding", len(vectors), len(texts))
+        return vectors
+
+    def _build_documents(self, chunks, vectors, user_id: str, source_id: str, source_type: str, occurrences: list[int] = None) -> list[dict]:
+        """`occurrences` numbers repeated texts across batches of one source; by default they are counted within `chunks`."""
+        hashes = [chunk_content_hash(chunk_model.text) for chunk_model in chunks]
+        if occurrences is None:
+            occurrences = _number_occurrences(hashes, Counter())
+
+        documents = []
+        for chunk_model, vector_data, content_hash, occurrence in zip(chunks, vectors, hashes, occurrences):
+            chunk_dict = chunk_model.model_dump(exclude_none=True)
+            # Ids follow the content, so an updated source keeps the ids of its unchanged chunks;
+            # repeated texts get one vector each
+            chunk_dict["id"] = chunk_vector_id(source_id, content_hash, occurrence)
+            chunk_dict["content_hash"] = content_hash
+            chunk_dict["occurrence"] = occurrence
+            chunk_dict["vector"] = vector_data
+            chunk_dict["metadata"] = {
+                "user_id": user_id,
+                "source": source_id,
+                "source_type": source_type,
+                "start": chunk_model.start,
+                "end": chunk_model.end
+            }
+            # Pinecone rejects null metadata values, so page fields are only set for PDFs
+            if chunk_model.page is not None:
+                chunk_dict["metadata"]["page"] = chunk_model.page
+                chunk_dict["metadata"]["page_end"] = chunk_model.page_end
+            documents.append(chunk_dict)
+        return documents
+
+    def process_videos(self, video_ids: list[str], user_id: str, max_chars: int = 2000, overlap_chars: int = 300, concurrency: int = BULK_FETCH_CONCURRENCY, progress=_no_progress):
+        """
+        Bulk variant of process_video. Transcripts are fetched concurrently, then all
+        chunks go through one shared embedding pass. A failing video is reported in
+        its own result entry without aborting the rest of the batch.
+        """
+        results = {}
+        normalized = []
+        for value in video_ids:
+            try:
+                normalized.append(transcript_service.extract_video_id(value))
+            except ValueError as e:
+                results[value] = {"video_id": value, "status": "Failed", "message": str(e)}
+        video_ids = list(dict.fromkeys(normalized))
+        results.update({video_id: {"video_id": video_id, "status": "pending"} for video_id in video_ids})
+
+        existing = {
+            row.source_id for row in self.db.query(IngestionSource.source_id).filter(
+                IngestionSource.user_id == user_id,
+                IngestionSource.source_id.in_(video_ids)
+            ).all()
+        } if video_ids else set()
+
+        to_fetch = []
+        for video_id in video_ids:
+            if video_id in existing:
+                results[video_id].update(status="Failed", message="Source already exist.")
+            else:
+                to_fetch.append(video_id)
+
+        # 1. Concurrent transcript fetch
+        def fetch(video_id: str):
+            try:
+                return video_id, self.transcript_service.get_transcript(video_id=video_id), None
+            except HTTPException as e:
+                return video_id, None, str(e.detail)
+            except Exception as e:
+                return video_id, None, str(e)
+
+        transcripts = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(to_fetch) or 1))) as pool:
+            for done, (video_id, transcript, error) in enumerate(pool.map(fetch, to_fetch), start=1):
+                if error:
+                    results[video_id].update(status="Failed", message=error)
+                else:
+                    transcripts[video_id] = transcript
+                progress("fetched", done, len(to_fetch))
+
+        # 2. Chunking, per video
+        chunks_by_video = {}
+        for video_id, transcript in transcripts.items():
+            segments = [{"text": s.text, "start": s.start, "duration": s.duration} for s in transcript.snippets]
+            try:
+                chunks = self.chunk_service.get_chunks(segments=segments, source_id=video_id, max_chars=max_chars, overlap_chars=overlap_chars).chunk
+            except HTTPException as e:
+                results[video_id].update(status="Failed", message=str(e.detail))
+                continue
+            if not chunks:
+                results[video_id].update(status="success", total_count=0, message="No chunks generated.")
+                continue
+            chunks_by_video[video_id] = chunks
+        progress("chunked", sum(len(c) for c in chunks_by_video.values()), sum(len(c) for c in chunks_by_video.values()))
+
+        # 3. One embedding pass across all videos
+        all_texts = [c.text for chunks in chunks_by_video.values() for c in chunks]
+        try:
+            all_vectors = self._embed_texts(all_texts, source_type="video", progress=progress)
+        except Exception as e:
+            for video_id in chunks_by_video:
+                results[video_id].update(status="Failed", message=f"Embedding failed: {e}")
+            chunks_by_video = {}
+
+        # 4. Upsert and register, per video
+        offset = 0
+        upserted = 0
+        for video_id, chunks in chunks_by_video.items():
+            vectors = all_vectors[offset:offset + len(chunks)]
+            offset += len(chunks)
+
+            try:
+                documents = self._build_documents(chunks=chunks, vectors=vectors, user_id=user_id, source_id=video_id, source_type="video")
+                response = self.vector_db_service.ingest_documents(documents=documents, namespace=f"user_{user_id}")
+                self.invalidate_answers(user_id=user_id, source_id=video_id)
+                self._add_manifest(user_id=user_id, source_id=video_id, entries=self._manifest_entries(documents))
+                self.register_source(user_id=user_id, source_id=video_id, source_type="video", display_name=transcripts[video_id].title)
+                results[video_id].update(response)
+            except HTTPException as e:
+                self.db.rollback()
+                results[video_id].update(status="Failed", message=str(e.detail))
+            except Exception as e:
+                self.db.rollback()
+                results[video_id].update(status="Failed", message=str(e))
+
+            upserted += len(chunks)
+            progress("upserted", upserted, len(all_texts))
+
+        succeeded = sum(1 for r in results.values() if r["status"] == "success")
+        failed = len(results) - succeeded
+        return {
+            "status": "success" if not failed else "partial" if succeeded else "Failed",
+            "message": f"Ingested {succeeded} of {len(results)} videos.",
+            "succeeded": succeeded,
+            "failed": failed,
+            "videos": list(results.values())
+        }
+
 def get_ingestion_service(
-        transcript_service: transcript_service.TranscriptService = Depends(transcript_service.get_transcript_service),
-        chunk_service: chunk_service.ChunkService = Depends(chunk_service.get_chunk_service),
-        embedding_service: embedding_service.EmbeddingService = Depends(embedding_service.get_embedding_service),
-        vector_db_service: vector_db.VectorDBService = Depends(vector_db.get_vector_db_service),
+        container: ServiceContainer = Depends(get_container),
         db: Session = Depends(get_db)
 ):
-    global _ingestion_service_instance
-    if not _ingestion_service_instance:
-        _ingestion_service_instance = IngestionService(transcript_service=transcript_service, chunk_service=chunk_service, embedding_service=embedding_service,vector_db_service=vector_db_service, db=db)
-    
-    return _ingestion_service_instance
+    # A new service per request: the Session is this request's unit of work and must not be shared
+    return IngestionService(transcript_service=container.transcript_service, chunk_service=container.chunk_service, embedding_service=container.embedding_service, vector_db_service=container.vector_db_service, db=db)
@@ -1,21 +1,51 @@
-from dotenv import load_dotenv
-from google import genai
+import time
+from app.core import readiness
+from app.core.context_packer import estimate_tokens
+from app.core.metrics import LLM_SECONDS, LLM_PROMPT_TOKENS, LLM_RESPONSE_TOKENS, sample_debug
 
 _llm_service_instance = None
 
 class LLMService:
-    def __init__(self):
-        self.client = genai.Client()
+    def __init__(self, client=None):
+        if client is None:
+            from google import genai
 
-    def generate_response(self, question:str, context_chunks:list, history:list):
-        try:
-            context_text = "\n\n".join(c['text'] for c in context_chunks)
+            client = genai.Client()
+        self.client = client
 
-            formatted_history = "\n".join([f"{msg.role.capitalize()}: {msg.content}" for msg in history])
+    def format_chunk(self, chunk: dict) -> str:
+        """Prefixes a chunk with the source and page/timestamp the LLM should cite."""
+        metadata = chunk.get("metadata") or {}
+        if "source" not in metadata:
+            return chunk['text']
 
-            prompt = f"""
-            You are an Assistant. You help users analyze their uploaded videos and PDFs.
+        if metadata.get("page") is not None:
+            pages = metadata["page"] if metadata.get("page_end", metadata["page"]) == metadata["page"] else f"{metadata['page']}-{metadata['page_end']}"
+            location = f"Page {pages}"
+        elif metadata.get("start") is not None:
+            minutes, seconds = divmod(int(metadata["start"]), 60)
+            location = f"{minutes}:{seconds:02d}"
+        else:
+            return f"[{metadata['source']}]\n{chunk['text']}"
+
+        return f"[{metadata['source']}, {location}]\n{chunk['text']}"
+
+    def format_history(self, history: list) -> str:
+        return "\n".join([f"{msg.role.capitalize()}: {msg.content}" for msg in history])
+
+    def build_prompt(self, question:str, context_chunks:list, history:list, summary: str = None) -> str:
+        context_text = "\n\n".join(self.format_chunk(c) for c in context_chunks)
 
+        formatted_history = self.format_history(history)
+
+        summary_section = f"""
+            CONVERSATION SUMMARY (earlier messages):
+            {summary}
+            """ if summary else ""
+
+        prompt = f"""
+            You are an Assistant. You help users analyze their uploaded videos and PDFs.
+            {summary_section}
             CONVERSATION HISTORY:
             {formatted_history if formatted_history else "No previous history."}
 
@@ -35,22 +65,111 @@ class LLMService:
             {question}
             """
 
+        if sample_debug():
+            print(
+                f"Prompt tokens (est.): total={estimate_tokens(prompt)} summary={estimate_tokens(summary) if summary else 0} "
+                f"history={estimate_tokens(formatted_history)} ({len(history)} messages) context={estimate_tokens(context_text)}"
+            )
+        return prompt
+
+    def log_usage(self, response, operation: str):
+        """Records the prompt/answer token counts Gemini reports, when it reports them."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None or usage.prompt_token_count is None:
+            return
+        LLM_PROMPT_TOKENS.observe(usage.prompt_token_count, operation=operation)
+        if usage.candidates_token_count is not None:
+            LLM_RESPONSE_TOKENS.observe(usage.candidates_token_count, operation=operation)
+        if sample_debug():
+            print(f"Prompt tokens (reported): prompt={usage.prompt_token_count} answer={usage.candidates_token_count}")
+
+    def summarize_conversation(self, previous_summary: str, messages: list) -> str:
+        """Folds `messages` into `previous_summary`, returning the new summary text."""
+        prompt = f"""
+            You maintain a running summary of a conversation between a user and an assistant
+            about the user's uploaded videos and PDFs.
+
+            CURRENT SUMMARY:
+            {previous_summary if previous_summary else "None yet."}
+
+            NEW MESSAGES:
+            {self.format_history(messages)}
+
+            INSTRUCTIONS:
+            Rewrite the summary so it also covers the new messages. Keep the user's goals, the
+            questions asked, key facts and conclusions, and any sources cited. Drop small talk.
+            Use at most 200 words of plain prose and return only the summary.
+            """
+
+        with LLM_SECONDS.time(operation="summarize"):
             response = self.client.models.generate_content(
                 model='gemini-2.5-flash',
                 contents=prompt
             )
+        self.log_usage(response, operation="summarize")
 
-            print(f"response: {response}")
+        return (response.text or "").strip()
+
+    def generate_response(self, question:str, context_chunks:list, history:list, summary: str = None):
+        try:
+            prompt = self.build_prompt(question=question, context_chunks=context_chunks, history=history, summary=summary)
+
+            with LLM_SECONDS.time(operation="generate"):
+                response = self.client.models.generate_content(
+                    model='gemini-2.5-flash',
+                    contents=prompt
+                )
+
+            if sample_debug():
+                print(f"response: {response}")
+            self.log_usage(response, operation="generate")
+
+            return response.text
+        
+        except Exception as e:
+            print(f"Error in generating response: {e}")
+            return None
+
+    async def agenerate_response(self, question:str, context_chunks:list, history:list, summary: str = None):
+        try:
+            prompt = self.build_prompt(question=question, context_chunks=context_chunks, history=history, summary=summary)
+
+            with LLM_SECONDS.time(operation="generate"):
+                response = await self.client.aio.models.generate_content(
+                    model='gemini-2.5-flash',
+                    contents=prompt
+                )
+            self.log_usage(response, operation="generate")
 
             return response.text
         
         except Exception as e:
             print(f"Error in generating response: {e}")
             return None
+
+    def stream_response(self, question:str, context_chunks:list, history:list, summary: str = None):
+        """Yields the answer text piece by piece as Gemini produces it."""
+        prompt = self.build_prompt(question=question, context_chunks=context_chunks, history=history, summary=summary)
+
+        started = time.perf_counter()
+        last = None
+        for chunk in self.client.models.generate_content_stream(
+            model='gemini-2.5-flash',
+            contents=prompt
+        ):
+            last = chunk
+            if chunk.text:
+                yield chunk.text
+
+        # Usage is reported on the final chunk
+        LLM_SECONDS.observe(time.perf_counter() - started, operation="stream")
+        if last is not None:
+            self.log_usage(last, operation="stream")
     
 def get_llm_service():
     global _llm_service_instance
     if not _llm_service_instance:
         _llm_service_instance = LLMService()
+        readiness.mark_ready("llm")
 
     return _llm_service_instance
\ No newline at end of file
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import re
+import threading
+from typing import Iterable, List, Dict, Any, Union
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from app.core.vector_index import NamespaceIndex
+from app.core.metrics import VECTOR_QUERY_SECONDS
+
+load_dotenv()
+
+# --- Configuration ---
+LOCAL_VECTOR_DB_PATH = os.environ.get("LOCAL_VECTOR_DB_PATH", "vector_store")
+# Namespaces with at least this many vectors are searched through the IVF index
+LOCAL_VECTOR_DB_ANN_THRESHOLD = int(os.environ.get("LOCAL_VECTOR_DB_ANN_THRESHOLD", "20000"))
+LOCAL_VECTOR_DB_NPROBE = int(os.environ.get("LOCAL_VECTOR_DB_NPROBE", "8"))
+# "float32", "float16" or "int8" storage for new namespaces; existing ones keep theirs
+LOCAL_VECTOR_DB_DTYPE = os.environ.get("LOCAL_VECTOR_DB_DTYPE", "float32").lower()
+
+
+class LocalVectorDBService:
+    """
+    In-process drop-in for VectorDBService. Each namespace (user_{id}) is a
+    memory-mapped matrix on local disk, searched by brute force when small and
+    through an approximate IVF index when large.
+    """
+    def __init__(self, path: str = LOCAL_VECTOR_DB_PATH, ann_threshold: int = LOCAL_VECTOR_DB_ANN_THRESHOLD, nprobe: int = LOCAL_VECTOR_DB_NPROBE, dtype: str = LOCAL_VECTOR_DB_DTYPE):
+        self.path = path
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        self.dtype = dtype
+        self.namespace = "default"
+        self._namespaces: Dict[str, NamespaceIndex] = {}
+        self._lock = threading.Lock()
+
+    def _get_namespace(self, namespace: str) -> NamespaceIndex:
+        namespace = namespace or self.namespace
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is None:
+                # Namespaces become directory names; keep them filesystem-safe.
+                dirname = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace)
+                index = NamespaceIndex(
+                    path=os.path.join(self.path, dirname),
+                    ann_threshold=self.ann_threshold,
+                    nprobe=self.nprobe,
+                    dtype=self.dtype
+                )
+                self._namespaces[namespace] = index
+            return index
+
+    def ingest_documents(self, documents: List[Dict[str, Any]], namespace: str) -> Dict[str, Union[str, int]]:
+        """
+        Stores processed documents in the namespace's local index, returning status and count.
+        """
+        if not documents:
+            return {"status": "success", "total_count": 0}
+
+        ids = []
+        metadata = []
+        for i, doc in enumerate(documents):
+            source_id = doc['metadata'].get("source", "unknown")
+            ids.append(doc.get("id") or f"{source_id}-{i}")
+            metadata.append({"text": doc['text'], **doc['metadata']})
+
+        try:
+            total_count = self._get_namespace(namespace).upsert(
+                ids=ids,
+                vectors=[doc['vector'] for doc in documents],
+                metadata=metadata
+            )
+        except Exception as e:
+            print(f"Local Index Upsert Error: {e}")
+            raise HTTPException(status_code=500, detail=f"Local index upsert failed: {str(e)}")
+
+        return {
+            "status": "success",
+            "total_count": total_count
+        }
+
+    def ingest_stream(self, document_batches: Iterable[List[Dict[str, Any]]], namespace: str) -> Dict[str, Union[str, int]]:
+        """Writes are local and cheap, so batches are simply stored as they arrive."""
+        total_count = 0
+        for documents in document_batches:
+            total_count += self.ingest_documents(documents, namespace=namespace)["total_count"]
+
+        return {
+            "status": "success",
+            "total_count": total_count
+        }
+
+    def query_documents(self, query_vector: List[float], filter: dict, top_k: int = 5, source_id: str = None, namespace: str = None) -> List[Dict[str, Any]]:
+        """
+        Performs a similarity search using the query vector to retrieve relevant chunks (Retrieval step).
+        """
+        try:
+            with VECTOR_QUERY_SECONDS.time(backend="local"):
+                matches = self._get_namespace(namespace).query(vector=query_vector, top_k=top_k, filter=filter)
+        except Exception as e:
+            print(f"Local Index Query Error: {e}")
+            raise HTTPException(status_code=500, detail=f"Local index query failed: {str(e)}")
+
+        retrieved_documents = []
+        for match in matches:
+            metadata = match["metadata"]
+            text_content = metadata.pop("text")
+            retrieved_documents.append({
+                "text": text_content,
+                "metadata": metadata,
+                "score": match["score"]
+            })
+
+        return retrieved_documents
+
+    async def aquery_documents(self, query_vector: List[float], filter: dict, top_k: int = 5, source_id: str = None, namespace: str = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.query_documents, query_vector, filter=filter, top_k=top_k, namespace=namespace)
+
+    async def aclose(self):
+        pass
+
+    def delete_by_user(self, user_id: str):
+        try:
+            self._get_namespace(f"user_{user_id}").delete(delete_all=True)
+            return True
+        except Exception as e:
+            print(f"Error deleting from local index: {e}")
+            return False
+
+    def delete_by_source(self, user_id: str, source_id: str):
+        """
+        Removes all vectors associated with a specific file or video
+        for a specific user.
+        """
+        try:
+            self._get_namespace(f"user_{user_id}").delete(filter={"source": {"$eq": source_id}})
+            return True
+        except Exception as e:
+            print(f"Error deleting from local index: {e}")
+            return False
+
+    def delete_ids(self, ids: List[str], namespace: str):
+        """Removes the given vector ids from a namespace."""
+        try:
+            self._get_namespace(namespace).delete(ids=ids)
+            return True
+        except Exception as e:
+            print(f"Error deleting from local index: {e}")
+            return False
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any], namespace: str):
+        try:
+            self._get_namespace(namespace).update_metadata(vector_id, metadata)
+            return True
+        except Exception as e:
+            print(f"Error updating local index metadata: {e}")
+            return False
@@ -0,0 +1,74 @@
+import json
+import os
+from typing import List, Dict
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from app.services.transcript_service import extract_video_id
+
+load_dotenv()
+
+# --- Configuration ---
+# "youtube" (default) resolves through pytube; "local" reads PLAYLIST_FIXTURES_PATH instead
+PLAYLIST_RESOLVER = os.environ.get("PLAYLIST_RESOLVER", "youtube").lower()
+PLAYLIST_FIXTURES_PATH = os.environ.get("PLAYLIST_FIXTURES_PATH", "playlists.json")
+
+_playlist_resolver_instance = None
+
+class YouTubePlaylistResolver:
+    """Expands playlists and channels into video ids by scraping YouTube through pytube."""
+
+    def resolve_playlist(self, playlist_id: str) -> List[str]:
+        from pytube import Playlist
+
+        try:
+            playlist = Playlist(f"https://www.youtube.com/playlist?list={playlist_id}")
+            return [extract_video_id(url) for url in playlist.video_urls]
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to resolve playlist {playlist_id}: {str(e)}")
+
+    def resolve_channel(self, channel_url: str) -> List[str]:
+        from pytube import Channel
+
+        try:
+            channel = Channel(channel_url)
+            return [extract_video_id(url) for url in channel.video_urls]
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to resolve channel {channel_url}: {str(e)}")
+
+class LocalPlaylistResolver:
+    """
+    Stand-in resolver for offline environments. Reads a JSON file shaped like
+    {"playlists": {"<playlist_id>": [...]}, "channels": {"<channel_url>": [...]}}.
+    """
+    def __init__(self, path: str = PLAYLIST_FIXTURES_PATH):
+        self.path = path
+
+    def _load(self) -> Dict[str, Dict[str, List[str]]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise HTTPException(status_code=500, detail=f"Failed to read playlist fixtures {self.path}: {str(e)}")
+
+    def _lookup(self, kind: str, key: str) -> List[str]:
+        video_ids = self._load().get(kind, {}).get(key)
+        if video_ids is None:
+            raise HTTPException(status_code=404, detail=f"Unknown {kind[:-1]}: {key}")
+        return [extract_video_id(v) for v in video_ids]
+
+    def resolve_playlist(self, playlist_id: str) -> List[str]:
+        return self._lookup("playlists", playlist_id)
+
+    def resolve_channel(self, channel_url: str) -> List[str]:
+        return self._lookup("channels", channel_url)
+
+def get_playlist_resolver():
+    global _playlist_resolver_instance
+    if not _playlist_resolver_instance:
+        if PLAYLIST_RESOLVER == "local":
+            _playlist_resolver_instance = LocalPlaylistResolver()
+        else:
+            _playlist_resolver_instance = YouTubePlaylistResolver()
+
+    return _playlist_resolver_instance
@@ -1,35 +1,103 @@
+import asyncio
+import os
+import time
 from fastapi import Depends
 from app.services import vector_db, embedding_service, llm_service, session_service
+from app.core.answer_cache import get_answer_cache
+from app.core.context_packer import pack_context, estimate_tokens
+from app.core.metrics import sample_debug
+from app.core.vector_compression import reduce_vectors
+from app.core.database import get_db, get_async_db
+from app.services.container import ServiceContainer, get_container
+from app.services.summary_service import get_summary_service
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Approximate token budget for the retrieved context placed in the prompt
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "3000"))
+# Chunks of one source separated by at most this many seconds are merged
+CONTEXT_MERGE_GAP_SECONDS = float(os.environ.get("CONTEXT_MERGE_GAP_SECONDS", "0"))
 class QueryService:
     def __init__(self, embedding_service: embedding_service.EmbeddingService, vector_db_service: vector_db.VectorDBService, llm_service:llm_service.LLMService, session_service:session_service.SessionService):
         self.embedding_service = embedding_service
         self.vector_db_service = vector_db_service
         self.llm_service = llm_service
+        # Either SessionService (sync methods) or AsyncSessionService (for the a* methods)
         self.session_service = session_service
 
-    def retrieve_context(self, user_id: str, question: str, top_k: int=5, source_id: str=None):
+    def embed_question(self, question: str):
+        try:
+            return self.embedding_service.embed_texts([question])[0]
+        except Exception as e:
+            print(f"Error embedding question: {e}")
+            return None
+
+    async def aembed_question(self, question: str):
         try:
-            print(f"Embedding query: {question}")
-            query_vector = self.embedding_service.embed_texts([question])[0]
+            return (await self.embedding_service.aembed_texts([question]))[0]
+        except Exception as e:
+            print(f"Error embedding question: {e}")
+            return None
+
+    def retrieve_context(self, user_id: str, question: str, top_k: int=5, source_id: str=None, query_vector: list=None):
+        try:
+            if query_vector is None:
+                query_vector = self.embedding_service.embed_texts([question])[0]
             if not query_vector:
                 raise ValueError("Embedding service returned no data")
 
             metadata_filter = {"user_id": user_id}
             if source_id:
-                metadata_filter["source_id"] = source_id
-            print(f"retrieving documents:{query_vector}")
-            result = self.vector_db_service.query_documents(query_vector, top_k=top_k, filter=metadata_filter, namespace=f"user_{user_id}")
-            
-            print(f"result: {result}")
+                metadata_filter["source"] = source_id
+            # The answer cache keys on the full question vector; only the index search is reduced
+            result = self.vector_db_service.query_documents(reduce_vectors([query_vector])[0], top_k=top_k, filter=metadata_filter, namespace=f"user_{user_id}")
+
+            if sample_debug():
+                print(f"Retrieved for {question!r}: {result}")
             return result
         
         except Exception as e:
             print(f"Error in Retrieval Pipeline: {e}")
             return []
         
-    def generate_response(self, question: str, context_chunks:list, history:list):
+    async def aretrieve_context(self, user_id: str, question: str, top_k: int=5, source_id: str=None, query_vector: list=None):
+        try:
+            if query_vector is None:
+                query_vector = (await self.embedding_service.aembed_texts([question]))[0]
+            if not query_vector:
+                raise ValueError("Embedding service returned no data")
+
+            metadata_filter = {"user_id": user_id}
+            if source_id:
+                metadata_filter["source"] = source_id
+            return await self.vector_db_service.aquery_documents(reduce_vectors([query_vector])[0], top_k=top_k, filter=metadata_filter, namespace=f"user_{user_id}")
+        
+        except Exception as e:
+            print(f"Error in Retrieval Pipeline: {e}")
+            return []
+
+    def build_context(self, chunks: list):
+        """Merges overlapping chunks and fits them into CONTEXT_TOKEN_BUDGET."""
+        packed, stats = pack_context(chunks, token_budget=CONTEXT_TOKEN_BUDGET, max_gap=CONTEXT_MERGE_GAP_SECONDS)
+        if sample_debug():
+            print(f"Context packed: {stats['input_chunks']} -> {stats['packed_chunks']} chunks, {stats['tokens_saved']} tokens saved")
+        return packed, stats
+
+    def conversation_stats(self, context_stats: dict, summary: str, history: list):
+        """Adds what the conversation part of the prompt costs to the context stats."""
+        context_stats["history_messages"] = len(history)
+        context_stats["history_tokens"] = sum(estimate_tokens(msg.content) for msg in history)
+        context_stats["summary_tokens"] = estimate_tokens(summary) if summary else 0
+        return context_stats
+
+    def schedule_summary(self, user_id: str, session_id: str):
+        summaries = get_summary_service()
+        if summaries:
+            summaries.schedule(session_id=session_id, user_id=user_id)
+
+    def generate_response(self, question: str, context_chunks:list, history:list, summary: str = None):
         try:
-            response = self.llm_service.generate_response(question=question, context_chunks=context_chunks, history=history)
+            response = self.llm_service.generate_response(question=question, context_chunks=context_chunks, history=history, summary=summary)
             
             return response
         
@@ -37,44 +105,150 @@ class QueryService:
             print(f"Error in Retrieval Pipeline: {e}")
             return None
         
+    def save_exchange(self, user_id: str, session_id: str, question: str, answer: str, is_partial: bool = False):
+        try:
+            self.session_service.add_exchange(user_id=user_id, session_id=session_id, question=question, answer=answer, is_partial=is_partial)
+        except Exception as e:
+            print(f"Error saving chat history: {e}")
+            return
+        self.schedule_summary(user_id=user_id, session_id=session_id)
+
+    async def asave_exchange(self, user_id: str, session_id: str, question: str, answer: str):
+        try:
+            await self.session_service.add_exchange(user_id=user_id, session_id=session_id, question=question, answer=answer)
+        except Exception as e:
+            print(f"Error saving chat history: {e}")
+            return
+        self.schedule_summary(user_id=user_id, session_id=session_id)
+
     def query(self, question: str, user_id: str, session_id: str, top_k: int=5, source_id: str=None):
-        history = self.session_service.get_history(user_id=user_id, session_id=session_id, limit=5)
+        started = time.perf_counter()
+        summary, history = self.session_service.get_conversation(user_id=user_id, session_id=session_id)
+        query_vector = self.embed_question(question)
+
+        cache = get_answer_cache()
+        if cache and query_vector:
+            hit = cache.lookup(namespace=f"user_{user_id}", source_id=source_id, question_vector=query_vector, history=history)
+            if hit:
+                self.save_exchange(user_id=user_id, session_id=session_id, question=question, answer=hit["answer"])
+                return {"answer": hit["answer"], "sources": hit["sources"], "cached": True}
         
-        chunks = self.retrieve_context(user_id=user_id, question=question, top_k=top_k, source_id=source_id)
+        chunks = self.retrieve_context(user_id=user_id, question=question, top_k=top_k, source_id=source_id, query_vector=query_vector)
         
-        answer = self.generate_response(question=question, context_chunks=chunks, history=history)
+        context, context_stats = self.build_context(chunks)
+        self.conversation_stats(context_stats, summary, history)
+        answer = self.generate_response(question=question, context_chunks=context, history=history, summary=summary)
 
         if answer:
-            try:
-                self.session_service.add_message(
-                    user_id=user_id,
-                    session_id=session_id,
-                    role="user",
-                    content=question
-                )
-                
-                self.session_service.add_message(
-                    user_id=user_id,
-                    session_id=session_id,
-                    role="assistant",
-                    content=answer
-                )
-            
-            except Exception as e:
-                print(f"Error saving chat history: {e}")
+            self.save_exchange(user_id=user_id, session_id=session_id, question=question, answer=answer)
+            if cache and query_vector:
+                cache.store(namespace=f"user_{user_id}", source_id=source_id, question_vector=query_vector, history=history, answer=answer, sources=chunks, latency_seconds=time.perf_counter() - started)
 
         return {
             "answer": answer,
-            "sources": chunks
+            "sources": chunks,
+            "context": context_stats
         }
-        
-def get_query_service(embedding_service: embedding_service.EmbeddingService = Depends(embedding_service.get_embedding_service),
-                          vector_db_service: vector_db.VectorDBService = Depends(vector_db.get_vector_db_service),
-                          llm_service: llm_service.LLMService = Depends(llm_service.get_llm_service),
-                          session_service: session_service.SessionService = Depends(session_service.get_session_service)
-                          ):
-        return QueryService(embedding_service=embedding_service, vector_db_service=vector_db_service, llm_service=llm_service, session_service=session_service)
 
+    async def aquery(self, question: str, user_id: str, session_id: str, top_k: int=5, source_id: str=None):
+        """
+        Async variant of query(). History loading runs concurrently with
+        question embedding and then retrieval, which starts as soon as the
+        embedding is ready and is cancelled if the answer cache hits; nothing
+        here blocks the event loop.
+        """
+        started = time.perf_counter()
+        conversation = asyncio.ensure_future(self.session_service.get_conversation(user_id=user_id, session_id=session_id))
+        try:
+            query_vector = await self.aembed_question(question)
+        except BaseException:
+            conversation.cancel()
+            raise
+        retrieval = asyncio.ensure_future(self.aretrieve_context(user_id=user_id, question=question, top_k=top_k, source_id=source_id, query_vector=query_vector))
+
+        try:
+            summary, history = await conversation
+
+            cache = get_answer_cache()
+            if cache and query_vector:
+                hit = cache.lookup(namespace=f"user_{user_id}", source_id=source_id, question_vector=query_vector, history=history)
+                if hit:
+                    retrieval.cancel()
+                    await self.asave_exchange(user_id=user_id, session_id=session_id, question=question, answer=hit["answer"])
+                    return {"answer": hit["answer"], "sources": hit["sources"], "cached": True}
+        except BaseException:
+            retrieval.cancel()
+            raise
+
+        chunks = await retrieval
+
+        context, context_stats = self.build_context(chunks)
+        self.conversation_stats(context_stats, summary, history)
+        answer = await self.llm_service.agenerate_response(question=question, context_chunks=context, history=history, summary=summary)
+
+        if answer:
+            await self.asave_exchange(user_id=user_id, session_id=session_id, question=question, answer=answer)
+            if cache and query_vector:
+                cache.store(namespace=f"user_{user_id}", source_id=source_id, question_vector=query_vector, history=history, answer=answer, sources=chunks, latency_seconds=time.perf_counter() - started)
+
+        return {
+            "answer": answer,
+            "sources": chunks,
+            "context": context_stats
+        }
+
+    def stream_query(self, question: str, user_id: str, session_id: str, top_k: int=5, source_id: str=None):
+        """
+        Streaming variant of query(). Yields (event, data) pairs: one "sources"
+        event, then "token" events as the answer is generated, then "done" with
+        timings. The exchange is saved once the generator finishes; if it is
+        closed early (client disconnected) the partial answer is saved and flagged.
+        """
+        started = time.perf_counter()
+        summary, history = self.session_service.get_conversation(user_id=user_id, session_id=session_id)
+        chunks = self.retrieve_context(user_id=user_id, question=question, top_k=top_k, source_id=source_id)
+        retrieved = time.perf_counter()
+
+        context, context_stats = self.build_context(chunks)
+        self.conversation_stats(context_stats, summary, history)
+
+        yield "sources", {"sources": chunks, "context": context_stats}
+
+        parts = []
+        first_token = None
+        completed = False
+        try:
+            for text in self.llm_service.stream_response(question=question, context_chunks=context, history=history, summary=summary):
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(text)
+                yield "token", {"text": text}
+
+            completed = True
+            finished = time.perf_counter()
+            yield "done", {
+                "retrieval_ms": round((retrieved - started) * 1000, 1),
+                "time_to_first_token_ms": round(((first_token or finished) - started) * 1000, 1),
+                "generation_ms": round((finished - retrieved) * 1000, 1),
+                "total_ms": round((finished - started) * 1000, 1),
+                "token_events": len(parts)
+            }
+
+        except Exception as e:
+            print(f"Error in streaming response: {e}")
+            yield "error", {"detail": str(e)}
+
+        finally:
+            answer = "".join(parts)
+            if answer:
+                self.save_exchange(user_id=user_id, session_id=session_id, question=question, answer=answer, is_partial=not completed)
         
+def get_query_service(container: ServiceContainer = Depends(get_container),
+                          db: Session = Depends(get_db)
+                          ):
+        return QueryService(embedding_service=container.embedding_service, vector_db_service=container.vector_db_service, llm_service=container.llm_service, session_service=session_service.SessionService(db))
 
-        
\ No newline at end of file
+def get_async_query_service(container: ServiceContainer = Depends(get_container),
+                          db: AsyncSession = Depends(get_async_db)
+                          ):
+        return QueryService(embedding_service=container.embedding_service, vector_db_service=container.vector_db_service, llm_service=container.llm_service, session_service=session_service.AsyncSessionService(db))
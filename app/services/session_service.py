@@ -1,12 +1,98 @@
 # app/services/session_db.py
+import os
+import time
+from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import delete
-from app.schemas.session import ChatSession, ChatMessage
-from typing import List
-from app.core.database import get_db
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.session import ChatSession, ChatMessage, ChatSessionSummary
+from app.core.history_cache import HistoryMessage, get_history_cache, HISTORY_CACHE_MESSAGES
+from app.core.context_packer import estimate_tokens
+from app.core.metrics import HISTORY_LOAD_SECONDS
+from typing import List, Tuple, Optional
+from app.core.database import get_db, get_async_db
 from fastapi import Depends
 
+# Approximate token budget for the conversation part of the prompt (summary + recent messages)
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "1000"))
+
+def _session_upsert(dialect: str, session_id: str, user_id: str):
+    """INSERT ... ON CONFLICT DO NOTHING for the session row, or None if the dialect lacks it."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(ChatSession).values(id=session_id, user_id=user_id, created_at=datetime.now()).on_conflict_do_nothing(index_elements=["id"])
+
+def _new_messages(session_id: str, user_id: str, messages: List[Tuple[str, str, bool]]) -> List[ChatMessage]:
+    # One timestamp for the batch; ids keep the order among equal timestamps
+    now = datetime.now()
+    return [
+        ChatMessage(user_id=user_id, session_id=session_id, role=role, content=content, is_partial=is_partial, timestamp=now)
+        for role, content, is_partial in messages
+    ]
+
+def _history_query(session_id: str, user_id: str, window: int):
+    # Newest first so the index on (session_id, timestamp) serves the LIMIT; callers reverse
+    return select(ChatMessage)\
+        .filter(ChatMessage.user_id == user_id, ChatMessage.session_id == session_id)\
+        .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())\
+        .limit(window)
+
+def _summary_query(session_id: str, user_id: str):
+    return select(ChatSessionSummary).filter(ChatSessionSummary.session_id == session_id, ChatSessionSummary.user_id == user_id)
+
+def _version_query(session_id: str, user_id: str):
+    # Newest message id (through the same index as the history query) and summary coverage, in one round trip
+    latest = select(ChatMessage.id)\
+        .filter(ChatMessage.user_id == user_id, ChatMessage.session_id == session_id)\
+        .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())\
+        .limit(1)\
+        .scalar_subquery()
+    through = select(ChatSessionSummary.through_message_id)\
+        .filter(ChatSessionSummary.session_id == session_id, ChatSessionSummary.user_id == user_id)\
+        .scalar_subquery()
+    return select(latest, through)
+
+def _is_current(memory: Tuple[List[HistoryMessage], Optional[str], int], version) -> bool:
+    """Whether a cached entry still matches the database, which other worker processes also write to."""
+    messages, _, summary_through = memory
+    latest, through = version
+    return (messages[-1].id if messages else None) == latest and summary_through == (through or 0)
+
+def _memory_from_rows(rows, summary_row) -> Tuple[List[HistoryMessage], Optional[str], int]:
+    messages = [HistoryMessage.from_row(row) for row in reversed(rows)]
+    if summary_row is None:
+        return messages, None, 0
+    return messages, summary_row.summary, summary_row.through_message_id
+
+def _fit_conversation(messages: List[HistoryMessage], summary: Optional[str], summary_through: int, token_budget: int) -> List[HistoryMessage]:
+    """The newest messages not covered by the summary that fit in the budget left by the summary."""
+    used = estimate_tokens(summary) if summary else 0
+    recent = []
+    for message in reversed(messages):
+        if message.id is not None and message.id <= summary_through:
+            break
+        tokens = estimate_tokens(message.content)
+        if used + tokens > token_budget:
+            break
+        recent.append(message)
+        used += tokens
+    return recent[::-1]
+
+def _cache_written(session_id: str, user_id: str, snapshots: List[HistoryMessage], created: bool):
+    cache = get_history_cache()
+    if not cache:
+        return
+    if created:
+        # A brand-new session's history is exactly what was just written
+        cache.load(session_id, user_id, snapshots)
+    else:
+        cache.append(session_id, user_id, snapshots)
+
 class SessionService:
     def __init__(self, db: Session):
         self.db = db
@@ -26,29 +112,76 @@ class SessionService:
             print(f"Error in get_or_create_session: {e}")
             raise e
 
-    def add_message(self, session_id: str, user_id: str, role: str, content: str):
-        """Persists a single message to the cloud database."""
+    def _ensure_session(self, session_id: str, user_id: str) -> bool:
+        """Creates the session row inside the current transaction; returns True if it was new."""
+        statement = _session_upsert(self.db.get_bind().dialect.name, session_id, user_id)
+        if statement is not None:
+            return self.db.execute(statement).rowcount == 1
+
+        if self.db.query(ChatSession.id).filter(ChatSession.id == session_id).first():
+            return False
+        self.db.add(ChatSession(id=session_id, user_id=user_id))
+        self.db.flush()
+        return True
+
+    def add_messages(self, session_id: str, user_id: str, messages: List[Tuple[str, str, bool]]):
+        """Persists (role, content, is_partial) messages and the session row in one transaction."""
+        rows = _new_messages(session_id, user_id, messages)
         try:
-            # Step 1: Ensure session exists
-            self.get_or_create_session(user_id=user_id, session_id = session_id)
-            
-            # Step 2: Add message
-            message = ChatMessage(user_id=user_id, session_id=session_id, role=role, content=content)
-            self.db.add(message)
+            created = self._ensure_session(session_id=session_id, user_id=user_id)
+            self.db.add_all(rows)
+            # Flush first so the cached copies get their ids without a reload after commit
+            self.db.flush()
+            snapshots = [HistoryMessage.from_row(row) for row in rows]
             self.db.commit()
         except SQLAlchemyError as e:
             self.db.rollback()
-            print(f"Error adding message to session {session_id}: {e}")
+            print(f"Error adding messages to session {session_id}: {e}")
             raise e
 
-    def get_history(self, session_id: str, user_id: str, limit: int = 10) -> List[ChatMessage]:
-        """Retrieves the last X messages. No try/catch needed for simple reads."""
-        return self.db.query(ChatMessage)\
-            .filter( ChatMessage.user_id == user_id, ChatMessage.session_id == session_id)\
-            .order_by(ChatMessage.timestamp.asc())\
-            .limit(limit)\
-            .all()
-    
+        _cache_written(session_id, user_id, snapshots, created)
+
+    def add_message(self, session_id: str, user_id: str, role: str, content: str, is_partial: bool = False):
+        """Persists a single message to the cloud database."""
+        self.add_messages(session_id=session_id, user_id=user_id, messages=[(role, content, is_partial)])
+
+    def add_exchange(self, session_id: str, user_id: str, question: str, answer: str, is_partial: bool = False):
+        """Persists a question and its answer together."""
+        self.add_messages(session_id=session_id, user_id=user_id, messages=[("user", question, False), ("assistant", answer, is_partial)])
+
+    def _memory(self, session_id: str, user_id: str, limit: int = 0):
+        """(recent messages, summary, summary_through) from the history cache once it is checked against the database, or the database itself."""
+        started = time.perf_counter()
+        cache = get_history_cache()
+        if cache:
+            memory = cache.get_memory(session_id=session_id, user_id=user_id, limit=limit)
+            if memory is not None:
+                if _is_current(memory, self.db.execute(_version_query(session_id, user_id)).one()):
+                    HISTORY_LOAD_SECONDS.observe(time.perf_counter() - started, source="cache")
+                    return memory
+                # Written to or deleted through another worker process
+                cache.invalidate(session_id)
+
+        window = max(limit, cache.messages_per_session if cache else HISTORY_CACHE_MESSAGES)
+        rows = self.db.execute(_history_query(session_id, user_id, window)).scalars().all()
+        summary_row = self.db.execute(_summary_query(session_id, user_id)).scalars().first()
+        memory = _memory_from_rows(rows, summary_row)
+
+        if cache:
+            cache.load(session_id, user_id, *memory)
+        HISTORY_LOAD_SECONDS.observe(time.perf_counter() - started, source="database")
+        return memory
+
+    def get_history(self, session_id: str, user_id: str, limit: int = 10) -> List[HistoryMessage]:
+        """Retrieves the last X messages, oldest first, from the history cache when possible."""
+        messages = self._memory(session_id, user_id, limit)[0]
+        return messages[-limit:] if limit else []
+
+    def get_conversation(self, session_id: str, user_id: str, token_budget: int = HISTORY_TOKEN_BUDGET) -> Tuple[Optional[str], List[HistoryMessage]]:
+        """The session's rolling summary and the recent messages it doesn't cover, within `token_budget`."""
+        messages, summary, summary_through = self._memory(session_id, user_id)
+        return summary, _fit_conversation(messages, summary, summary_through, token_budget)
+
     def delete_session(self, session_id: str):#, user_id: str):
         """Wipes a session and all its messages using cascading deletes."""
         try:
@@ -66,6 +199,94 @@ class SessionService:
             self.db.rollback()
             print(f"Error deleting session {session_id}: {e}")
             raise e
+        finally:
+            cache = get_history_cache()
+            if cache:
+                cache.invalidate(session_id)
+
+class AsyncSessionService:
+    """The read/write subset of SessionService used by the async query path."""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_or_create_session(self, session_id: str, user_id: str) -> ChatSession:
+        try:
+            result = await self.db.execute(select(ChatSession).filter(ChatSession.user_id == user_id, ChatSession.id == session_id))
+            session = result.scalars().first()
+            if not session:
+                session = ChatSession(id=session_id, user_id=user_id)
+                self.db.add(session)
+                await self.db.commit()
+            return session
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            print(f"Error in get_or_create_session: {e}")
+            raise e
+
+    async def _ensure_session(self, session_id: str, user_id: str) -> bool:
+        statement = _session_upsert(self.db.get_bind().dialect.name, session_id, user_id)
+        if statement is not None:
+            return (await self.db.execute(statement)).rowcount == 1
+
+        result = await self.db.execute(select(ChatSession.id).filter(ChatSession.id == session_id))
+        if result.first():
+            return False
+        self.db.add(ChatSession(id=session_id, user_id=user_id))
+        await self.db.flush()
+        return True
+
+    async def add_messages(self, session_id: str, user_id: str, messages: List[Tuple[str, str, bool]]):
+        rows = _new_messages(session_id, user_id, messages)
+        try:
+            created = await self._ensure_session(session_id=session_id, user_id=user_id)
+            self.db.add_all(rows)
+            await self.db.flush()
+            snapshots = [HistoryMessage.from_row(row) for row in rows]
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            print(f"Error adding messages to session {session_id}: {e}")
+            raise e
+
+        _cache_written(session_id, user_id, snapshots, created)
+
+    async def add_message(self, session_id: str, user_id: str, role: str, content: str, is_partial: bool = False):
+        await self.add_messages(session_id=session_id, user_id=user_id, messages=[(role, content, is_partial)])
+
+    async def add_exchange(self, session_id: str, user_id: str, question: str, answer: str, is_partial: bool = False):
+        await self.add_messages(session_id=session_id, user_id=user_id, messages=[("user", question, False), ("assistant", answer, is_partial)])
+
+    async def _memory(self, session_id: str, user_id: str, limit: int = 0):
+        started = time.perf_counter()
+        cache = get_history_cache()
+        if cache:
+            memory = cache.get_memory(session_id=session_id, user_id=user_id, limit=limit)
+            if memory is not None:
+                if _is_current(memory, (await self.db.execute(_version_query(session_id, user_id))).one()):
+                    HISTORY_LOAD_SECONDS.observe(time.perf_counter() - started, source="cache")
+                    return memory
+                cache.invalidate(session_id)
+
+        window = max(limit, cache.messages_per_session if cache else HISTORY_CACHE_MESSAGES)
+        rows = (await self.db.execute(_history_query(session_id, user_id, window))).scalars().all()
+        summary_row = (await self.db.execute(_summary_query(session_id, user_id))).scalars().first()
+        memory = _memory_from_rows(rows, summary_row)
+
+        if cache:
+            cache.load(session_id, user_id, *memory)
+        HISTORY_LOAD_SECONDS.observe(time.perf_counter() - started, source="database")
+        return memory
+
+    async def get_history(self, session_id: str, user_id: str, limit: int = 10) -> List[HistoryMessage]:
+        messages = (await self._memory(session_id, user_id, limit))[0]
+        return messages[-limit:] if limit else []
+
+    async def get_conversation(self, session_id: str, user_id: str, token_budget: int = HISTORY_TOKEN_BUDGET) -> Tuple[Optional[str], List[HistoryMessage]]:
+        messages, summary, summary_through = await self._memory(session_id, user_id)
+        return summary, _fit_conversation(messages, summary, summary_through, token_budget)
 
 def get_session_service(db: Session = Depends(get_db)) -> SessionService:
-    return SessionService(db)
\ No newline at end of file
+    return SessionService(db)
+
+def get_async_session_service(db: AsyncSession = Depends(get_async_db)) -> AsyncSessionService:
+    return AsyncSessionService(db)
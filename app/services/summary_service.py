@@ -0,0 +1,123 @@
+import os
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.database import SessionLocal
+from app.core.history_cache import get_history_cache
+from app.core.metrics import SUMMARY_REFRESHES, SUMMARY_FOLDED_MESSAGES, sample_debug
+from app.schemas.session import ChatMessage, ChatSessionSummary
+from app.services import llm_service
+
+# --- Configuration ---
+SUMMARY_ENABLED = os.environ.get("SUMMARY_ENABLED", "true").lower() == "true"
+# Summarize once at least this many messages are waiting to be folded in
+SUMMARY_REFRESH_EVERY = int(os.environ.get("SUMMARY_REFRESH_EVERY", "6"))
+# The newest messages always stay verbatim in the prompt, so they are never folded
+SUMMARY_KEEP_RECENT_MESSAGES = int(os.environ.get("SUMMARY_KEEP_RECENT_MESSAGES", "4"))
+# Upper bound on messages sent to the LLM per refresh; older backlogs are folded over several passes
+SUMMARY_MAX_FOLD_MESSAGES = int(os.environ.get("SUMMARY_MAX_FOLD_MESSAGES", "40"))
+SUMMARY_WORKERS = int(os.environ.get("SUMMARY_WORKERS", "1"))
+
+_summary_service_instance = None
+
+class SummaryService:
+    """
+    Keeps a rolling summary per chat session, off the request path. After an
+    exchange is saved the session is scheduled; the worker folds the messages
+    not yet covered by the summary (except the newest few) into it once at
+    least `refresh_every` have accumulated, stores it in chat_session_summaries
+    and updates the history cache.
+    """
+    def __init__(self, refresh_every: int = SUMMARY_REFRESH_EVERY, keep_recent: int = SUMMARY_KEEP_RECENT_MESSAGES,
+                 max_fold: int = SUMMARY_MAX_FOLD_MESSAGES, max_workers: int = SUMMARY_WORKERS,
+                 session_factory=SessionLocal, llm_factory=llm_service.get_llm_service):
+        self.refresh_every = max(1, refresh_every)
+        self.keep_recent = keep_recent
+        self.max_fold = max(self.refresh_every, max_fold)
+        self.session_factory = session_factory
+        self.llm_factory = llm_factory
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary")
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, session_id: str, user_id: str):
+        """Queues a refresh check for the session; a session already queued is not queued twice."""
+        with self._lock:
+            if session_id in self._in_flight:
+                return
+            self._in_flight.add(session_id)
+        self.executor.submit(self._run, session_id, user_id)
+
+    def _run(self, session_id: str, user_id: str):
+        try:
+            more = self.refresh(session_id, user_id)
+        except Exception as e:
+            print(f"Error summarizing session {session_id}: {e}")
+            more = False
+        finally:
+            with self._lock:
+                self._in_flight.discard(session_id)
+
+        if more:
+            self.schedule(session_id, user_id)
+
+    def refresh(self, session_id: str, user_id: str) -> bool:
+        """Folds pending messages into the summary if enough are waiting; returns True if more remain."""
+        db = self.session_factory()
+        try:
+            row = db.query(ChatSessionSummary).filter(ChatSessionSummary.session_id == session_id, ChatSessionSummary.user_id == user_id).first()
+            through = row.through_message_id if row else 0
+
+            pending_query = db.query(ChatMessage).filter(
+                ChatMessage.session_id == session_id,
+                ChatMessage.user_id == user_id,
+                ChatMessage.id > through
+            )
+            foldable = pending_query.count() - self.keep_recent
+            if foldable < self.refresh_every:
+                return False
+
+            fold = pending_query.order_by(ChatMessage.id).limit(min(foldable, self.max_fold)).all()
+            summary = self.llm_factory().summarize_conversation(previous_summary=row.summary if row else None, messages=fold)
+            if not summary:
+                return False
+
+            if row is None:
+                row = ChatSessionSummary(session_id=session_id, user_id=user_id, message_count=0)
+                db.add(row)
+            # Read before the commit expires the loaded rows; they are used after the session closes
+            through_id = fold[-1].id
+            message_count = (row.message_count or 0) + len(fold)
+            row.summary = summary
+            row.through_message_id = through_id
+            row.message_count = message_count
+            row.updated_at = datetime.now()
+            db.commit()
+
+            SUMMARY_REFRESHES.inc()
+            SUMMARY_FOLDED_MESSAGES.inc(len(fold))
+            if sample_debug():
+                print(f"Summarized {len(fold)} messages of session {session_id} ({message_count} total)")
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Error saving summary for session {session_id}: {e}")
+            return False
+        finally:
+            db.close()
+
+        cache = get_history_cache()
+        if cache:
+            cache.set_summary(session_id, user_id, summary, through_id)
+        return foldable - len(fold) >= self.refresh_every
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def get_summary_service():
+    global _summary_service_instance
+    if _summary_service_instance is None and SUMMARY_ENABLED:
+        _summary_service_instance = SummaryService()
+
+    return _summary_service_instance
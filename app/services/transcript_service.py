@@ -1,4 +1,3 @@
-import requests
 from fastapi import APIRouter, HTTPException
 from youtube_transcript_api import (
     YouTubeTranscriptApi,
@@ -7,11 +6,34 @@ from youtube_transcript_api import (
     VideoUnavailable,
     # TooManyRequests
 )
+import os
 import re
 
 from app.schemas.transcript import TranscriptResponse, Snippet
+from app.core.transcript_cache import TranscriptCache
+from app.core.http_session import get_http_session
 
-from pytube import YouTube
+# --- Transcript Cache Configuration ---
+TRANSCRIPT_CACHE_ENABLED = os.environ.get("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+TRANSCRIPT_CACHE_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR", os.path.join(".cache", "transcripts"))
+TRANSCRIPT_CACHE_TTL_SECONDS = float(os.environ.get("TRANSCRIPT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.environ.get("TRANSCRIPT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+TRANSCRIPT_CACHE_MEMORY_ENTRIES = int(os.environ.get("TRANSCRIPT_CACHE_MEMORY_ENTRIES", "128"))
+
+_transcript_cache_instance = None
+_transcript_service_instance = None
+
+def get_transcript_cache():
+    global _transcript_cache_instance
+    if _transcript_cache_instance is None and TRANSCRIPT_CACHE_ENABLED:
+        _transcript_cache_instance = TranscriptCache(
+            directory=TRANSCRIPT_CACHE_DIR,
+            ttl_seconds=TRANSCRIPT_CACHE_TTL_SECONDS,
+            max_bytes=TRANSCRIPT_CACHE_MAX_BYTES,
+            memory_entries=TRANSCRIPT_CACHE_MEMORY_ENTRIES
+        )
+
+    return _transcript_cache_instance
 
 def extract_video_id(value: str) -> str:
     if re.fullmatch(r"[a-zA-Z0-9_-]{11}", value):
@@ -31,24 +53,33 @@ def extract_video_id(value: str) -> str:
     raise ValueError("Invalid YouTube URL or video ID")
 
 def get_video_title(video_id: str):
+    """Returns (title, fetched); on a non-200 oEmbed response the title is a placeholder and fetched is False."""
     try:
         url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-        response = requests.get(url, timeout=5)
+        response = get_http_session().get(url, timeout=5)
         if response.status_code == 200:
-            return response.json().get("title", f"Video {video_id}")
+            return response.json().get("title", f"Video {video_id}"), True
     except Exception as e:
         raise ValueError(f"YouTube metadata fetch failed for {video_id}: {str(e)}")
-    return f"Failed to fetch Video title {video_id} due to {response.status_code}"
+    return f"Failed to fetch Video title {video_id} due to {response.status_code}", False
 class TranscriptService:
 
-    def __init__(self):
+    def __init__(self, cache: TranscriptCache = None):
         self.transcript_api = YouTubeTranscriptApi()
+        self.cache = cache
         
-    def get_transcript(self, video_id: str):
+    def get_transcript(self, video_id: str, language: str = "en", refresh: bool = False):
+        """With refresh, skips the cached copy and replaces it with the freshly fetched transcript."""
         try:
             video_id = extract_video_id(video_id)
-            title = get_video_title(video_id=video_id)
-            transcript = self.transcript_api.fetch(video_id=video_id)
+
+            if self.cache and not refresh:
+                cached = self.cache.get(video_id=video_id, language=language)
+                if cached is not None:
+                    return cached
+
+            title, title_fetched = get_video_title(video_id=video_id)
+            transcript = self.transcript_api.fetch(video_id=video_id, languages=[language])
             
             # return transcript
             response = TranscriptResponse(
@@ -59,6 +90,13 @@ class TranscriptService:
                     is_generated = transcript.is_generated,
                     snippets = [Snippet(text=snippet.text, start=snippet.start, duration=snippet.duration) for snippet in transcript.snippets]
             )
+
+            # A placeholder title would otherwise be served for the whole cache TTL
+            if self.cache and title_fetched:
+                try:
+                    self.cache.put(video_id=video_id, language=language, value=response)
+                except OSError as e:
+                    print(f"Failed to cache transcript for {video_id}: {e}")
             
             return response
 
@@ -90,4 +128,8 @@ class TranscriptService:
             )
         
 def get_transcript_service():
-    return TranscriptService()
\ No newline at end of file
+    global _transcript_service_instance
+    if not _transcript_service_instance:
+        _transcript_service_instance = TranscriptService(cache=get_transcript_cache())
+
+    return _transcript_service_instance
\ No newline at end of file
@@ -1,9 +1,11 @@
+import asyncio
 import os
-from typing import List, Dict, Any, Union
-from pinecone import Pinecone 
-from itertools import islice
+from typing import Iterable, List, Dict, Any, Union
 from fastapi import HTTPException
 from dotenv import load_dotenv
+from app.core import readiness
+from app.core.upsert_engine import UpsertEngine, UpsertError
+from app.core.metrics import VECTOR_QUERY_SECONDS
 
 load_dotenv()
 
@@ -11,62 +13,77 @@ load_dotenv()
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
 PINECONE_HOST = os.environ.get("PINECONE_HOST") 
 COLLECTION_NAME = os.environ.get("PINECONE_INDEX_NAME")
-BATCH_SIZE = 100 
+# "pinecone" (default) or "local" for the in-process index in local_vector_db.py
+VECTOR_DB_BACKEND = os.environ.get("VECTOR_DB_BACKEND", "pinecone").lower()
+# Upsert requests are capped both by vector count and by estimated body size
+# (Pinecone rejects requests over 2 MB; chunk text in metadata adds up quickly)
+UPSERT_MAX_BATCH_VECTORS = int(os.environ.get("VECTOR_UPSERT_MAX_BATCH_VECTORS", "500"))
+UPSERT_MAX_BATCH_BYTES = int(os.environ.get("VECTOR_UPSERT_MAX_BATCH_BYTES", str(1800 * 1024)))
+UPSERT_CONCURRENCY = int(os.environ.get("VECTOR_UPSERT_CONCURRENCY", "4"))
+UPSERT_MAX_RETRIES = int(os.environ.get("VECTOR_UPSERT_MAX_RETRIES", "5"))
+UPSERT_BACKOFF_SECONDS = float(os.environ.get("VECTOR_UPSERT_BACKOFF_SECONDS", "0.5"))
+UPSERT_MAX_BACKOFF_SECONDS = float(os.environ.get("VECTOR_UPSERT_MAX_BACKOFF_SECONDS", "8"))
+# Pinecone accepts at most 1000 ids per delete request
+DELETE_BATCH_SIZE = 1000
 
 # --- Singleton Class for the DB Connection ---
 class VectorDBService:
     """
     A service class to abstract all interactions with the Pinecone vector store.
     """
-    def __init__(self, index: "Index"): 
+    def __init__(self, index: "Index", async_index_factory=None, upsert_engine: UpsertEngine = None): 
         self.index = index
         self.namespace = "default"
+        # The asyncio index binds to the running event loop, so it is created on first async use
+        self.async_index_factory = async_index_factory
+        self.async_index = None
+        self.upsert_engine = upsert_engine or UpsertEngine(
+            max_batch_bytes=UPSERT_MAX_BATCH_BYTES,
+            max_batch_vectors=UPSERT_MAX_BATCH_VECTORS,
+            concurrency=UPSERT_CONCURRENCY,
+            max_retries=UPSERT_MAX_RETRIES,
+            backoff_seconds=UPSERT_BACKOFF_SECONDS,
+            max_backoff_seconds=UPSERT_MAX_BACKOFF_SECONDS
+        )
 
     def ingest_documents(self, documents: List[Dict[str, Any]], namespace: str) -> Dict[str, Union[str, int]]:
         """
         Takes processed documents and performs a batched upsert into the Pinecone index, 
         returning status and count.
         """
-        vectors_to_upsert = []
-        
-        # Format documents for Pinecone upsert
-        for i, doc in enumerate(documents):
-            # Generate a unique ID using the source_id (filename or video_id)
-            source_id = doc['metadata'].get("source_id", "unknown")
-            chunk_id = f"{source_id}-{i}"
-            
-            # Use the flexible metadata passed from IngestionService
-            vectors_to_upsert.append({
-                "id": chunk_id,
-                "values": doc['vector'], 
-                "metadata": {
-                    "text": doc['text'],
-                    **doc['metadata']  # Spreads user_id, source_id, source_type, etc.
-                }
-            })
-            
-        total_count = 0
-        
-        # Helper for batching the upsert requests
-        def batch_iterator(iterable, size):
-            it = iter(iterable)
-            while True:
-                chunk = list(islice(it, size))
-                if not chunk:
-                    return
-                yield chunk
-
-        # 2. Perform batched upsert
-        for batch in batch_iterator(vectors_to_upsert, BATCH_SIZE): 
-            try:
-                self.index.upsert(
-                    vectors=batch, 
-                    namespace=namespace
-                )
-                total_count += len(batch)
-            except Exception as e:
-                print(f"Pinecone Upsert Error: {e}")
-                raise HTTPException(status_code=500, detail=f"Pinecone upsert failed: {str(e)}")
+        return self.ingest_stream(document_batches=[documents], namespace=namespace)
+
+    def ingest_stream(self, document_batches: Iterable[List[Dict[str, Any]]], namespace: str) -> Dict[str, Union[str, int]]:
+        """
+        Upserts documents as they are produced (e.g. one embedding batch at a
+        time) through the upsert engine, so uploads of earlier batches run
+        while later ones are still being embedded.
+        """
+        def vectors():
+            # Format documents for Pinecone upsert
+            i = 0
+            for documents in document_batches:
+                for doc in documents:
+                    # Prefer the chunk id assigned by IngestionService; fall back to the source (filename or video_id)
+                    source_id = doc['metadata'].get("source", "unknown")
+                    yield {
+                        "id": doc.get("id") or f"{source_id}-{i}",
+                        "values": doc['vector'],
+                        "metadata": {
+                            "text": doc['text'],
+                            **doc['metadata']  # Spreads user_id, source_id, source_type, etc.
+                        }
+                    }
+                    i += 1
+
+        try:
+            total_count = self.upsert_engine.run(
+                vectors(),
+                upsert=lambda batch: self.index.upsert(vectors=batch, namespace=namespace)
+            )
+        except UpsertError as e:
+            print(f"Pinecone Upsert Error: {e}")
+            raise HTTPException(status_code=500, detail=f"Pinecone upsert failed: {str(e)}")
 
         return {
             "status": "success",
@@ -78,19 +95,55 @@ class VectorDBService:
         Performs a similarity search using the query vector to retrieve relevant chunks (Retrieval step).
         """
         try:
-            results = self.index.query(
-                vector=query_vector,
-                top_k=top_k,
-                filter = filter,
-                include_values=False,
-                include_metadata=True,
-                namespace=namespace
-            )
+            with VECTOR_QUERY_SECONDS.time(backend="pinecone"):
+                results = self.index.query(
+                    vector=query_vector,
+                    top_k=top_k,
+                    filter = filter,
+                    include_values=False,
+                    include_metadata=True,
+                    namespace=namespace
+                )
             
         except Exception as e:
             print(f"Pinecone Query Error: {e}")
             raise HTTPException(status_code=500, detail=f"Pinecone query failed: {str(e)}")
 
+        return self._format_matches(results)
+
+    async def aquery_documents(self, query_vector: List[float], filter: dict, top_k: int = 5, source_id: str = None, namespace: str = None) -> List[Dict[str, Any]]:
+        """
+        Async variant of query_documents, using Pinecone's asyncio client when available.
+        """
+        if self.async_index_factory is None:
+            return await asyncio.to_thread(self.query_documents, query_vector, filter=filter, top_k=top_k, namespace=namespace)
+
+        try:
+            if self.async_index is None:
+                self.async_index = self.async_index_factory()
+
+            with VECTOR_QUERY_SECONDS.time(backend="pinecone"):
+                results = await self.async_index.query(
+                    vector=query_vector,
+                    top_k=top_k,
+                    filter = filter,
+                    include_values=False,
+                    include_metadata=True,
+                    namespace=namespace
+                )
+            
+        except Exception as e:
+            print(f"Pinecone Query Error: {e}")
+            raise HTTPException(status_code=500, detail=f"Pinecone query failed: {str(e)}")
+
+        return self._format_matches(results)
+
+    async def aclose(self):
+        if self.async_index is not None:
+            await self.async_index.close()
+            self.async_index = None
+
+    def _format_matches(self, results) -> List[Dict[str, Any]]:
         retrieved_documents = []
 
         # 3. Structure the results for the RAG pipeline
@@ -136,13 +189,32 @@ class VectorDBService:
             # )
             self.index.delete(
                     namespace=namespace,
-                    filter={"source_id": {"$eq": source_id}}
+                    filter={"source": {"$eq": source_id}}
                 )
             return True
         except Exception as e:
             print(f"Error deleting from Pinecone: {e}")
             return False
 
+    def delete_ids(self, ids: List[str], namespace: str):
+        """Removes the given vector ids from a namespace, DELETE_BATCH_SIZE ids per request."""
+        try:
+            for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                self.index.delete(ids=ids[start:start + DELETE_BATCH_SIZE], namespace=namespace)
+            return True
+        except Exception as e:
+            print(f"Error deleting from Pinecone: {e}")
+            return False
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any], namespace: str):
+        """Overwrites metadata fields of one vector without re-sending its values."""
+        try:
+            self.index.update(id=vector_id, set_metadata=metadata, namespace=namespace)
+            return True
+        except Exception as e:
+            print(f"Error updating Pinecone metadata: {e}")
+            return False
+
 # --- Factory Function for FastAPI Dependency Injection (Requires Index type hint) ---
 
 _db_service_instance: "VectorDBService" = None
@@ -154,6 +226,11 @@ def get_vector_db_service() -> VectorDBService:
     """
     global _db_service_instance
 
+    if _db_service_instance is None and VECTOR_DB_BACKEND == "local":
+        from app.services.local_vector_db import LocalVectorDBService
+        _db_service_instance = LocalVectorDBService()
+        readiness.mark_ready("vector_db")
+
     if _db_service_instance is None:
         if not PINECONE_API_KEY or not PINECONE_HOST:
             raise RuntimeError("PINECONE_API_KEY and PINECONE_HOST environment variables must be set.")
@@ -164,13 +241,25 @@ def get_vector_db_service() -> VectorDBService:
 
             index = pc.Index(host=PINECONE_HOST) 
 
-            
-            index_stats = index.describe_index_stats() 
-            print(f"Successfully connected to Pinecone Index: {COLLECTION_NAME}. Total vectors: {index_stats.total_vector_count}")
-
-            _db_service_instance = VectorDBService(index)
+            _db_service_instance = VectorDBService(index, async_index_factory=lambda: pc.IndexAsyncio(host=PINECONE_HOST))
+            readiness.mark_ready("vector_db")
 
         except Exception as e:
             raise RuntimeError(f"Failed to initialize VectorDBService with Pinecone. Ensure API Key/Host are correct and the index exists. Error: {str(e)}")
             
-    return _db_service_instance
\ No newline at end of file
+    return _db_service_instance
+
+async def close_vector_db_service():
+    if _db_service_instance is not None:
+        await _db_service_instance.aclose()
+
+def warm_up_vector_db():
+    """
+    Creates the service and, for Pinecone, makes one describe_index_stats round
+    trip so the connection is established before the first query needs it.
+    """
+    service = get_vector_db_service()
+    if isinstance(service, VectorDBService):
+        index_stats = service.index.describe_index_stats()
+        print(f"Successfully connected to Pinecone Index: {COLLECTION_NAME}. Total vectors: {index_stats.total_vector_count}")
+    readiness.mark_ready("vector_db")
\ No newline at end of file
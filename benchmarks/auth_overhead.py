@@ -0,0 +1,109 @@
+"""
+Per-request authentication overhead, before and after local JWT verification.
+
+    python -m benchmarks.auth_overhead [--requests 2000] [--users 50] [--remote-ms 40]
+
+Tokens are issued locally with an HS256 secret. "supabase-per-request" replays
+the old dependency: a new client per request plus one auth.get_user round
+trip, simulated with --client-ms and --remote-ms of sleep. "local-uncached"
+checks every token's signature; "local-cached" is the real TokenVerifier
+path, where each user's token is verified once and then served from the
+verified-token cache.
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+import jwt
+
+from app.core.token_verifier import TokenVerifier, VerifiedTokenCache
+
+SECRET = "benchmark-secret-benchmark-secret-benchmark"
+AUDIENCE = "authenticated"
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeUserResponse:
+    def __init__(self, user_id):
+        self.user = FakeUser(user_id)
+
+
+class FakeSupabase:
+    """Stands in for supabase.Client: creation and get_user both take time."""
+    def __init__(self, client_ms: float, remote_ms: float):
+        time.sleep(client_ms / 1000)
+        self.auth = self
+        self.remote = remote_ms / 1000
+
+    def get_user(self, token):
+        time.sleep(self.remote)
+        return FakeUserResponse(jwt.decode(token, options={"verify_signature": False})["sub"])
+
+
+def issue_tokens(users: int, ttl_seconds: int = 3600):
+    now = int(time.time())
+    return [
+        jwt.encode({"sub": str(uuid.uuid4()), "aud": AUDIENCE, "role": "authenticated", "iat": now, "exp": now + ttl_seconds}, SECRET, algorithm="HS256")
+        for _ in range(users)
+    ]
+
+
+def measure(name, verify, tokens, requests):
+    timings = []
+    for i in range(requests):
+        started = time.perf_counter()
+        verify(tokens[i % len(tokens)])
+        timings.append((time.perf_counter() - started) * 1e6)
+
+    timings.sort()
+    return {
+        "mode": name,
+        "requests": requests,
+        "mean_us": round(statistics.fmean(timings), 1),
+        "p50_us": round(timings[len(timings) // 2], 1),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--client-ms", type=float, default=5, help="simulated cost of creating a Supabase client")
+    parser.add_argument("--remote-ms", type=float, default=40, help="simulated auth.get_user round trip")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    tokens = issue_tokens(args.users)
+
+    def old_dependency(token):
+        return FakeSupabase(args.client_ms, args.remote_ms).auth.get_user(token).user.id
+
+    def uncached_verifier():
+        return TokenVerifier(secret=SECRET, jwks_url=None, audience=AUDIENCE, cache=VerifiedTokenCache(max_entries=0, ttl_seconds=0))
+
+    cached = TokenVerifier(secret=SECRET, jwks_url=None, audience=AUDIENCE, cache=VerifiedTokenCache(max_entries=10000, ttl_seconds=300))
+
+    # The remote path is slow by design; a smaller sample is enough to characterize it
+    results = [
+        measure("supabase-per-request", old_dependency, tokens, min(args.requests, 200)),
+        measure("local-uncached", uncached_verifier().verify, tokens, args.requests),
+        measure("local-cached", cached.verify, tokens, args.requests),
+    ]
+
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results, "verifier_stats": cached.stats()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Chunker micro-benchmark on synthetic long transcripts.
+
+    python -m benchmarks.chunker [--hours 10] [--tokenizer model|words|chars] [--long-words]
+
+Compares the character-based chunk_transcript with the streaming, token-aware
+iter_chunks: wall time, peak Python memory, chunk count and the largest chunk
+in tokens (anything above the model limit would be truncated when embedded).
+
+--long-words puts a URL or a run-on of several thousand characters without
+spaces into every 20th segment; each is longer than the token limit on its
+own, so iter_chunks has to split inside the word. Use it with the model
+tokenizer or "chars" (one token per 4 characters of a word); "words" counts
+any word as one token and never sees them as long.
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from app.core.chunker import chunk_transcript, iter_chunks
+
+WORDS = (
+    "so today we are going to talk about how neural networks learn from data and why "
+    "gradient descent works the way it does let me show you an example on the whiteboard "
+    "this is really important because most people get this part wrong in practice"
+).split()
+
+
+def long_word(rng: random.Random) -> str:
+    run = "".join(rng.choice(WORDS) for _ in range(rng.randint(400, 800)))
+    return f"https://example.com/{run}" if rng.random() < 0.5 else run
+
+
+def synthetic_segments(hours: float, seed: int = 0, long_words: bool = False):
+    """YouTube-style captions: a few words every ~3 seconds, occasional sentence ends."""
+    rng = random.Random(seed)
+    t = 0.0
+    end = hours * 3600
+    index = 0
+    while t < end:
+        duration = rng.uniform(2.0, 4.0)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12)))
+        if long_words and index % 20 == 0:
+            text += " " + long_word(rng)
+        if rng.random() < 0.2:
+            text += "."
+        index += 1
+        yield {"text": text, "start": t, "duration": duration}
+        t += duration
+
+
+def run(name, fn, count_tokens, max_tokens):
+    tracemalloc.start()
+    started = time.perf_counter()
+    chunks = 0
+    largest = 0
+    for chunk in fn():
+        chunks += 1
+        largest = max(largest, count_tokens(chunk["text"]))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "chunker": name,
+        "seconds": round(elapsed, 3),
+        "peak_mib": round(peak / 2**20, 2),
+        "chunks": chunks,
+        "largest_chunk_tokens": largest,
+        "over_limit": largest > max_tokens,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=10)
+    parser.add_argument("--tokenizer", choices=["model", "words", "chars"], default="model",
+                        help="'words' counts whitespace words and 'chars' 4 characters of a word per token, for machines without the model files")
+    parser.add_argument("--long-words", action="store_true", help="add words longer than the token limit")
+    parser.add_argument("--max-chars", type=int, default=2000)
+    parser.add_argument("--overlap-chars", type=int, default=300)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    token_offsets = None
+    if args.tokenizer == "model":
+        from app.core.embedding import count_tokens, token_offsets, get_max_tokens
+        max_tokens = get_max_tokens()
+    elif args.tokenizer == "chars":
+        count_tokens = lambda text: sum(-(-len(word) // 4) for word in text.split())
+        max_tokens = 254
+    else:
+        count_tokens = lambda text: len(text.split())
+        max_tokens = 254
+
+    results = [
+        # chunk_transcript needs the whole transcript as a list
+        run("chunk_transcript", lambda: chunk_transcript(list(synthetic_segments(args.hours, long_words=args.long_words)), args.max_chars, args.overlap_chars), count_tokens, max_tokens),
+        run("iter_chunks", lambda: iter_chunks(synthetic_segments(args.hours, long_words=args.long_words), count_tokens, max_tokens, args.overlap_tokens, args.max_chars, args.overlap_chars, token_offsets), count_tokens, max_tokens),
+    ]
+
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"hours": args.hours, "tokenizer": args.tokenizer, "long_words": args.long_words, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
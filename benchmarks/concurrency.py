@@ -0,0 +1,167 @@
+"""
+Concurrent ingestion and query traffic against the service layer.
+
+    python -m benchmarks.concurrency [--workers 16] [--operations 400] [--database sqlite:///bench.db]
+
+Half of the workers ingest small sources through IngestionService while the
+others run the query path's DB work (session upsert, message writes, history
+reads) plus a local vector search. "shared-session" reproduces the old
+get_ingestion_service singleton, where every request used the first
+request's Session; "per-request" opens a Session per operation, as the
+request dependencies now do. Embedding and chunking are replaced by cheap
+deterministic stand-ins so the run measures the DB and index layers only.
+Exits non-zero if the per-request run had errors or lost writes.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DIM = 32
+
+
+class HashEmbeddingService:
+    def embed_texts(self, texts):
+        vectors = []
+        for text in texts:
+            rng = random.Random(text)
+            vectors.append([rng.uniform(-1, 1) for _ in range(DIM)])
+        return vectors
+
+
+class WordChunkService:
+    """Fixed-size word windows; enough to produce realistic chunk counts."""
+    def iter_chunks(self, segments, max_chars: int = 2000, overlap_chars: int = 300, **kwargs):
+        buffer, start = [], None
+        for seg in segments:
+            start = seg["start"] if start is None else start
+            buffer.append(seg["text"])
+            if sum(len(t) for t in buffer) >= max_chars:
+                yield {"text": " ".join(buffer), "start": start, "end": seg["start"] + seg["duration"]}
+                buffer, start = [], None
+        if buffer:
+            yield {"text": " ".join(buffer), "start": start or 0.0, "end": start or 0.0}
+
+
+def segments(source: str, count: int = 60):
+    return [{"text": f"{source} segment {i} about topic {i % 7}", "start": i * 3.0, "duration": 3.0} for i in range(count)]
+
+
+def run(mode: str, args, SessionLocal, vector_db):
+    from app.services.ingestion_service import IngestionService
+    from app.services.session_service import SessionService
+    from app.schemas.ingestion_source import IngestionSource
+    from app.schemas.session import ChatMessage
+
+    embedding = HashEmbeddingService()
+    chunking = WordChunkService()
+    shared_db = SessionLocal() if mode == "shared-session" else None
+    errors = []
+    errors_lock = threading.Lock()
+    run_id = f"{mode}-{int(time.time() * 1000)}"
+
+    def session():
+        return shared_db if shared_db is not None else SessionLocal()
+
+    def release(db):
+        if db is not shared_db:
+            db.close()
+
+    def ingest(i):
+        db = session()
+        try:
+            service = IngestionService(transcript_service=None, chunk_service=chunking, embedding_service=embedding, vector_db_service=vector_db, db=db)
+            service._run_streaming_pipeline(segments=segments(f"src{i}"), user_id=run_id, source_id=f"src{i}", source_type="video", display_name=f"Source {i}", max_chars=200, overlap_chars=0)
+        finally:
+            release(db)
+
+    def query(i):
+        db = session()
+        try:
+            sessions = SessionService(db)
+            session_id = f"{run_id}-session{i % 8}"
+            sessions.add_message(session_id=session_id, user_id=run_id, role="user", content=f"question {i}")
+            sessions.get_history(session_id=session_id, user_id=run_id)
+            vector_db.query_documents(embedding.embed_texts([f"question {i}"])[0], filter={"user_id": run_id}, top_k=5, namespace=f"user_{run_id}")
+        finally:
+            release(db)
+
+    def operation(i):
+        try:
+            (ingest if i % 2 == 0 else query)(i)
+        except Exception as e:
+            with errors_lock:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(operation, range(args.operations)))
+    elapsed = time.perf_counter() - started
+
+    if shared_db is not None:
+        shared_db.close()
+
+    check = SessionLocal()
+    try:
+        sources = check.query(IngestionSource).filter(IngestionSource.user_id == run_id).count()
+        messages = check.query(ChatMessage).filter(ChatMessage.user_id == run_id).count()
+    finally:
+        check.close()
+
+    expected_sources = (args.operations + 1) // 2
+    expected_messages = args.operations // 2
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "operations": args.operations,
+        "seconds": round(elapsed, 3),
+        "operations_per_second": round(args.operations / elapsed, 1),
+        "errors": len(errors),
+        "sample_errors": sorted(set(errors))[:3],
+        "lost_sources": expected_sources - sources,
+        "lost_messages": expected_messages - messages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=400)
+    parser.add_argument("--database", help="DATABASE_URL to use (default: a temporary SQLite file)")
+    parser.add_argument("--modes", nargs="+", default=["shared-session", "per-request"], choices=["shared-session", "per-request"])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="concurrency_bench_")
+    os.environ["DATABASE_URL"] = args.database or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+
+    from app.core.database import Base, engine, SessionLocal
+    from app.services.local_vector_db import LocalVectorDBService
+    # Registers the ingestion and chat tables before create_all
+    import app.services.ingestion_service  # noqa: F401
+    import app.schemas.session  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    vector_db = LocalVectorDBService(path=os.path.join(workdir, "vectors"))
+
+    results = [run(mode, args, SessionLocal, vector_db) for mode in args.modes]
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+    per_request = next((r for r in results if r["mode"] == "per-request"), None)
+    if per_request and (per_request["errors"] or per_request["lost_sources"] or per_request["lost_messages"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Accuracy and throughput comparison of the embedding engines.
+
+    python -m benchmarks.embedding_engines [--engines torch onnx onnx-int8] [--batch-sizes 1 32]
+
+Accuracy is the cosine similarity between each engine's vectors and the fp32
+PyTorch vectors on the same sample texts; throughput is texts per second.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.core.embedding_engines import ENGINES, load_embedding_model
+
+SAMPLE_TEXTS = [
+    "What are the key points of this lecture?",
+    "Summarize the video in three sentences.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The mitochondria is the powerhouse of the cell.",
+    "In this episode we talk about how to train for your first marathon.",
+    "This video is sponsored by a VPN company, use the link in the description.",
+    "Don't forget to like and subscribe and hit the notification bell.",
+    "The derivative of x squared is two x, which we can verify with the limit definition.",
+    "Gradient descent updates parameters in the direction of the negative gradient.",
+    "The French Revolution began in 1789 with the storming of the Bastille.",
+    "Let's look at how the transformer attention mechanism computes weighted sums of values.",
+    "Add two cups of flour and a pinch of salt, then knead the dough for ten minutes.",
+    "Interest rates rose sharply, which cooled the housing market.",
+    "The quarterback threw a forty yard pass in the final seconds of the game.",
+    "Which page of the PDF explains the refund policy?",
+    "Kubernetes schedules pods onto nodes based on resource requests and affinity rules.",
+]
+
+
+def _sample(size: int):
+    return [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" ({i})" for i in range(size)]
+
+
+def measure_throughput(model, texts, batch_size: int, repeats: int) -> float:
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeats):
+        model.encode(texts, batch_size=batch_size)
+    return len(texts) * repeats / (time.perf_counter() - started)
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = np.sum(reference * candidate, axis=1)
+    return {"mean": float(cosines.mean()), "min": float(cosines.min())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 32])
+    parser.add_argument("--texts", type=int, default=256, help="number of texts per throughput run")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    texts = _sample(args.texts)
+    reference = load_embedding_model(args.model, "torch").encode(SAMPLE_TEXTS)
+
+    results = {"model": args.model, "engines": {}}
+    for engine in args.engines:
+        model = load_embedding_model(args.model, engine)
+        vectors = model.encode(SAMPLE_TEXTS)
+
+        results["engines"][engine] = {
+            "dimension": int(vectors.shape[1]),
+            "cosine_vs_torch": cosine_agreement(reference, vectors),
+            "texts_per_second": {
+                str(batch_size): round(measure_throughput(model, texts, batch_size, args.repeats), 1)
+                for batch_size in args.batch_sizes
+            },
+        }
+        print(f"{engine}: {json.dumps(results['engines'][engine])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
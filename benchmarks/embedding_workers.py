@@ -0,0 +1,178 @@
+"""
+Embedding throughput and memory per web worker, with and without the shared
+embedding server (app/core/embedding_server.py).
+
+    python -m benchmarks.embedding_workers [--workers 4] [--threads 8] [--server-processes 2] [--output workers.json]
+
+Starts --workers processes standing in for uvicorn workers. In "local" mode
+each one loads its own copy of the model, as the app does without
+EMBEDDING_SERVER_ADDRESS. In "server" mode one embedding server loads the
+model and forks --server-processes encoders, and the workers only hold a
+client. Every worker then runs --threads closed-loop callers of
+embedding.embed_texts (--texts-per-call unique texts, cache disabled) for
+--seconds.
+
+Reported per mode: texts/s across all workers, p50/p95 call latency, and
+memory from /proc for each process. RSS counts shared pages in full for every
+process that maps them; PSS splits them between those processes, so the PSS
+total is the memory the deployment actually costs. Encoders forked from the
+server share its weights copy-on-write, so their PSS stays far below their
+RSS as long as the weights are only read.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from benchmarks.offline.report import percentile, git_commit
+
+
+def memory(pid: int):
+    """RSS and PSS of one process in MiB (PSS needs Linux 4.14+)."""
+    usage = {"pid": pid}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                usage["rss_mib"] = round(int(line.split()[1]) / 1024, 1)
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    usage["pss_mib"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return usage
+
+
+def worker(env, threads: int, texts_per_call: int, seconds: float, ready, start, results):
+    """One stand-in web worker; environment is set before the app modules read it."""
+    os.environ.update(env)
+    from app.core import embedding
+
+    embedding.warm_up_embeddings()
+    embedding.embed_texts(["warm-up"])
+    ready.put(os.getpid())
+    start.wait()
+
+    timings = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def loop():
+        while time.perf_counter() < deadline:
+            texts = [f"{uuid.uuid4().hex} how does gradient descent update the weights" for _ in range(texts_per_call)]
+            started = time.perf_counter()
+            embedding.embed_texts(texts)
+            with lock:
+                timings.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=loop) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(timings)
+
+
+def start_server(env, address: str, timeout: float = 300):
+    process = subprocess.Popen([sys.executable, "-m", "app.core.embedding_server"], env={**os.environ, **env})
+    from app.core.embedding_client import EmbeddingClient
+
+    client = EmbeddingClient(address, env["EMBEDDING_SERVER_AUTHKEY"], timeout=5)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Embedding server exited with code {process.returncode}")
+        try:
+            return process, client.ping()
+        except (OSError, ConnectionError):
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Embedding server did not start within {timeout:.0f} seconds")
+
+
+def run_mode(mode: str, args):
+    env = {"EMBEDDING_CACHE_ENABLED": "false"}
+    server = None
+    server_pids = []
+    if mode == "server":
+        address = os.path.join(tempfile.mkdtemp(prefix="embedding-bench-"), "embedding.sock")
+        env["EMBEDDING_SERVER_ADDRESS"] = address
+        env["EMBEDDING_SERVER_AUTHKEY"] = secrets.token_hex(16)
+        server, stats = start_server({**env, "EMBEDDING_SERVER_PROCESSES": str(args.server_processes)}, address)
+        server_pids = [stats["pid"], *stats["encoder_pids"]]
+
+    # spawn, not fork: real web workers don't inherit a model from this process
+    context = multiprocessing.get_context("spawn")
+    ready, results, start = context.Queue(), context.Queue(), context.Event()
+    workers = [context.Process(target=worker, args=(env, args.threads, args.texts_per_call, args.seconds, ready, start, results)) for _ in range(args.workers)]
+    try:
+        for process in workers:
+            process.start()
+        worker_pids = [ready.get(timeout=600) for _ in workers]
+
+        started = time.perf_counter()
+        start.set()
+        # Sample memory mid-run, after every process has touched the model
+        time.sleep(args.seconds / 2)
+        processes = [{"role": "worker", **memory(pid)} for pid in worker_pids]
+        processes += [{"role": "server" if i == 0 else "encoder", **memory(pid)} for i, pid in enumerate(server_pids)]
+
+        timings = sorted(t for _ in workers for t in results.get(timeout=args.seconds + 600))
+        elapsed = time.perf_counter() - started
+        for process in workers:
+            process.join()
+    finally:
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    worker_memory = [p for p in processes if p["role"] == "worker"]
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "server_processes": args.server_processes if mode == "server" else 0,
+        "calls": len(timings),
+        "texts_per_second": round(len(timings) * args.texts_per_call / elapsed, 1),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 2),
+        "rss_mib_per_worker": round(sum(p.get("rss_mib", 0) for p in worker_memory) / len(worker_memory), 1),
+        "pss_mib_total": round(sum(p.get("pss_mib", 0) for p in processes), 1),
+        "processes": processes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=["local", "server"], default=["local", "server"])
+    parser.add_argument("--workers", type=int, default=4, help="stand-in web worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent callers per worker")
+    parser.add_argument("--texts-per-call", type=int, default=1, help="1 is a query; larger values resemble ingestion")
+    parser.add_argument("--server-processes", type=int, default=2, help="encoder processes forked by the server")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args)
+        results.append(result)
+        print(json.dumps({k: v for k, v in result.items() if k != "processes"}))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"commit": git_commit(), "config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
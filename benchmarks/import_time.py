@@ -0,0 +1,47 @@
+"""
+Import-time budget check for the API module.
+
+    python -m benchmarks.import_time [--budget-seconds 2.0] [--runs 3]
+
+Imports `app.main` in fresh interpreters and exits non-zero when the best
+run exceeds the budget, so it can gate CI against heavy imports creeping
+back into module scope.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def measure(runs: int) -> list:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    env["WARMUP_ON_STARTUP"] = "false"
+
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True)
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-seconds", type=float, default=2.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    timings = measure(args.runs)
+    best = min(timings)
+    print(json.dumps({"best_seconds": round(best, 3), "runs": [round(t, 3) for t in timings], "budget_seconds": args.budget_seconds}))
+
+    if best > args.budget_seconds:
+        print(f"import app.main took {best:.2f}s, over the {args.budget_seconds:.2f}s budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+HTTP load test: ramps concurrency against the API until it saturates.
+
+    python -m benchmarks.load_test [--levels 1 2 4 8 16 32 64] [--stage-seconds 20] [--output load.json]
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --jwt-secret ...
+
+Without --url, starts benchmarks.offline.server (the app wired to the offline
+stand-ins) on a free port and stops it afterwards; extra server options go
+after "--", e.g. "-- --llm-latency-ms 800 --database postgresql://...".
+
+Each stage runs `level` closed-loop virtual users for --stage-seconds. A user
+picks its next request from the --mix weights:
+
+    query           POST   /api/query/              (async route)
+    history         GET    /api/sessions/history    (sync route)
+    ingest          POST   /api/ingestion/video     (queues a job)
+    delete_session  DELETE /api/sessions/{id}
+    delete_source   DELETE /api/ingestion/user/source
+
+Per stage and endpoint it reports throughput, p50/p95/p99 latency and the
+error rate (exceptions and non-2xx responses). The saturation point is the
+first stage where errors exceed --max-error-rate, or where throughput grows
+by less than --min-gain while p95 latency rises by more than --max-p95-growth.
+"""
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from benchmarks.offline import environment
+from benchmarks.offline.report import percentile, git_commit
+
+DEFAULT_MIX = "query=60,history=25,ingest=8,delete_session=4,delete_source=3"
+QUESTIONS = (
+    "what is gradient descent",
+    "how does the optimizer update the weights",
+    "why do most people get this part wrong",
+    "summarize the example on the whiteboard",
+    "what does the loss function measure",
+)
+
+
+class VirtualUser:
+    """One closed-loop client with its own connection, chat session and ingested sources."""
+    def __init__(self, base_url: str, token: str):
+        self.base_url = base_url.rstrip("/")
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.http.headers["Authorization"] = f"Bearer {token}"
+        self.rng = random.Random()
+        self.session_id = self.new_session()
+        self.sources = []
+
+    def new_session(self) -> str:
+        return f"load-{uuid.uuid4().hex[:12]}"
+
+    def request(self, method: str, path: str, allowed=(), **kwargs):
+        response = self.http.request(method, f"{self.base_url}{path}", timeout=120, **kwargs)
+        if response.status_code >= 400 and response.status_code not in allowed:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response
+
+    def query(self):
+        self.request("POST", "/api/query/", params={"question": self.rng.choice(QUESTIONS), "session_id": self.session_id})
+
+    def history(self):
+        self.request("GET", "/api/sessions/history", params={"session_id": self.session_id})
+
+    def ingest(self):
+        video_id = f"load-{uuid.uuid4().hex[:8]}"
+        self.request("POST", "/api/ingestion/video", params={"video_id": video_id})
+        self.sources.append(video_id)
+
+    def delete_session(self):
+        session_id, self.session_id = self.session_id, self.new_session()
+        self.request("DELETE", f"/api/sessions/{session_id}")
+
+    def delete_source(self):
+        """Deletes the oldest source this user ingested; returns False (no request) if there is none."""
+        if not self.sources:
+            return False
+        # Its ingestion job may not have finished yet, in which case the source isn't registered: 404
+        self.request("DELETE", "/api/ingestion/user/source", allowed=(404,), params={"source_id": self.sources.pop(0)})
+
+
+def parse_mix(text: str):
+    mix = {}
+    for part in text.split(","):
+        name, weight = part.split("=")
+        if not hasattr(VirtualUser, name.strip()):
+            raise ValueError(f"Unknown operation in --mix: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def issue_token(secret: str, user_id: str) -> str:
+    import jwt
+
+    now = int(time.time())
+    return jwt.encode({"sub": user_id, "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + 24 * 3600}, secret, algorithm="HS256")
+
+
+def seed_user(user: VirtualUser, timeout: float = 300):
+    """Ingests one video and waits for its job, so queries have something to retrieve."""
+    video_id = f"seed-{uuid.uuid4().hex[:8]}"
+    job = user.request("POST", "/api/ingestion/video", params={"video_id": video_id}).json()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = user.request("GET", f"/api/ingestion/jobs/{job['job_id']}").json()["status"]
+        if status in ("completed", "failed"):
+            return status
+        time.sleep(0.5)
+    return "timeout"
+
+
+def run_stage(level: int, base_url: str, tokens, mix, seconds: float):
+    names, weights = zip(*mix.items())
+    samples = defaultdict(list)
+    errors = defaultdict(list)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def loop(user: VirtualUser):
+        while time.perf_counter() < deadline:
+            name = user.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                if getattr(user, name)() is False:
+                    continue
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples[name].append(elapsed)
+                if error:
+                    errors[name].append(error)
+
+    users = [VirtualUser(base_url, tokens[i % len(tokens)]) for i in range(level)]
+    started = time.perf_counter()
+    threads = [threading.Thread(target=loop, args=(user,), daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name in names:
+        timings = sorted(samples[name])
+        endpoints[name] = {
+            "requests": len(timings),
+            "errors": len(errors[name]),
+            "error_rate": round(len(errors[name]) / len(timings), 4) if timings else 0.0,
+            "sample_errors": sorted(set(errors[name]))[:3],
+            "requests_per_second": round(len(timings) / elapsed, 2),
+            "p50_ms": round(percentile(timings, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(timings, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(timings, 0.99) * 1000, 1),
+        }
+
+    all_timings = sorted(t for timings in samples.values() for t in timings)
+    total_errors = sum(len(e) for e in errors.values())
+    return {
+        "concurrency": level,
+        "seconds": round(elapsed, 2),
+        "requests": len(all_timings),
+        "requests_per_second": round(len(all_timings) / elapsed, 2),
+        "error_rate": round(total_errors / len(all_timings), 4) if all_timings else 0.0,
+        "p50_ms": round(percentile(all_timings, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(all_timings, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(all_timings, 0.99) * 1000, 1),
+        "endpoints": endpoints,
+    }
+
+
+def find_saturation(stages, max_error_rate: float, min_gain: float, max_p95_growth: float):
+    """The first stage past which adding concurrency stops paying off, with the reason."""
+    for previous, stage in zip([None] + stages[:-1], stages):
+        if stage["error_rate"] > max_error_rate:
+            return {"concurrency": stage["concurrency"], "reason": f"error rate {stage['error_rate']:.1%}"}
+        if previous is None or not previous["requests_per_second"] or not previous["p95_ms"]:
+            continue
+        gain = stage["requests_per_second"] / previous["requests_per_second"] - 1
+        p95_growth = stage["p95_ms"] / previous["p95_ms"] - 1
+        if gain < min_gain and p95_growth > max_p95_growth:
+            return {
+                "concurrency": stage["concurrency"],
+                "reason": f"throughput {gain:+.0%} while p95 latency {p95_growth:+.0%} over concurrency {previous['concurrency']}",
+            }
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server_args):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.offline.server", "--port", str(port), *server_args])
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Offline server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("Offline server did not start within 60 seconds")
+
+
+def main():
+    argv = sys.argv[1:]
+    server_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    argv = argv[:argv.index("--")] if "--" in argv else argv
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running app instead of starting the offline server")
+    parser.add_argument("--jwt-secret", default=environment.JWT_SECRET, help="HS256 secret the target accepts")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--stage-seconds", type=float, default=20)
+    parser.add_argument("--users", type=int, default=16, help="distinct accounts the virtual users are spread over")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--no-seed", action="store_true", help="skip ingesting one video per account before the ramp")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--min-gain", type=float, default=0.10, help="throughput growth below this counts as flat")
+    parser.add_argument("--max-p95-growth", type=float, default=0.50)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_server(server_args)
+
+    try:
+        tokens = [issue_token(args.jwt_secret, f"load-user-{i}") for i in range(args.users)]
+        if not args.no_seed:
+            seeded = [seed_user(VirtualUser(base_url, token)) for token in tokens]
+            print(json.dumps({"seeded": {status: seeded.count(status) for status in set(seeded)}}))
+
+        stages = []
+        for level in args.levels:
+            stage = run_stage(level, base_url, tokens, mix, args.stage_seconds)
+            stages.append(stage)
+            print(json.dumps({k: v for k, v in stage.items() if k != "endpoints"}))
+            for name, endpoint in stage["endpoints"].items():
+                # sample_errors tells functional failures (e.g. HTTP 500) apart from saturation (timeouts, resets)
+                print(json.dumps({"concurrency": level, "endpoint": name, **endpoint}))
+
+        saturation = find_saturation(stages, args.max_error_rate, args.min_gain, args.max_p95_growth)
+        print(json.dumps({"saturation": saturation}))
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({
+                    "commit": git_commit(),
+                    "target": args.url or "offline-server",
+                    "server_args": server_args,
+                    "config": vars(args),
+                    "stages": stages,
+                    "saturation": saturation,
+                }, f, indent=2)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
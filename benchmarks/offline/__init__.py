@@ -0,0 +1,6 @@
+"""
+Offline benchmark suite: the app's service layer against deterministic local
+stand-ins for YouTube, Pinecone, Gemini and Supabase, with SQLite as the
+database. See __main__.py for the benchmark itself and environment.py for
+wiring the fakes into other harnesses.
+"""
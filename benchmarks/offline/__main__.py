@@ -0,0 +1,174 @@
+"""
+Offline end-to-end benchmark: ingestion throughput and query latency.
+
+    python -m benchmarks.offline [--lengths 10 60 240] [--concurrency 1 4 16] [--output results.json]
+
+Runs the real service layer (IngestionService, QueryService, SessionService,
+TokenVerifier, VectorDBService, LLMService) against the stand-ins in
+benchmarks/offline/fakes.py and a SQLite database, so it needs no network or
+credentials. Ingestion is measured per transcript length in chunks/s; queries
+go through token verification, history, embedding, retrieval, generation and
+the exchange commit, at each concurrency level. Results are printed as JSON
+lines and, with --output, written with the commit they were measured on.
+"""
+import argparse
+import json
+import platform
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.offline import environment
+from benchmarks.offline.report import percentile, git_commit
+
+
+def ingestion_service(services, db):
+    from app.services.ingestion_service import IngestionService
+    from app.services.vector_db import get_vector_db_service
+
+    return IngestionService(
+        transcript_service=services.transcript_service,
+        chunk_service=services.chunk_service,
+        embedding_service=services.embedding_service,
+        vector_db_service=get_vector_db_service(),
+        db=db
+    )
+
+
+def bench_ingestion(services, SessionLocal, lengths, repeats: int):
+    results = []
+    for minutes in lengths:
+        runs = []
+        for repeat in range(repeats):
+            video_id = f"fixture-{int(minutes)}m-{repeat}"
+            services.transcript_service.set_length(video_id, minutes)
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                response = ingestion_service(services, db).process_video(video_id=video_id, user_id=f"ingest-{int(minutes)}m")
+                elapsed = time.perf_counter() - started
+            finally:
+                db.close()
+            runs.append((elapsed, response.get("total_count", 0)))
+
+        seconds = statistics.median(elapsed for elapsed, _ in runs)
+        chunks = runs[0][1]
+        results.append({
+            "transcript_minutes": minutes,
+            "chunks": chunks,
+            "seconds": round(seconds, 3),
+            "chunks_per_second": round(chunks / seconds, 1) if seconds else 0.0,
+        })
+    return results
+
+
+def bench_queries(services, SessionLocal, levels, requests_per_level: int, corpus_videos: int, corpus_minutes: float):
+    from app.core.token_verifier import get_token_verifier
+    from app.services.query_service import QueryService
+    from app.services.session_service import SessionService
+    from app.services.container import init_container
+
+    user_id = "query-user"
+    db = SessionLocal()
+    try:
+        for i in range(corpus_videos):
+            video_id = f"corpus-{i}"
+            services.transcript_service.set_length(video_id, corpus_minutes)
+            ingestion_service(services, db).process_video(video_id=video_id, user_id=user_id)
+    finally:
+        db.close()
+
+    container = init_container()
+    verifier = get_token_verifier()
+    token = services.issuer.issue(user_id=user_id)
+    results = []
+
+    for level in levels:
+        timings = []
+        errors = []
+        lock = threading.Lock()
+
+        def one_query(i):
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                verifier.verify(token)
+                service = QueryService(embedding_service=container.embedding_service, vector_db_service=container.vector_db_service, llm_service=container.llm_service, session_service=SessionService(db))
+                response = service.query(question=f"question {i} about gradient descent", user_id=user_id, session_id=f"c{level}-session{i % max(1, level)}")
+                if not response.get("answer"):
+                    raise RuntimeError("empty answer")
+                with lock:
+                    timings.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+            finally:
+                db.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            list(pool.map(one_query, range(requests_per_level)))
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        results.append({
+            "concurrency": level,
+            "requests": requests_per_level,
+            "errors": len(errors),
+            "sample_errors": sorted(set(errors))[:3],
+            "requests_per_second": round(requests_per_level / elapsed, 1),
+            "p50_ms": round(percentile(timings, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(timings, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(timings, 0.99) * 1000, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=float, nargs="+", default=[10, 60, 240], help="transcript lengths in minutes")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="queries per concurrency level")
+    parser.add_argument("--corpus-videos", type=int, default=5)
+    parser.add_argument("--corpus-minutes", type=float, default=60)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--index-latency-ms", type=float, default=5)
+    parser.add_argument("--embed-ms-per-call", type=float, default=2)
+    parser.add_argument("--embed-ms-per-text", type=float, default=0.5)
+    parser.add_argument("--workdir", help="directory for the SQLite database and caches (default: a temporary one)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    workdir = environment.configure(args.workdir)
+    services = environment.install(
+        llm_latency_ms=args.llm_latency_ms,
+        index_latency_ms=args.index_latency_ms,
+        embed_ms_per_call=args.embed_ms_per_call,
+        embed_ms_per_text=args.embed_ms_per_text
+    )
+    from app.core.database import SessionLocal
+
+    ingestion = bench_ingestion(services, SessionLocal, args.lengths, args.repeats)
+    for result in ingestion:
+        print(json.dumps({"benchmark": "ingestion", **result}))
+
+    queries = bench_queries(services, SessionLocal, args.concurrency, args.requests, args.corpus_videos, args.corpus_minutes)
+    for result in queries:
+        print(json.dumps({"benchmark": "query", **result}))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "workdir": workdir,
+                "config": vars(args),
+                "ingestion": ingestion,
+                "query": queries,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
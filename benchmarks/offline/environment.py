@@ -0,0 +1,68 @@
+"""
+Wires the app to the offline stand-ins.
+
+configure() must run before anything imports app.core.database (it reads
+DATABASE_URL at import); install() then replaces the service singletons, so
+both direct service calls and the FastAPI app use the fakes.
+"""
+import os
+import tempfile
+
+JWT_SECRET = "offline-benchmark-secret-offline-benchmark-secret"
+
+
+def configure(workdir: str = None, database_url: str = None) -> str:
+    """Points the app at a SQLite file and local settings; returns the working directory."""
+    workdir = workdir or tempfile.mkdtemp(prefix="offline_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    os.environ["DATABASE_URL"] = database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["SUPABASE_JWT_SECRET"] = JWT_SECRET
+    os.environ.pop("SUPABASE_URL", None)
+    os.environ.pop("SUPABASE_JWKS_URL", None)
+    os.environ["WARMUP_ON_STARTUP"] = "false"
+    os.environ["TRANSCRIPT_CACHE_DIR"] = os.path.join(workdir, "transcripts")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embeddings.sqlite3")
+    # Repeated benchmark questions would otherwise be answered from the cache
+    os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+    return workdir
+
+
+class OfflineServices:
+    def __init__(self, transcript_service, chunk_service, embedding_service, index, genai_client, issuer):
+        self.transcript_service = transcript_service
+        self.chunk_service = chunk_service
+        self.embedding_service = embedding_service
+        self.index = index
+        self.genai_client = genai_client
+        self.issuer = issuer
+
+
+def install(llm_latency_ms: float = 300, index_latency_ms: float = 5, embed_ms_per_call: float = 2, embed_ms_per_text: float = 0.5, transcript_minutes: float = 30) -> OfflineServices:
+    """Creates the tables and swaps every external-facing singleton for its stand-in."""
+    from app.core.database import Base, engine
+    from app.services import chunk_service, embedding_service, llm_service, transcript_service, vector_db
+    # Registers every table before create_all
+    import app.services.ingestion_service  # noqa: F401
+    import app.schemas.ingestion_job  # noqa: F401
+    import app.schemas.session  # noqa: F401
+    from benchmarks.offline import fakes
+
+    Base.metadata.create_all(bind=engine)
+
+    services = OfflineServices(
+        transcript_service=fakes.FixtureTranscriptService(minutes=transcript_minutes),
+        chunk_service=fakes.WordChunkService(),
+        embedding_service=fakes.HashEmbeddingService(ms_per_call=embed_ms_per_call, ms_per_text=embed_ms_per_text),
+        index=fakes.InMemoryIndex(latency_ms=index_latency_ms),
+        genai_client=fakes.FakeGenaiClient(latency_ms=llm_latency_ms),
+        issuer=fakes.JwtIssuer(secret=JWT_SECRET)
+    )
+
+    transcript_service._transcript_service_instance = services.transcript_service
+    chunk_service._chunk_service_instance = services.chunk_service
+    embedding_service._embedding_service_instance = services.embedding_service
+    vector_db._db_service_instance = vector_db.VectorDBService(services.index)
+    llm_service._llm_service_instance = fakes.fake_llm_service(services.genai_client)
+    return services
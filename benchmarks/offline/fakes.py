@@ -0,0 +1,301 @@
+"""
+Deterministic stand-ins for the external services the app talks to.
+
+Each fake implements only the calls the app actually makes, with optional
+latency so a run can model a remote service without reaching it.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.chunker import iter_chunks
+from app.services.chunk_service import ChunkService
+
+DIM = 384
+
+WORDS = (
+    "so today we are going to talk about how neural networks learn from data and why "
+    "gradient descent works the way it does let me show you an example on the whiteboard "
+    "this is really important because most people get this part wrong in practice the "
+    "loss function measures error and the optimizer updates every weight a little bit"
+).split()
+
+
+# --- YouTube ---
+
+def transcript_segments(minutes: float, seed: int = 0):
+    """Caption segments like YouTube's: a few words every 2-4 seconds, with some sentence ends."""
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    while t < minutes * 60:
+        duration = rng.uniform(2.0, 4.0)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12)))
+        if rng.random() < 0.2:
+            text += "."
+        segments.append({"text": text, "start": round(t, 2), "duration": round(duration, 2)})
+        t += duration
+    return segments
+
+
+class FixtureTranscriptService:
+    """TranscriptService.get_transcript over generated fixtures; video ids map to stable seeds."""
+    def __init__(self, minutes: float = 30, latency_ms: float = 0):
+        self.minutes = minutes
+        self.latency = latency_ms / 1000
+        self.lengths = {}
+
+    def set_length(self, video_id: str, minutes: float):
+        self.lengths[video_id] = minutes
+
+    def get_transcript(self, video_id: str, language: str = "en", refresh: bool = False):
+        from app.schemas.transcript import TranscriptResponse, Snippet
+
+        time.sleep(self.latency)
+        seed = int(hashlib.sha256(video_id.encode("utf-8")).hexdigest()[:8], 16)
+        segments = transcript_segments(self.lengths.get(video_id, self.minutes), seed=seed)
+        return TranscriptResponse(
+            video_id=video_id,
+            title=f"Fixture {video_id}",
+            language="English",
+            language_code=language,
+            is_generated=True,
+            snippets=[Snippet(**segment) for segment in segments]
+        )
+
+
+# --- Chunking and embedding ---
+
+class WordChunkService(ChunkService):
+    """The real chunker, counting whitespace words instead of loading the model's tokenizer."""
+    def __init__(self, max_tokens: int = 254, overlap_tokens: int = 32):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def iter_chunks(self, segments, max_chars: int = 2000, overlap_chars: int = 300, max_tokens: int = None, overlap_tokens: int = None):
+        return iter_chunks(
+            segments=segments,
+            count_tokens=lambda text: len(text.split()),
+            max_tokens=min(max_tokens, self.max_tokens) if max_tokens else self.max_tokens,
+            overlap_tokens=self.overlap_tokens if overlap_tokens is None else overlap_tokens,
+            max_chars=max_chars,
+            overlap_chars=overlap_chars
+        )
+
+
+def hash_vector(text: str, dim: int = DIM) -> np.ndarray:
+    """Unit vector seeded by the text, so equal texts embed equally across runs."""
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class HashEmbeddingService:
+    """EmbeddingService without the model: hash-seeded vectors plus a simulated encode cost."""
+    def __init__(self, dim: int = DIM, ms_per_call: float = 0, ms_per_text: float = 0):
+        self.dim = dim
+        self.ms_per_call = ms_per_call
+        self.ms_per_text = ms_per_text
+
+    def embed_texts(self, texts):
+        time.sleep((self.ms_per_call + self.ms_per_text * len(texts)) / 1000)
+        return [hash_vector(text, self.dim).tolist() for text in texts]
+
+    async def aembed_texts(self, texts):
+        return await asyncio.to_thread(self.embed_texts, texts)
+
+
+# --- Pinecone ---
+
+def _matches(metadata: dict, filter: dict) -> bool:
+    for key, condition in (filter or {}).items():
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class _Namespace:
+    def __init__(self):
+        self.records = {}
+        self.matrix = None
+        self.ids = None
+
+
+class InMemoryIndex:
+    """
+    The subset of pinecone.Index that VectorDBService uses: upsert, query,
+    delete, update and describe_index_stats. Exact cosine search; each call
+    sleeps `latency_ms` to stand in for the network round trip.
+    """
+    def __init__(self, latency_ms: float = 0):
+        self.latency = latency_ms / 1000
+        self.namespaces = {}
+        self.lock = threading.Lock()
+        self.requests = {"upsert": 0, "query": 0, "delete": 0, "update": 0}
+
+    def _namespace(self, namespace: str) -> _Namespace:
+        return self.namespaces.setdefault(namespace or "", _Namespace())
+
+    def _call(self, name: str):
+        self.requests[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def upsert(self, vectors, namespace: str = None):
+        self._call("upsert")
+        with self.lock:
+            ns = self._namespace(namespace)
+            for vector in vectors:
+                ns.records[vector["id"]] = (np.asarray(vector["values"], dtype=np.float32), dict(vector.get("metadata") or {}))
+            ns.matrix = None
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, top_k: int, filter: dict = None, include_values: bool = False, include_metadata: bool = True, namespace: str = None):
+        self._call("query")
+        with self.lock:
+            ns = self._namespace(namespace)
+            if ns.matrix is None and ns.records:
+                ns.ids = list(ns.records)
+                matrix = np.stack([ns.records[vid][0] for vid in ns.ids])
+                ns.matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            if ns.matrix is None:
+                return SimpleNamespace(matches=[])
+
+            candidates = [i for i, vid in enumerate(ns.ids) if _matches(ns.records[vid][1], filter)]
+            if not candidates:
+                return SimpleNamespace(matches=[])
+            query = np.asarray(vector, dtype=np.float32)
+            scores = ns.matrix[candidates] @ (query / max(np.linalg.norm(query), 1e-12))
+            order = np.argsort(-scores)[:top_k]
+            return SimpleNamespace(matches=[
+                SimpleNamespace(
+                    id=ns.ids[candidates[i]],
+                    score=float(scores[i]),
+                    metadata=dict(ns.records[ns.ids[candidates[i]]][1]) if include_metadata else None
+                )
+                for i in order
+            ])
+
+    def delete(self, ids=None, filter: dict = None, delete_all: bool = False, namespace: str = None):
+        self._call("delete")
+        with self.lock:
+            ns = self._namespace(namespace)
+            if delete_all:
+                ns.records.clear()
+            elif ids is not None:
+                for vid in ids:
+                    ns.records.pop(vid, None)
+            elif filter is not None:
+                for vid in [vid for vid, (_, metadata) in ns.records.items() if _matches(metadata, filter)]:
+                    del ns.records[vid]
+            ns.matrix = None
+
+    def update(self, id: str, set_metadata: dict = None, namespace: str = None):
+        self._call("update")
+        with self.lock:
+            record = self._namespace(namespace).records.get(id)
+            if record is not None:
+                record[1].update(set_metadata or {})
+
+    def describe_index_stats(self):
+        with self.lock:
+            return SimpleNamespace(total_vector_count=sum(len(ns.records) for ns in self.namespaces.values()))
+
+
+# --- Gemini ---
+
+class _Response:
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=max(1, len(text) // 4))
+
+
+class _Models:
+    def __init__(self, client: "FakeGenaiClient"):
+        self.client = client
+
+    def generate_content(self, model: str, contents: str):
+        time.sleep(self.client.latency_seconds(contents))
+        return self.client.respond(contents)
+
+    def generate_content_stream(self, model: str, contents: str):
+        answer = self.client.respond(contents)
+        words = answer.text.split(" ")
+        time.sleep(self.client.first_token)
+        for i in range(0, len(words), self.client.words_per_chunk):
+            time.sleep(self.client.per_chunk)
+            piece = " ".join(words[i:i + self.client.words_per_chunk]) + " "
+            last = i + self.client.words_per_chunk >= len(words)
+            yield _Response(piece, answer.usage_metadata.prompt_token_count) if last else SimpleNamespace(text=piece, usage_metadata=None)
+
+
+class _AsyncModels:
+    def __init__(self, client: "FakeGenaiClient"):
+        self.client = client
+
+    async def generate_content(self, model: str, contents: str):
+        await asyncio.sleep(self.client.latency_seconds(contents))
+        return self.client.respond(contents)
+
+
+class FakeGenaiClient:
+    """
+    genai.Client stand-in. A call takes `latency_ms` plus `ms_per_1k_prompt_tokens`
+    per thousand estimated prompt tokens, and answers with a fixed-length text
+    citing the first source in the prompt.
+    """
+    def __init__(self, latency_ms: float = 300, ms_per_1k_prompt_tokens: float = 20, answer_words: int = 80, words_per_chunk: int = 8, first_token_ms: float = 150):
+        self.latency = latency_ms / 1000
+        self.per_1k_tokens = ms_per_1k_prompt_tokens / 1000
+        self.answer_words = answer_words
+        self.words_per_chunk = words_per_chunk
+        self.first_token = first_token_ms / 1000
+        chunks = max(1, answer_words // words_per_chunk)
+        self.per_chunk = max(0.0, self.latency - self.first_token) / chunks
+        self.models = _Models(self)
+        self.aio = SimpleNamespace(models=_AsyncModels(self))
+
+    def latency_seconds(self, prompt: str) -> float:
+        return self.latency + len(prompt) / 4 / 1000 * self.per_1k_tokens
+
+    def respond(self, prompt: str) -> _Response:
+        rng = random.Random(len(prompt))
+        text = " ".join(rng.choice(WORDS) for _ in range(self.answer_words)) + " [Fixture, 0:00]."
+        return _Response(text, prompt_tokens=len(prompt) // 4)
+
+
+def fake_llm_service(client: FakeGenaiClient):
+    """An LLMService whose genai client is `client`."""
+    from app.services.llm_service import LLMService
+
+    return LLMService(client=client)
+
+
+# --- Supabase auth ---
+
+class JwtIssuer:
+    """Signs Supabase-shaped HS256 access tokens with a local secret."""
+    def __init__(self, secret: str, audience: str = "authenticated"):
+        self.secret = secret
+        self.audience = audience
+
+    def issue(self, user_id: str = None, ttl_seconds: int = 3600) -> str:
+        import jwt
+
+        now = int(time.time())
+        claims = {"sub": user_id or str(uuid.uuid4()), "aud": self.audience, "role": "authenticated", "iat": now, "exp": now + ttl_seconds}
+        return jwt.encode(claims, self.secret, algorithm="HS256")
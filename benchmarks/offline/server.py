@@ -0,0 +1,45 @@
+"""
+Serves the FastAPI app wired to the offline stand-ins.
+
+    python -m benchmarks.offline.server [--port 8765] [--llm-latency-ms 300] [--database postgresql://...]
+
+Everything external (YouTube, Pinecone, Gemini, Supabase) is faked in-process;
+the database is a temporary SQLite file unless --database is given, which is
+the way to exercise real connection pool limits. Tokens signed with
+environment.JWT_SECRET are accepted.
+"""
+import argparse
+
+from benchmarks.offline import environment
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database", help="DATABASE_URL to use (default: a temporary SQLite file)")
+    parser.add_argument("--workdir", help="directory for the SQLite database and caches (default: a temporary one)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--index-latency-ms", type=float, default=5)
+    parser.add_argument("--embed-ms-per-call", type=float, default=2)
+    parser.add_argument("--embed-ms-per-text", type=float, default=0.5)
+    parser.add_argument("--transcript-minutes", type=float, default=30)
+    args = parser.parse_args()
+
+    environment.configure(args.workdir, database_url=args.database)
+    environment.install(
+        llm_latency_ms=args.llm_latency_ms,
+        index_latency_ms=args.index_latency_ms,
+        embed_ms_per_call=args.embed_ms_per_call,
+        embed_ms_per_text=args.embed_ms_per_text,
+        transcript_minutes=args.transcript_minutes
+    )
+
+    import uvicorn
+    from app.main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
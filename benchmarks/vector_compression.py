@@ -0,0 +1,155 @@
+"""
+Recall@k of compressed vector storage against uncompressed float32 search.
+
+    python -m benchmarks.vector_compression --texts chunks.txt [--dims 64 128 192] [--dtypes float32 float16 int8] [--output compression.json]
+    python -m benchmarks.vector_compression --namespace vector_store/user_123
+    python -m benchmarks.vector_compression --texts chunks.txt --save-pca .cache/vector_pca.npz --pca-dim 128
+
+The corpus is either --texts (one chunk per line, embedded with the configured
+model) or an existing local index namespace. --synthetic N generates clustered
+random vectors instead; good for a smoke run, not for choosing a setting.
+
+--queries corpus rows are held out as queries. Their exact top-k over the
+remaining rows, at full dimension in float32, is the ground truth. Every
+combination of reduction (none, pca, random) x --dims x --dtypes is then
+loaded into a NamespaceIndex. Queries go through the same transform, and the
+share of the true top-k that comes back is recall@k. The index is searched
+exactly (no IVF), so only compression is measured.
+
+PCA is fitted on the corpus rows, never on the held-out queries. --save-pca
+writes the PCA fitted on the whole corpus, for VECTOR_REDUCTION=pca.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.vector_compression import PCATransform, RandomProjection
+from app.core.vector_index import NamespaceIndex, VECTORS_FILES, _normalize, _top_k
+from benchmarks.offline.report import git_commit
+
+
+def load_texts(path: str, batch_size: int = 256) -> np.ndarray:
+    from app.core.embedding import embed_texts
+
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embed_texts(texts[start:start + batch_size]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def load_namespace(path: str) -> np.ndarray:
+    index = NamespaceIndex(path=path, ann_threshold=0, nprobe=1)
+    if not index.count:
+        raise SystemExit(f"No vectors in {path}")
+    return index._decode(index.vectors[:index.count])
+
+
+def synthetic(count: int, dim: int = 384, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    return (centers[rng.integers(clusters, size=count)] + 0.6 * rng.standard_normal((count, dim))).astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int):
+    scores = _normalize(queries) @ _normalize(corpus).T
+    return [set(_top_k(row, k).tolist()) for row in scores]
+
+
+def evaluate(corpus: np.ndarray, queries: np.ndarray, truth, k: int, dtype: str, transform=None):
+    if transform is not None:
+        corpus, queries = transform.apply(corpus), transform.apply(queries)
+
+    with tempfile.TemporaryDirectory(prefix="compression-bench-") as path:
+        index = NamespaceIndex(path=path, ann_threshold=len(corpus) + 1, nprobe=1, dtype=dtype)
+        ids = [str(i) for i in range(len(corpus))]
+        index.upsert(ids=ids, vectors=corpus, metadata=[{} for _ in ids])
+        stored_bytes = index.count * index.dim * np.dtype(dtype).itemsize
+
+        hits = 0
+        started = time.perf_counter()
+        for query, expected in zip(queries, truth):
+            found = {int(match["id"]) for match in index.query(vector=query, top_k=k)}
+            hits += len(found & expected)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "dim": corpus.shape[1],
+        "dtype": dtype,
+        f"recall_at_{k}": round(hits / (k * len(queries)), 4),
+        "bytes_per_vector": stored_bytes // len(corpus),
+        "index_mib": round(stored_bytes / 2 ** 20, 2),
+        "query_ms": round(elapsed / len(queries) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--texts", help="file with one chunk of text per line")
+    source.add_argument("--namespace", help="local index namespace directory, e.g. vector_store/user_123")
+    source.add_argument("--synthetic", type=int, help="number of clustered random vectors to generate")
+    parser.add_argument("--queries", type=int, default=200, help="corpus rows held out as queries")
+    parser.add_argument("--k", type=int, default=5, help="the retrieval top_k to measure recall at")
+    parser.add_argument("--reductions", nargs="+", choices=["none", "pca", "random"], default=["none", "pca", "random"])
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 192, 256])
+    parser.add_argument("--dtypes", nargs="+", choices=list(VECTORS_FILES), default=list(VECTORS_FILES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-pca", help="write the PCA fitted on the whole corpus to this path")
+    parser.add_argument("--pca-dim", type=int, default=128, help="dimension of the PCA written by --save-pca")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.texts:
+        vectors = load_texts(args.texts)
+    elif args.namespace:
+        vectors = load_namespace(args.namespace)
+    else:
+        vectors = synthetic(args.synthetic, seed=args.seed)
+
+    if args.save_pca:
+        PCATransform.fit(vectors, args.pca_dim, seed=args.seed).save(args.save_pca)
+        print(json.dumps({"saved_pca": args.save_pca, "dim": args.pca_dim, "fitted_on": len(vectors)}))
+
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(vectors))
+    queries, corpus = vectors[order[:args.queries]], vectors[order[args.queries:]]
+    if len(corpus) < args.k:
+        raise SystemExit(f"Need more than {args.queries + args.k} vectors, got {len(vectors)}")
+    truth = exact_top_k(corpus, queries, args.k)
+
+    results = []
+    for reduction in args.reductions:
+        for dim in ([corpus.shape[1]] if reduction == "none" else args.dims):
+            if reduction == "pca":
+                if dim > min(corpus.shape):
+                    continue
+                transform = PCATransform.fit(corpus, dim, seed=args.seed)
+            elif reduction == "random":
+                transform = RandomProjection(dim, seed=args.seed)
+            else:
+                transform = None
+
+            for dtype in args.dtypes:
+                result = {"reduction": reduction, **evaluate(corpus, queries, truth, args.k, dtype, transform)}
+                results.append(result)
+                print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_commit(),
+                "corpus": len(corpus),
+                "queries": len(queries),
+                "input_dim": corpus.shape[1],
+                "config": vars(args),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Vector upsert throughput against a local fake index.
+
+    python -m benchmarks.vector_upserts [--chunks 5000] [--concurrency 1 4 8] [--failure-rate 0.05]
+
+The fake index sleeps for a fixed round trip plus a per-KiB transfer time,
+rejects requests over the size limit and fails a fraction of requests with a
+retryable 503. Embedding is simulated with a per-batch sleep. The baseline is
+the previous behaviour (embed a batch, then upload it in fixed 100-vector
+requests, one at a time); the other runs stream the same batches through
+VectorDBService.ingest_stream at increasing upload concurrency.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from app.core.upsert_engine import UpsertEngine, payload_size
+from app.services.vector_db import VectorDBService, UPSERT_MAX_BATCH_BYTES, UPSERT_MAX_BATCH_VECTORS
+
+REQUEST_LIMIT_BYTES = 2 * 1024 * 1024
+
+
+class FakeTransientError(Exception):
+    status = 503
+
+
+class FakeIndex:
+    def __init__(self, latency_ms: float, ms_per_kib: float, failure_rate: float, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.seconds_per_kib = ms_per_kib / 1000
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.vectors = {}
+        self.requests = 0
+        self.rejected = 0
+        self.largest_request = 0
+
+    def upsert(self, vectors, namespace=None):
+        size = sum(payload_size(v) for v in vectors)
+        with self.lock:
+            self.requests += 1
+            self.largest_request = max(self.largest_request, size)
+            fail = self.rng.random() < self.failure_rate
+
+        time.sleep(self.latency + size / 1024 * self.seconds_per_kib)
+        if size > REQUEST_LIMIT_BYTES:
+            with self.lock:
+                self.rejected += 1
+            raise ValueError(f"Request size {size} exceeds the 2 MB limit")
+        if fail:
+            raise FakeTransientError("Service unavailable")
+
+        with self.lock:
+            for vector in vectors:
+                self.vectors[vector["id"]] = vector
+
+
+def document_batches(chunks: int, batch_size: int, dim: int, text_chars: int, embed_ms: float, seed: int = 0):
+    rng = random.Random(seed)
+    text = ("lorem ipsum dolor sit amet " * (text_chars // 27 + 1))[:text_chars]
+    for start in range(0, chunks, batch_size):
+        time.sleep(embed_ms / 1000)
+        yield [
+            {
+                "id": f"bench_{i}",
+                "text": text,
+                "vector": [rng.uniform(-1, 1) for _ in range(dim)],
+                "metadata": {"user_id": "bench", "source": "bench", "source_type": "video", "start": float(i), "end": float(i + 1)},
+            }
+            for i in range(start, min(chunks, start + batch_size))
+        ]
+
+
+def run_baseline(args) -> dict:
+    index = FakeIndex(args.latency_ms, args.ms_per_kib, failure_rate=0.0)
+    started = time.perf_counter()
+    for documents in document_batches(args.chunks, args.embed_batch_size, args.dim, args.text_chars, args.embed_ms):
+        vectors = [{"id": d["id"], "values": d["vector"], "metadata": {"text": d["text"], **d["metadata"]}} for d in documents]
+        for i in range(0, len(vectors), 100):
+            index.upsert(vectors[i:i + 100])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": "sequential-100",
+        "concurrency": 1,
+        "seconds": round(elapsed, 3),
+        "vectors_per_second": round(args.chunks / elapsed, 1),
+        "requests": index.requests,
+        "largest_request_kib": round(index.largest_request / 1024, 1),
+        "stored": len(index.vectors),
+    }
+
+
+def run_engine(args, concurrency: int) -> dict:
+    index = FakeIndex(args.latency_ms, args.ms_per_kib, failure_rate=args.failure_rate)
+    engine = UpsertEngine(
+        max_batch_bytes=UPSERT_MAX_BATCH_BYTES,
+        max_batch_vectors=UPSERT_MAX_BATCH_VECTORS,
+        concurrency=concurrency,
+        max_retries=8,
+        backoff_seconds=0.05,
+        max_backoff_seconds=1.0
+    )
+    service = VectorDBService(index, upsert_engine=engine)
+
+    started = time.perf_counter()
+    service.ingest_stream(document_batches(args.chunks, args.embed_batch_size, args.dim, args.text_chars, args.embed_ms), namespace="bench")
+    elapsed = time.perf_counter() - started
+    stats = engine.stats()
+
+    return {
+        "mode": "streamed",
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "vectors_per_second": round(args.chunks / elapsed, 1),
+        "requests": index.requests,
+        "retries": stats["retries"],
+        "largest_request_kib": round(index.largest_request / 1024, 1),
+        "stored": len(index.vectors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--text-chars", type=int, default=2000)
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--embed-ms", type=float, default=40, help="simulated embedding time per batch")
+    parser.add_argument("--latency-ms", type=float, default=60, help="fake index round trip per request")
+    parser.add_argument("--ms-per-kib", type=float, default=0.05, help="fake index transfer time per KiB")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="fraction of requests failing with a retryable 503")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = [run_baseline(args)] + [run_engine(args, c) for c in args.concurrency]
+
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()